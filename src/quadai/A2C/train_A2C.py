@@ -1,18 +1,19 @@
 import sys
 import os
+import time
+import argparse
 
 # Path setup
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
 
 from stable_baselines3 import A2C
-from stable_baselines3.common.monitor import Monitor
 from stable_baselines3.common.callbacks import CheckpointCallback
 
 # Importiamo le funzioni di percorso corrette
 from quadai.utils.paths import get_raw_logs_dir, get_models_dir, get_checkpoints_dir
-from env_A2C import droneEnv 
+from quadai.utils.training import add_vec_env_args, make_vec_env, report_throughput
 
-def train():
+def train(n_envs=1, vec_backend="dummy", seed=None):
     # --- IMPOSTAZIONI ---
     ALGO = "A2C"
     VERSION = "v1" 
@@ -27,14 +28,20 @@ def train():
     print(f"Logs: {log_dir}")
 
     # --- AMBIENTE ---
-    env = droneEnv(render_every_frame=False, mouse_target=False)
-    env = Monitor(env, os.path.join(log_dir, "monitor.csv"))
+    env = make_vec_env(
+        "quadai.A2C.env_A2C",
+        n_envs,
+        vec_backend,
+        monitor_path=os.path.join(log_dir, "monitor.csv"),
+        seed=seed,
+    )
 
     # --- MODELLO A2C ---
     model = A2C(
         "MlpPolicy", 
         env, 
         verbose=1, 
+        seed=seed,
         tensorboard_log=log_dir,
         # Iperparametri base A2C
         learning_rate=0.0007,
@@ -45,13 +52,16 @@ def train():
 
     # --- CALLBACK ---
     checkpoint_callback = CheckpointCallback(
-        save_freq=100000, 
+        # save_freq conta le chiamate al VecEnv (n_envs step ciascuna)
+        save_freq=max(100000 // env.num_envs, 1),
         save_path=checkpoint_dir,
         name_prefix=f"{ALGO.lower()}_checkpoint_{VERSION}"
     )
 
     # --- ESECUZIONE ---
+    start_time = time.perf_counter()
     model.learn(total_timesteps=TIMESTEPS, callback=checkpoint_callback)
+    report_throughput(model, start_time, env.num_envs, vec_backend)
     
     # --- SALVATAGGIO ---
     filename = f"{ALGO.lower()}_model_{VERSION}_{TIMESTEPS}_steps"
@@ -61,4 +71,6 @@ def train():
     print(f"Finito! Modello salvato in: {final_path}")
 
 if __name__ == "__main__":
-    train()
\ No newline at end of file
+    parser = add_vec_env_args(argparse.ArgumentParser(description="Training A2C"))
+    args = parser.parse_args()
+    train(n_envs=args.n_envs, vec_backend=args.vec_backend, seed=args.seed)
@@ -1,15 +1,16 @@
 import sys
 import os
+import time
+import argparse
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
 
 from stable_baselines3 import A2C
-from stable_baselines3.common.monitor import Monitor
 from stable_baselines3.common.callbacks import CheckpointCallback
 
 from quadai.utils.paths import get_raw_logs_dir, get_models_dir, get_checkpoints_dir
-from env_noisy_A2C import droneEnv
+from quadai.utils.training import add_vec_env_args, make_vec_env, report_throughput
 
-def train():
+def train(n_envs=1, vec_backend="dummy", seed=None):
     # --- IMPOSTAZIONI ---
     ALGO = "A2C"
     VERSION = "v1_noise"
@@ -23,20 +24,26 @@ def train():
     print(f"--- TRAINING A2C {VERSION} (NOISY) ---")
 
     # --- AMBIENTE (NOISY) ---
-    env = droneEnv(
-        render_every_frame=False,
-        mouse_target=False,
+    env_kwargs = dict(
         wind_enabled=True,
         wind_speed_max=0.04,
-        sensor_noise_enabled=True
+        sensor_noise_enabled=True,
+    )
+    env = make_vec_env(
+        "quadai.A2C.env_noisy_A2C",
+        n_envs,
+        vec_backend,
+        env_kwargs=env_kwargs,
+        monitor_path=os.path.join(log_dir, "monitor_noisy.csv"),
+        seed=seed,
     )
-    env = Monitor(env, os.path.join(log_dir, "monitor_noisy.csv"))
 
     # --- MODELLO A2C ---
     model = A2C(
         "MlpPolicy", 
         env, 
         verbose=1, 
+        seed=seed,
         tensorboard_log=log_dir,
         learning_rate=0.0007,
         gamma=0.99,
@@ -46,18 +53,21 @@ def train():
 
     # --- CALLBACK ---
     checkpoint_callback = CheckpointCallback(
-        save_freq=100000, 
+        # save_freq conta le chiamate al VecEnv (n_envs step ciascuna)
+        save_freq=max(100000 // env.num_envs, 1),
         save_path=checkpoint_dir,
         name_prefix=f"{ALGO.lower()}_checkpoint_{VERSION}"
     )
 
     # --- TRAINING ---
     # Fondamentale: tb_log_name qui dentro!
+    start_time = time.perf_counter()
     model.learn(
         total_timesteps=TIMESTEPS, 
         callback=checkpoint_callback,
         tb_log_name="A2C_NOISY"
     )
+    report_throughput(model, start_time, env.num_envs, vec_backend)
     
     filename = f"{ALGO.lower()}_model_{VERSION}_{TIMESTEPS}_steps"
     final_path = os.path.join(models_dir, filename)
@@ -66,4 +76,6 @@ def train():
     print(f"Modello Noisy salvato in: {final_path}")
 
 if __name__ == "__main__":
-    train()
\ No newline at end of file
+    parser = add_vec_env_args(argparse.ArgumentParser(description="Training A2C"))
+    args = parser.parse_args()
+    train(n_envs=args.n_envs, vec_backend=args.vec_backend, seed=args.seed)
@@ -11,44 +11,41 @@ The goal is to reach randomly positoned targets
 
 import sys
 import os
-from math import sin, cos, pi, sqrt
-from random import randrange
+from typing import Optional
 
 import numpy as np
 import gym
 from gym import spaces
 
-import pygame
-from pygame.locals import *
-
 # --- AGGIUNTA FONDAMENTALE ---
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
 from quadai.utils.paths import get_assets_dir # type: ignore
+from quadai.kernels import EnvKernel
+from quadai.obs import OBS_SIZE, build_obs
+from quadai.physics import FRAMES_PER_ACTION, step_frame, mix_thrusters, target_distance
 
 class droneEnv(gym.Env):
-    def __init__(self, render_every_frame, mouse_target):
+    def __init__(
+        self,
+        render_every_frame,
+        mouse_target,
+        preallocated_obs=False,
+        frame_skip=FRAMES_PER_ACTION,
+        physics_substeps=1,
+        kernel=None,
+    ):
         super(droneEnv, self).__init__()
 
         self.render_every_frame = render_every_frame
         self.mouse_target = mouse_target
+        # Called after every frame with (env, thruster_left, thruster_right),
+        # e.g. by quadai.trajectory.EnvRecorder
+        self.on_frame = None
 
-        # Initialize Pygame, load sprites
-        pygame.init()
-        self.screen = pygame.display.set_mode((800, 800))
-        self.FramePerSec = pygame.time.Clock()
-
-        # --- CARICAMENTO ASSETS DISACCOPPIATO ---
-        assets_dir = get_assets_dir()
-        
-        # Carichiamo usando il percorso assoluto fornito da utils
-        self.player = pygame.image.load(os.path.join(assets_dir, "sprites/drone_old.png"))
-        self.player.convert()
-
-        self.target = pygame.image.load(os.path.join(assets_dir, "sprites/target_old.png"))
-        self.target.convert()
-
-        pygame.font.init()
-        self.myfont = pygame.font.SysFont("Comic Sans MS", 20)
+        # Pygame is only initialized when rendering is needed (headless mode)
+        self.screen = None
+        if self.render_every_frame is True or self.mouse_target is True:
+            self._init_render()
 
         # Physics constants
         self.FPS = 60
@@ -58,13 +55,21 @@ class droneEnv(gym.Env):
         self.thruster_mean = 0.04
         self.mass = 1
         self.arm = 25
+        # Frames simulated per action (1/60 s each) and integration steps per
+        # frame: reward and time are counted per frame, so the return of an
+        # episode does not depend on frame_skip
+        self.frame_skip = frame_skip
+        self.physics_substeps = physics_substeps
+
+        # Random numbers of the env (target positions), see seed()
+        self.rng = np.random.default_rng()
 
         # Initialize variables
         (self.a, self.ad, self.add) = (0, 0, 0)
         (self.x, self.xd, self.xdd) = (400, 0, 0)
         (self.y, self.yd, self.ydd) = (400, 0, 0)
-        self.xt = randrange(200, 600)
-        self.yt = randrange(200, 600)
+        self.xt = int(self.rng.integers(200, 600))
+        self.yt = int(self.rng.integers(200, 600))
 
         # Initialize game variables
         self.target_counter = 0
@@ -79,88 +84,100 @@ class droneEnv(gym.Env):
         # 8 observations
         self.observation_space = spaces.Box(low=-np.inf, high=np.inf, shape=(7,))
 
-    def reset(self):
+        # With preallocated_obs, step and reset always write into the same
+        # arrays (two distinct buffers, so that the terminal_observation kept
+        # by the VecEnv is not overwritten by the reset)
+        self.preallocated_obs = preallocated_obs
+        self._step_obs = np.empty(OBS_SIZE, dtype=np.float32) if preallocated_obs else None
+        self._reset_obs = np.empty(OBS_SIZE, dtype=np.float32) if preallocated_obs else None
+
+        # With kernel ("auto", "numba", "numpy" or "python") the frames of step
+        # run in a compiled kernel instead of the Python loop; None for the
+        # Python loop, which is also used when rendering, with mouse_target
+        # and with on_frame
+        self.kernel = kernel
+        self._env_kernel = None if kernel is None else EnvKernel(kernel)
+
+    def seed(self, seed=None):
+        """
+        Seeds the random numbers of the env (target positions).
+
+        Args:
+            seed: int, np.random.SeedSequence (e.g. children of spawn() for
+                parallel envs) or None for fresh entropy
+
+        Returns:
+            list: [seed], as gym's seed()
+        """
+        self.rng = np.random.default_rng(seed)
+        return [seed]
+
+    def reset(self, seed=None):
+        if seed is not None:
+            self.seed(seed)
+
         # Reset variables
         (self.a, self.ad, self.add) = (0, 0, 0)
         (self.x, self.xd, self.xdd) = (400, 0, 0)
         (self.y, self.yd, self.ydd) = (400, 0, 0)
-        self.xt = randrange(200, 600)
-        self.yt = randrange(200, 600)
+        self.xt = int(self.rng.integers(200, 600))
+        self.yt = int(self.rng.integers(200, 600))
 
         self.target_counter = 0
         self.reward = 0
         self.time = 0
 
-        return self.get_obs()
+        return self.get_obs(self._reset_obs)
 
-    def get_obs(self) -> np.ndarray:
-        angle_to_up = self.a / 180 * pi
-        velocity = sqrt(self.xd**2 + self.yd**2)
-        angle_velocity = self.ad
-        distance_to_target = (
-            sqrt((self.xt - self.x) ** 2 + (self.yt - self.y) ** 2) / 500
-        )
-        angle_to_target = np.arctan2(self.yt - self.y, self.xt - self.x)
-        # Angle between the to_target vector and the velocity vector
-        angle_target_and_velocity = np.arctan2(
-            self.yt - self.y, self.xt - self.x
-        ) - np.arctan2(self.yd, self.xd)
-        distance_to_target = (
-            sqrt((self.xt - self.x) ** 2 + (self.yt - self.y) ** 2) / 500
+    def get_obs(self, out: Optional[np.ndarray] = None) -> np.ndarray:
+        return build_obs(
+            self.x, self.y, self.xd, self.yd, self.a, self.ad, self.xt, self.yt, out=out
         )
-        return np.array(
-            [
-                angle_to_up,
-                velocity,
-                angle_velocity,
-                distance_to_target,
-                angle_to_target,
-                angle_target_and_velocity,
-                distance_to_target,
-            ]
-        ).astype(np.float32)
 
     def step(self, action):
         # Game loop
         self.reward = 0.0
         (action0, action1) = (action[0], action[1])
+        thruster_left, thruster_right = mix_thrusters(
+            action0,
+            action1,
+            self.thruster_mean,
+            self.thruster_amplitude,
+            self.diff_amplitude,
+        )
 
-        # Act every 5 frames
-        for _ in range(5):
+        # All the frames of the action in one kernel call, when nothing has
+        # to happen between two frames
+        if (
+            self._env_kernel is not None
+            and self.on_frame is None
+            and self.render_every_frame is not True
+            and self.mouse_target is not True
+        ):
+            (self.reward, done) = self._env_kernel.step(self, thruster_left, thruster_right)
+            return (self.get_obs(self._step_obs), self.reward, done, {})
+
+        # Act every frame_skip frames (5 by default)
+        for _ in range(self.frame_skip):
             self.time += 1 / 60
 
             if self.mouse_target is True:
-                self.xt, self.yt = pygame.mouse.get_pos()
-
-            # Initialize accelerations
-            self.xdd = 0
-            self.ydd = self.gravity
-            self.add = 0
-            thruster_left = self.thruster_mean
-            thruster_right = self.thruster_mean
+                import pygame
 
-            thruster_left += action0 * self.thruster_amplitude
-            thruster_right += action0 * self.thruster_amplitude
-            thruster_left += action1 * self.diff_amplitude
-            thruster_right -= action1 * self.diff_amplitude
+                self.xt, self.yt = pygame.mouse.get_pos()
 
             # Calculating accelerations with Newton's laws of motions
-            self.xdd += (
-                -(thruster_left + thruster_right) * sin(self.a * pi / 180) / self.mass
+            step_frame(
+                self,
+                thruster_left,
+                thruster_right,
+                gravity=self.gravity,
+                mass=self.mass,
+                arm=self.arm,
+                substeps=self.physics_substeps,
             )
-            self.ydd += (
-                -(thruster_left + thruster_right) * cos(self.a * pi / 180) / self.mass
-            )
-            self.add += self.arm * (thruster_right - thruster_left) / self.mass
-
-            self.xd += self.xdd
-            self.yd += self.ydd
-            self.ad += self.add
-            self.x += self.xd
-            self.y += self.yd
-            self.a += self.ad
 
-            dist = sqrt((self.x - self.xt) ** 2 + (self.y - self.yt) ** 2)
+            dist = target_distance(self, self.xt, self.yt)
 
             # Reward per step survived
             self.reward += 1 / 60
@@ -169,9 +186,13 @@ class droneEnv(gym.Env):
 
             if dist < 50:
                 # Reward if close to target
-                self.xt = randrange(200, 600)
-                self.yt = randrange(200, 600)
+                self.xt = int(self.rng.integers(200, 600))
+                self.yt = int(self.rng.integers(200, 600))
                 self.reward += 100
+                self.target_counter += 1
+
+            if self.on_frame is not None:
+                self.on_frame(self, thruster_left, thruster_right)
 
             # If out of time
             if self.time > self.time_limit:
@@ -193,13 +214,43 @@ class droneEnv(gym.Env):
         info = {}
 
         return (
-            self.get_obs(),
+            self.get_obs(self._step_obs),
             self.reward,
             done,
             info,
         )
 
+    def _init_render(self):
+        """
+        Initializes Pygame, loads sprites.
+        Only called when rendering is needed (render or mouse_target), so that
+        training envs never open a window nor require a video driver.
+        """
+        import pygame
+
+        pygame.init()
+        self.screen = pygame.display.set_mode((800, 800))
+        self.FramePerSec = pygame.time.Clock()
+
+        # --- CARICAMENTO ASSETS DISACCOPPIATO ---
+        assets_dir = get_assets_dir()
+        
+        # Carichiamo usando il percorso assoluto fornito da utils
+        self.player = pygame.image.load(os.path.join(assets_dir, "sprites/drone_old.png"))
+        self.player.convert()
+
+        self.target = pygame.image.load(os.path.join(assets_dir, "sprites/target_old.png"))
+        self.target.convert()
+
+        pygame.font.init()
+        self.myfont = pygame.font.SysFont("Comic Sans MS", 20)
+
     def render(self, mode):
+        import pygame
+
+        if self.screen is None:
+            self._init_render()
+
         # Pygame rendering
         pygame.event.get()
         self.screen.fill(0)
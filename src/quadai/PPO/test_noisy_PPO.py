@@ -1,26 +1,20 @@
 import sys
 import os
-import numpy as np
-from math import sqrt
+import time
+import argparse
 
 # Setup dei percorsi
 sys.path.append(os.path.join(os.path.dirname(__file__), "..", ".."))
 
-from stable_baselines3 import PPO
-from stable_baselines3.common.evaluation import evaluate_policy
-from stable_baselines3.common.monitor import Monitor
-
 from quadai.utils.paths import get_models_dir
+from quadai.utils.evaluation import evaluate_parallel, summarize, print_report
 
 
-# ------ selezione dell'environment 
-
-from env_noisy_PPO import droneEnv
+# ------ selezione dell'environment
 env_name = "env_noisy_PPO"
 
 
-
-def test_stats():
+def test_stats(shards=1):
     # --- CONFIGURAZIONE ---
     N_EPISODES = 500  # usa 100 per debug veloce, 500-1000 per numeri “seri”
     VERSION = "v2_noise"
@@ -35,13 +29,11 @@ def test_stats():
         print(f"ERRORE: Non trovo il modello in {model_path}")
         return
 
-    print(f"--- INIZIO TEST STATISTICO (Su {N_EPISODES} episodi) ---")
+    print(f"--- INIZIO TEST STATISTICO PPO (Su {N_EPISODES} episodi) ---")
     print(f"Caricamento modello: {FILENAME}")
 
     # --- 1. Ambiente di test ---
-    env = droneEnv(
-        render_every_frame=False,
-        mouse_target=False,
+    env_kwargs = dict(
         wind_enabled=True,
         wind_dir_min_deg=0.0,
         wind_dir_max_deg=360.0,
@@ -52,81 +44,28 @@ def test_stats():
         wind_speed_rw_std=0.003,
         sensor_noise_enabled=True,
     )
-    env = Monitor(env)
 
-    # --- 2. Carichiamo il modello ---
-    model = PPO.load(model_path, env=env)
-
-    # --- 3. Reward medio con evaluate_policy (comodo, già pronto) ---
-    print("Calcolo reward medio con evaluate_policy...")
-    mean_reward, std_reward = evaluate_policy(
-        model,
-        env,
-        n_eval_episodes=N_EPISODES,
+    # --- 2. Un solo passaggio batched: reward, palloncini, crash e durata ---
+    start_time = time.perf_counter()
+    episodes = evaluate_parallel(
+        "PPO",
+        model_path,
+        "quadai.PPO.env_noisy_PPO",
+        N_EPISODES,
+        env_kwargs=env_kwargs,
+        shards=shards,
         deterministic=True,
-        render=False,
-        return_episode_rewards=False,
     )
+    print(f"Valutazione completata in {time.perf_counter() - start_time:.1f} s")
 
-    # --- 4. Run manuale per palloncini e crash ---
-    print("Calcolo palloncini medi e % crash...")
-
-    episode_rewards = []
-    balloons_per_ep = []
-    crashes = 0
-
-    for ep in range(N_EPISODES):
-        obs = env.reset()
-        done = False
-        ep_reward = 0.0
-
-        inner_env = env.env  # droneEnv interno
-        start_targets = inner_env.target_counter  # di solito 0
-
-        crashed = False
-
-        while not done:
-            action, _ = model.predict(obs, deterministic=True)
-            obs, reward, done, info = env.step(action)
-            ep_reward += reward
-
-            # qui ricostruiamo la distanza drone-target come nell'env
-            x = inner_env.x
-            y = inner_env.y
-            xt = inner_env.xt
-            yt = inner_env.yt
-            dist = sqrt((x - xt) ** 2 + (y - yt) ** 2)
-
-            # se l'episodio finisce e la distanza è > 1000, consideriamo crash
-            if done and dist > 1000:
-                crashed = True
-
-        end_targets = inner_env.target_counter
-        collected = max(0, end_targets - start_targets)
-
-        episode_rewards.append(ep_reward)
-        balloons_per_ep.append(collected)
-        if crashed:
-            crashes += 1
-
-    episode_rewards = np.array(episode_rewards, dtype=np.float32)
-    balloons_per_ep = np.array(balloons_per_ep, dtype=np.float32)
-    crash_rate = crashes / N_EPISODES * 100.0
-
-    # --- 5. Risultati ---
-    print("\n" + "=" * 50)
-    print(f"RISULTATI TEST PPO ({N_EPISODES} EPISODI)")
-    print(f"Modello: {FILENAME}")
-    print(f"Environment: {env_name}")
-    print("=" * 50)
-    print(f"Reward Medio: {mean_reward:.2f}")
-    print(f"Reward Std: {std_reward:.2f}")
-    print(f"Palloncini medi/episodio: {balloons_per_ep.mean():.2f}")
-    print(f"% Crash {crash_rate:.1f}%")
-    print("=" * 50)
-
-    
+    # --- 3. Risultati ---
+    print_report(summarize(episodes), "PPO", FILENAME, env_name)
 
 
 if __name__ == "__main__":
-    test_stats()
+    parser = argparse.ArgumentParser(description="Test statistico PPO")
+    parser.add_argument(
+        "--shards", type=int, default=1, help="processi su cui dividere gli episodi"
+    )
+    args = parser.parse_args()
+    test_stats(shards=args.shards)
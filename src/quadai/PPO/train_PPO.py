@@ -1,17 +1,18 @@
 import sys
 import os
+import time
+import argparse
 # Setup path per importare moduli quadai
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
 
 from stable_baselines3 import PPO
-from stable_baselines3.common.monitor import Monitor
 from stable_baselines3.common.callbacks import CheckpointCallback
 
 # Importiamo le funzioni di percorso corrette
 from quadai.utils.paths import get_raw_logs_dir, get_models_dir, get_checkpoints_dir
-from env_PPO import droneEnv 
+from quadai.utils.training import add_vec_env_args, make_vec_env, report_throughput
 
-def train():
+def train(n_envs=1, vec_backend="dummy", seed=None):
     # --- IMPOSTAZIONI ---
     ALGO = "PPO"
     VERSION = "v1" 
@@ -30,15 +31,20 @@ def train():
     print(f"Checkpoints:     {checkpoint_dir}")
 
     # --- AMBIENTE ---
-    env = droneEnv(render_every_frame=False, mouse_target=False)
-    # Monitor salva monitor.csv dentro logs_ppo
-    env = Monitor(env, os.path.join(log_dir, "monitor.csv"))
+    env = make_vec_env(
+        "quadai.PPO.env_PPO",
+        n_envs,
+        vec_backend,
+        monitor_path=os.path.join(log_dir, "monitor.csv"),
+        seed=seed,
+    )
 
     # --- MODELLO (Default Architecture) ---
     model = PPO(
         "MlpPolicy", 
         env, 
         verbose=1, 
+        seed=seed,
         tensorboard_log=log_dir, 
         learning_rate=0.0007,
         clip_range=0.2, 
@@ -47,13 +53,16 @@ def train():
 
     # --- CALLBACK ---
     checkpoint_callback = CheckpointCallback(
-        save_freq=100000, 
+        # save_freq conta le chiamate al VecEnv (n_envs step ciascuna)
+        save_freq=max(100000 // env.num_envs, 1),
         save_path=checkpoint_dir,
         name_prefix=f"{ALGO.lower()}_checkpoint_{VERSION}"
     )
 
     # --- ESECUZIONE ---
+    start_time = time.perf_counter()
     model.learn(total_timesteps=TIMESTEPS, callback=checkpoint_callback)
+    report_throughput(model, start_time, env.num_envs, vec_backend)
     
     # --- SALVATAGGIO FINALE ---
     filename = f"{ALGO.lower()}_model_{VERSION}_{TIMESTEPS}_steps"
@@ -63,4 +72,6 @@ def train():
     print(f"Finito! Modello salvato in: {final_path}")
 
 if __name__ == "__main__":
-    train()
\ No newline at end of file
+    parser = add_vec_env_args(argparse.ArgumentParser(description="Training PPO"))
+    args = parser.parse_args()
+    train(n_envs=args.n_envs, vec_backend=args.vec_backend, seed=args.seed)
@@ -11,12 +11,12 @@ su env via via più difficili.
 
 import sys
 import os
+import time
+import argparse
 
 sys.path.append(os.path.join(os.path.dirname(__file__), "..", ".."))
 
 from stable_baselines3 import PPO
-from stable_baselines3.common.monitor import Monitor
-from stable_baselines3.common.vec_env import DummyVecEnv
 from stable_baselines3.common.callbacks import CheckpointCallback
 
 from quadai.utils.paths import (
@@ -24,19 +24,22 @@ from quadai.utils.paths import (
     get_models_dir,
     get_checkpoints_dir,
 )
-from env_noisy_PPO import droneEnv
+from quadai.utils.training import add_vec_env_args, make_vec_env, report_throughput
 
 
 ALGO = "PPO"
+ENV_MODULE = "quadai.PPO.env_noisy_PPO"
 VERSION = "v1_curriculum"  # nuova etichetta per distinguerlo da v2_noise
 TOTAL_TIMESTEPS = 4_000_000  # totale complessivo
 # esempio: 3 fasi da ~1.33M ciascuna
 PHASE_TIMESTEPS = TOTAL_TIMESTEPS // 3
+# Frame per azione in ogni fase: es. (10, 5, 5) per una fase 0 più economica
+PHASE_FRAME_SKIP = (5, 5, 5)
 
 
-def make_env(level: int):
+def make_env_kwargs(level: int) -> dict:
     """
-    Crea un environment con una certa difficoltà (curriculum level).
+    Parametri dell'environment per una certa difficoltà (curriculum level).
 
     level 0: vento leggero, niente rumore sensori
     level 1: vento medio, rumore moderato
@@ -44,9 +47,7 @@ def make_env(level: int):
     """
     if level == 0:
         # Fase facile: quasi nominale
-        env = droneEnv(
-            render_every_frame=False,
-            mouse_target=False,
+        kwargs = dict(
             wind_enabled=True,
             wind_dir_min_deg=0.0,
             wind_dir_max_deg=360.0,
@@ -59,9 +60,7 @@ def make_env(level: int):
         )
     elif level == 1:
         # Fase intermedia
-        env = droneEnv(
-            render_every_frame=False,
-            mouse_target=False,
+        kwargs = dict(
             wind_enabled=True,
             wind_dir_min_deg=0.0,
             wind_dir_max_deg=360.0,
@@ -83,9 +82,7 @@ def make_env(level: int):
         )
     else:
         # Fase difficile: il tuo noisy “full”
-        env = droneEnv(
-            render_every_frame=False,
-            mouse_target=False,
+        kwargs = dict(
             wind_enabled=True,
             wind_dir_min_deg=0.0,
             wind_dir_max_deg=360.0,
@@ -98,13 +95,11 @@ def make_env(level: int):
             # se non passi sensor_noise_std usa quelli definiti nell'env
         )
 
-    # Monitor per loggare reward per episodio
-    # (nota: DummyVecEnv richiede env costruttore senza argomenti, quindi
-    # usiamo lambda)
-    return env
+    kwargs["frame_skip"] = PHASE_FRAME_SKIP[level]
+    return kwargs
 
 
-def train_curriculum():
+def train_curriculum(n_envs=1, vec_backend="dummy", seed=None):
     # --- setup path/logs ---
     log_dir = get_raw_logs_dir(ALGO)
     checkpoint_dir = get_checkpoints_dir(ALGO)
@@ -114,13 +109,20 @@ def train_curriculum():
 
     # ---------------- FASE 0: facile ----------------
     print("\n[FASE 0] Env facile (vento leggero, senza rumore)...")
-    env0 = DummyVecEnv([lambda: Monitor(make_env(level=0),
-                                        os.path.join(log_dir, "monitor_curr_phase0.csv"))])
+    env0 = make_vec_env(
+        ENV_MODULE,
+        n_envs,
+        vec_backend,
+        env_kwargs=make_env_kwargs(level=0),
+        monitor_path=os.path.join(log_dir, "monitor_curr_phase0.csv"),
+        seed=seed,
+    )
 
     model = PPO(
         "MlpPolicy",
         env0,
         verbose=1,
+        seed=seed,
         tensorboard_log=log_dir,
         learning_rate=0.0007,
         clip_range=0.2,
@@ -128,54 +130,72 @@ def train_curriculum():
     )
 
     checkpoint_callback0 = CheckpointCallback(
-        save_freq=100_000,
+        save_freq=max(100_000 // env0.num_envs, 1),
         save_path=checkpoint_dir,
         name_prefix=f"{ALGO.lower()}_curriculum_phase0",
     )
 
+    start_time = time.perf_counter()
     model.learn(
         total_timesteps=PHASE_TIMESTEPS,
         callback=checkpoint_callback0,
         tb_log_name="PPO_CURR_PHASE0",
     )
+    report_throughput(model, start_time, env0.num_envs, vec_backend)
 
     # ---------------- FASE 1: media ----------------
     print("\n[FASE 1] Env medio (vento medio, rumore moderato)...")
-    env1 = DummyVecEnv([lambda: Monitor(make_env(level=1),
-                                        os.path.join(log_dir, "monitor_curr_phase1.csv"))])
+    env1 = make_vec_env(
+        ENV_MODULE,
+        n_envs,
+        vec_backend,
+        env_kwargs=make_env_kwargs(level=1),
+        monitor_path=os.path.join(log_dir, "monitor_curr_phase1.csv"),
+        seed=None if seed is None else seed + 1,
+    )
 
     model.set_env(env1)
 
     checkpoint_callback1 = CheckpointCallback(
-        save_freq=100_000,
+        save_freq=max(100_000 // env0.num_envs, 1),
         save_path=checkpoint_dir,
         name_prefix=f"{ALGO.lower()}_curriculum_phase1",
     )
 
+    start_time = time.perf_counter()
     model.learn(
         total_timesteps=PHASE_TIMESTEPS,
         callback=checkpoint_callback1,
         tb_log_name="PPO_CURR_PHASE1",
     )
+    report_throughput(model, start_time, env0.num_envs, vec_backend)
 
     # ---------------- FASE 2: difficile ----------------
     print("\n[FASE 2] Env difficile (vento forte, rumore pieno)...")
-    env2 = DummyVecEnv([lambda: Monitor(make_env(level=2),
-                                        os.path.join(log_dir, "monitor_curr_phase2.csv"))])
+    env2 = make_vec_env(
+        ENV_MODULE,
+        n_envs,
+        vec_backend,
+        env_kwargs=make_env_kwargs(level=2),
+        monitor_path=os.path.join(log_dir, "monitor_curr_phase2.csv"),
+        seed=None if seed is None else seed + 2,
+    )
 
     model.set_env(env2)
 
     checkpoint_callback2 = CheckpointCallback(
-        save_freq=100_000,
+        save_freq=max(100_000 // env0.num_envs, 1),
         save_path=checkpoint_dir,
         name_prefix=f"{ALGO.lower()}_curriculum_phase2",
     )
 
+    start_time = time.perf_counter()
     model.learn(
         total_timesteps=TOTAL_TIMESTEPS - 2 * PHASE_TIMESTEPS,
         callback=checkpoint_callback2,
         tb_log_name="PPO_CURR_PHASE2",
     )
+    report_throughput(model, start_time, env0.num_envs, vec_backend)
 
     # --- Salvataggio modello finale ---
     filename = f"{ALGO.lower()}_model_{VERSION}_{TOTAL_TIMESTEPS}_steps"
@@ -185,4 +205,8 @@ def train_curriculum():
 
 
 if __name__ == "__main__":
-    train_curriculum()
+    parser = add_vec_env_args(
+        argparse.ArgumentParser(description="Training PPO con curriculum")
+    )
+    args = parser.parse_args()
+    train_curriculum(n_envs=args.n_envs, vec_backend=args.vec_backend, seed=args.seed)
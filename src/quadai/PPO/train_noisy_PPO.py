@@ -1,15 +1,16 @@
 import sys
 import os
+import time
+import argparse
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
 
 from stable_baselines3 import PPO
-from stable_baselines3.common.monitor import Monitor
 from stable_baselines3.common.callbacks import CheckpointCallback
 
 from quadai.utils.paths import get_raw_logs_dir, get_models_dir, get_checkpoints_dir
-from env_noisy_PPO import droneEnv
+from quadai.utils.training import add_vec_env_args, make_vec_env, report_throughput
 
-def train():
+def train(n_envs=1, vec_backend="dummy", seed=None):
     ALGO = "PPO"
     VERSION = "v2_noise"
     TIMESTEPS = 4000000
@@ -20,20 +21,26 @@ def train():
 
     print(f"--- TRAINING PPO {VERSION} (NOISY) ---")
 
-    env = droneEnv(
-        render_every_frame=False,
-        mouse_target=False,
+    env_kwargs = dict(
         wind_enabled=True,
         wind_speed_max=0.04,
-        sensor_noise_enabled=True
+        sensor_noise_enabled=True,
+    )
+    env = make_vec_env(
+        "quadai.PPO.env_noisy_PPO",
+        n_envs,
+        vec_backend,
+        env_kwargs=env_kwargs,
+        monitor_path=os.path.join(log_dir, "monitor_noisy.csv"),
+        seed=seed,
     )
-    env = Monitor(env, os.path.join(log_dir, "monitor_noisy.csv"))
 
     # CORREZIONE: Rimosso tb_log_name da __init__
     model = PPO(
         "MlpPolicy", 
         env, 
         verbose=1, 
+        seed=seed,
         tensorboard_log=log_dir,   
         learning_rate=0.0007,
         clip_range=0.2, 
@@ -41,17 +48,20 @@ def train():
     )
 
     checkpoint_callback = CheckpointCallback(
-        save_freq=100000, 
+        # save_freq conta le chiamate al VecEnv (n_envs step ciascuna)
+        save_freq=max(100000 // env.num_envs, 1),
         save_path=checkpoint_dir,
         name_prefix=f"{ALGO.lower()}_checkpoint_{VERSION}"
     )
 
     # CORREZIONE: Aggiunto tb_log_name qui
+    start_time = time.perf_counter()
     model.learn(
         total_timesteps=TIMESTEPS, 
         callback=checkpoint_callback,
         tb_log_name="PPO_NOISY"
     )
+    report_throughput(model, start_time, env.num_envs, vec_backend)
     
     filename = f"{ALGO.lower()}_model_{VERSION}_{TIMESTEPS}_steps"
     final_path = os.path.join(models_dir, filename)
@@ -59,4 +69,6 @@ def train():
     print(f"Modello Noisy salvato in: {final_path}")
 
 if __name__ == "__main__":
-    train()
\ No newline at end of file
+    parser = add_vec_env_args(argparse.ArgumentParser(description="Training PPO"))
+    args = parser.parse_args()
+    train(n_envs=args.n_envs, vec_backend=args.vec_backend, seed=args.seed)
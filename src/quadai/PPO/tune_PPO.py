@@ -1,93 +1,48 @@
 import sys
 import os
-import pandas as pd
+import argparse
 
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
 
-from stable_baselines3 import PPO
-from stable_baselines3.common.monitor import Monitor
-from env_PPO import droneEnv 
-from quadai.utils.paths import get_tune_dir 
+from quadai.utils.paths import get_raw_tune_dir
+from quadai.utils.tuning import add_grid_args, grid_options, run_grid, print_best
 
-def run_tuning():
+def run_tuning(**options):
     ALGO = "PPO"
-    TEST_TIMESTEPS = 500000 
+    TEST_TIMESTEPS = 500000
 
-    # Grid Search Parametri
-    learning_rates = [0.0007, 0.001, 0.0015] 
-    clip_ranges = [0.2, 0.3]         
-    n_epochs_list = [10, 15]
+    # Grid Search Parametri: (colonna del file risultati, parametro SB3, valori)
+    param_grid = [
+        ("LR", "learning_rate", [0.0007, 0.001, 0.0015]),
+        ("CLIP_RANGE", "clip_range", [0.2, 0.3]),
+        ("N_EPOCHS", "n_epochs", [10, 15]),
+    ]
 
     # --- PERCORSI ---
-    # Main folder: src/quadai/PPO/tune_result
-    results_dir = get_tune_dir(ALGO)
-    
-    # File report
+    results_dir = get_raw_tune_dir(ALGO)
     results_file = os.path.join(results_dir, f"tuning_results_{ALGO}_FULL.txt")
-    
     # Cartella temporanea: src/quadai/PPO/tune_result/tmp_tuning
     tmp_log_base = os.path.join(results_dir, "tmp_tuning")
     os.makedirs(tmp_log_base, exist_ok=True)
-    
-    # Intestazione
-    with open(results_file, "w") as f:
-        f.write("LR, CLIP_RANGE, N_EPOCHS, MEAN_REWARD, MAX_REWARD\n")
-    
-    print(f"Inizio Tuning PPO.")
-    print(f"Risultati in: {results_file}")
-    print(f"Log temporanei in: {tmp_log_base}")
 
-    best_reward = -float('inf')
-    best_config = None
-    counter = 0
+    print("Inizio Tuning PPO.")
+    print(f"Risultati in: {results_file}")
+    print(f"Worker paralleli: {options.get('workers', 1)}")
 
-    for lr in learning_rates:
-        for clip in clip_ranges:
-            for epochs in n_epochs_list:
-                counter += 1
-                config_name = f"lr{lr}_clip{clip}_ep{epochs}"
-                
-                # Sottocartella log specifica
-                current_log_dir = os.path.join(tmp_log_base, config_name)
-                os.makedirs(current_log_dir, exist_ok=True)
-                
-                print(f"\n[{counter}/12] Test: {config_name}")
-                
-                env = droneEnv(render_every_frame=False, mouse_target=False)
-                env = Monitor(env, current_log_dir)
-                
-                model = PPO(
-                    "MlpPolicy", 
-                    env, 
-                    verbose=0, 
-                    learning_rate=lr, 
-                    clip_range=clip,
-                    n_epochs=epochs
-                )
-                
-                model.learn(total_timesteps=TEST_TIMESTEPS)
-                
-                # Lettura risultati
-                try:
-                    df = pd.read_csv(os.path.join(current_log_dir, "monitor.csv"), skiprows=1)
-                    mean_r = df['r'].tail(100).mean()
-                    max_r = df['r'].max()
-                except:
-                    mean_r, max_r = -1000, -1000
-                
-                print(f"--> Media: {mean_r:.2f}")
-                
-                with open(results_file, "a") as f:
-                    f.write(f"{lr}, {clip}, {epochs}, {mean_r}, {max_r}\n")
-                
-                if mean_r > best_reward:
-                    best_reward = mean_r
-                    best_config = (lr, clip, epochs)
+    run_grid(
+        ALGO,
+        "quadai.PPO.env_PPO",
+        param_grid,
+        results_file,
+        tmp_log_base,
+        TEST_TIMESTEPS,
+        tail=100,
+        **options,
+    )
 
-    print("\n" + "="*50)
-    print("TUNING COMPLETATO")
-    print(f"Miglior Config: LR={best_config[0]}, Clip={best_config[1]}, Epochs={best_config[2]}")
-    print(f"Reward: {best_reward:.2f}")
+    print_best(results_file)
 
 if __name__ == "__main__":
-    run_tuning()
\ No newline at end of file
+    parser = add_grid_args(argparse.ArgumentParser(description="Tuning PPO"))
+    args = parser.parse_args()
+    run_tuning(**grid_options(args))
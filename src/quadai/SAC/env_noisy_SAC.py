@@ -11,16 +11,17 @@ Environment esteso con:
 """
 
 import os
-from math import sin, cos, pi, sqrt
-from random import randrange, uniform
+from math import cos, pi, radians, sin
 from typing import Optional
 
 import numpy as np
 import gym
 from gym import spaces
 
-import pygame
-from pygame.locals import *
+from quadai.kernels import EnvKernel
+from quadai.obs import OBS_SIZE, build_obs
+from quadai.physics import FRAMES_PER_ACTION, step_frame, mix_thrusters, target_distance
+from quadai.random_streams import NormalStream
 
 # path della cartella dove si trova questo file (SAC/)
 BASE_PATH = os.path.dirname(__file__)
@@ -43,31 +44,27 @@ class droneEnv(gym.Env):
         # --- rumore sensori ---
         sensor_noise_enabled: bool = True,
         sensor_noise_std: Optional[np.ndarray] = None,
+        # --- frequenza di controllo ---
+        frame_skip: int = FRAMES_PER_ACTION,
+        physics_substeps: int = 1,
+        # --- osservazioni in buffer riutilizzati (step senza allocazioni) ---
+        preallocated_obs: bool = False,
+        # --- kernel dei frame di step (vedi quadai/kernels.py) ---
+        kernel: Optional[str] = None,
     ):
         super(droneEnv, self).__init__()
 
         self.render_every_frame = render_every_frame
         # Makes the target follow the mouse
         self.mouse_target = mouse_target
+        # Called after every frame with (env, thruster_left, thruster_right),
+        # e.g. by quadai.trajectory.EnvRecorder
+        self.on_frame = None
 
-        # Initialize Pygame, load sprites
-        pygame.init()
-        self.screen = pygame.display.set_mode((800, 800))
-        self.FramePerSec = pygame.time.Clock()
-
-        # load sprite drone e target usando path relativo a src/quadai/
-        self.player = pygame.image.load(
-            os.path.join(BASE_PATH, "..", "assets", "sprites", "drone_old.png")
-        )
-        self.player.convert()
-
-        self.target = pygame.image.load(
-            os.path.join(BASE_PATH, "..", "assets", "sprites", "target_old.png")
-        )
-        self.target.convert()
-
-        pygame.font.init()
-        self.myfont = pygame.font.SysFont("Comic Sans MS", 20)
+        # Pygame viene inizializzato solo al primo render (modalità headless)
+        self.screen = None
+        if self.render_every_frame is True or self.mouse_target is True:
+            self._init_render()
 
         # Physics constants
         self.FPS = 60
@@ -77,13 +74,21 @@ class droneEnv(gym.Env):
         self.thruster_mean = 0.04
         self.mass = 1
         self.arm = 25
+        # Frame simulati per azione (ognuno di 1/60 s) e passi di integrazione
+        # per frame: reward e tempo sono contati per frame, quindi il ritorno
+        # di un episodio non dipende dal frame_skip
+        self.frame_skip = frame_skip
+        self.physics_substeps = physics_substeps
+
+        # Generator dell'env (target, vento, rumore dei sensori): vedi seed()
+        self.rng = np.random.default_rng()
 
         # Initialize variables (stato fisico drone)
         (self.a, self.ad, self.add) = (0.0, 0.0, 0.0)
         (self.x, self.xd, self.xdd) = (400.0, 0.0, 0.0)
         (self.y, self.yd, self.ydd) = (400.0, 0.0, 0.0)
-        self.xt = randrange(200, 600)
-        self.yt = randrange(200, 600)
+        self.xt = int(self.rng.integers(200, 600))
+        self.yt = int(self.rng.integers(200, 600))
 
         # Initialize game variables
         self.target_counter = 0
@@ -128,6 +133,36 @@ class droneEnv(gym.Env):
         else:
             self.sensor_noise_std = np.array(sensor_noise_std, dtype=np.float32)
 
+        # --- BUFFER OSSERVAZIONI ---
+        # Con preallocated_obs step e reset scrivono sempre negli stessi array
+        # (due buffer distinti, così la terminal_observation salvata dal VecEnv
+        # non viene sovrascritta dal reset) e il rumore è applicato sul posto
+        self.preallocated_obs = preallocated_obs
+        self._step_obs = np.empty(OBS_SIZE, dtype=np.float32) if preallocated_obs else None
+        self._reset_obs = np.empty(OBS_SIZE, dtype=np.float32) if preallocated_obs else None
+
+        # Con kernel ("auto", "numba", "numpy" o "python") i frame di step
+        # girano in un kernel compilato invece che nel ciclo Python; None
+        # per il ciclo Python, usato comunque con render, mouse_target e
+        # on_frame
+        self.kernel = kernel
+        self._env_kernel = None if kernel is None else EnvKernel(kernel)
+
+        # --- FLUSSI CASUALI ---
+        # Rumore dei sensori e incrementi del vento pre-generati a blocchi dal
+        # Generator, già scalati per le deviazioni standard, e consumati una
+        # riga alla volta (una chiamata al Generator ogni 4096 righe)
+        self._make_streams()
+
+    def _make_streams(self):
+        """Crea i flussi di rumore dei sensori e del vento sul Generator corrente."""
+        self._sensor_stream = NormalStream(
+            self.rng, OBS_SIZE, scale=self.sensor_noise_std, dtype=np.float32
+        )
+        self._wind_stream = NormalStream(
+            self.rng, 2, scale=[self.wind_dir_rw_std_deg, self.wind_speed_rw_std]
+        )
+
     # ------------------------------------------------------------------
     # METEO / VENTO
     # ------------------------------------------------------------------
@@ -144,15 +179,15 @@ class droneEnv(gym.Env):
             return
 
         # direzione iniziale del vento, uniforme tra min e max (gradi)
-        dir_deg = uniform(self.wind_dir_min_deg, self.wind_dir_max_deg)
-        self.wind_dir = np.deg2rad(dir_deg)
+        dir_deg = float(self.rng.uniform(self.wind_dir_min_deg, self.wind_dir_max_deg))
+        self.wind_dir = radians(dir_deg)
 
         # intensità iniziale del vento tra min e max
-        self.wind_speed = uniform(self.wind_speed_min, self.wind_speed_max)
+        self.wind_speed = float(self.rng.uniform(self.wind_speed_min, self.wind_speed_max))
 
-        # calcolo componenti iniziali
-        self.wind_ax = self.wind_speed * np.cos(self.wind_dir)
-        self.wind_ay = self.wind_speed * np.sin(self.wind_dir)
+        # calcolo componenti iniziali (float Python: la fisica resta scalare)
+        self.wind_ax = self.wind_speed * cos(self.wind_dir)
+        self.wind_ay = self.wind_speed * sin(self.wind_dir)
 
         # reset contatore interno
         self.wind_step_counter = 0
@@ -171,32 +206,54 @@ class droneEnv(gym.Env):
         if self.wind_step_counter % self.wind_update_every != 0:
             return
 
+        # incrementi pre-generati a blocchi: (direzione in gradi, velocità)
+        (dir_delta_deg, speed_delta) = self._wind_stream.next().tolist()
+
         # random walk sulla direzione (in radianti)
-        dir_delta = np.deg2rad(np.random.normal(0.0, self.wind_dir_rw_std_deg))
+        dir_delta = radians(dir_delta_deg)
         self.wind_dir += dir_delta
 
         # normalizza la direzione tra 0 e 2*pi per evitare overflow
         self.wind_dir = (self.wind_dir + 2 * pi) % (2 * pi)
 
         # random walk sulla velocità, tenendola nel range desiderato
-        self.wind_speed += np.random.normal(0.0, self.wind_speed_rw_std)
+        self.wind_speed += speed_delta
         self.wind_speed = max(self.wind_speed_min, self.wind_speed)
         self.wind_speed = min(self.wind_speed_max, self.wind_speed)
 
         # aggiorna componenti x,y
-        self.wind_ax = self.wind_speed * np.cos(self.wind_dir)
-        self.wind_ay = self.wind_speed * np.sin(self.wind_dir)
+        self.wind_ax = self.wind_speed * cos(self.wind_dir)
+        self.wind_ay = self.wind_speed * sin(self.wind_dir)
 
     # ------------------------------------------------------------------
     # GYM API
     # ------------------------------------------------------------------
-    def reset(self):
+    def seed(self, seed=None):
+        """
+        Inizializza il Generator dell'env: target, vento e rumore dei sensori
+        diventano riproducibili.
+
+        Args:
+            seed: int, np.random.SeedSequence (es. figli di spawn() per env
+                paralleli) o None per entropia nuova
+
+        Returns:
+            list: [seed], come seed() di gym
+        """
+        self.rng = np.random.default_rng(seed)
+        self._make_streams()
+        return [seed]
+
+    def reset(self, seed=None):
+        if seed is not None:
+            self.seed(seed)
+
         # Reset stato fisico
         (self.a, self.ad, self.add) = (0.0, 0.0, 0.0)
         (self.x, self.xd, self.xdd) = (400.0, 0.0, 0.0)
         (self.y, self.yd, self.ydd) = (400.0, 0.0, 0.0)
-        self.xt = randrange(200, 600)
-        self.yt = randrange(200, 600)
+        self.xt = int(self.rng.integers(200, 600))
+        self.yt = int(self.rng.integers(200, 600))
 
         self.target_counter = 0
         self.reward = 0.0
@@ -205,43 +262,23 @@ class droneEnv(gym.Env):
         # Domain randomization del vento: nuovo "meteo" per episodio
         self._sample_episode_wind()
 
-        return self.get_obs()
+        return self.get_obs(self._reset_obs)
 
-    def get_obs(self) -> np.ndarray:
+    def get_obs(self, out: Optional[np.ndarray] = None) -> np.ndarray:
         """
         Calcola le osservazioni del drone (con rumore opzionale).
         """
-        angle_to_up = self.a / 180 * pi
-        velocity = sqrt(self.xd**2 + self.yd**2)
-        angle_velocity = self.ad
-        distance_to_target = (
-            sqrt((self.xt - self.x) ** 2 + (self.yt - self.y) ** 2) / 500
-        )
-        angle_to_target = np.arctan2(self.yt - self.y, self.xt - self.x)
-        # Angle between the to_target vector and the velocity vector
-        angle_target_and_velocity = np.arctan2(
-            self.yt - self.y, self.xt - self.x
-        ) - np.arctan2(self.yd, self.xd)
-        distance_to_target = (
-            sqrt((self.xt - self.x) ** 2 + (self.yt - self.y) ** 2) / 500
-        )
-
-        obs = np.array(
-            [
-                angle_to_up,
-                velocity,
-                angle_velocity,
-                distance_to_target,
-                angle_to_target,
-                angle_target_and_velocity,
-                distance_to_target,
-            ],
-            dtype=np.float32,
+        obs = build_obs(
+            self.x, self.y, self.xd, self.yd, self.a, self.ad, self.xt, self.yt, out=out
         )
 
         if self.sensor_noise_enabled:
-            noise = np.random.normal(0.0, self.sensor_noise_std).astype(np.float32)
-            obs = obs + noise
+            noise = self._sensor_stream.next()
+            if out is None:
+                obs = obs + noise
+            else:
+                # rumore applicato sul posto, senza array temporanei
+                obs += noise
 
         return obs
 
@@ -249,54 +286,52 @@ class droneEnv(gym.Env):
         # Game loop
         self.reward = 0.0
         (action0, action1) = (float(action[0]), float(action[1]))
+        thruster_left, thruster_right = mix_thrusters(
+            action0,
+            action1,
+            self.thruster_mean,
+            self.thruster_amplitude,
+            self.diff_amplitude,
+        )
 
-        # Act every 5 frames (come nel codice originale)
-        for _ in range(5):
+        # Tutti i frame dell'azione in una chiamata al kernel, se nessuno
+        # deve intervenire tra un frame e l'altro
+        if (
+            self._env_kernel is not None
+            and self.on_frame is None
+            and self.render_every_frame is not True
+            and self.mouse_target is not True
+        ):
+            (self.reward, done) = self._env_kernel.step(self, thruster_left, thruster_right)
+            return (self.get_obs(self._step_obs), self.reward, done, {})
+
+        # Act every frame_skip frames (5 di default, come nel codice originale)
+        for _ in range(self.frame_skip):
             self.time += 1 / 60
 
             if self.mouse_target is True:
+                import pygame
+
                 self.xt, self.yt = pygame.mouse.get_pos()
 
             # Aggiorna vento (random walk lento)
             self._update_wind()
 
-            # Initialize accelerations
-            self.xdd = 0.0
-            self.ydd = self.gravity
-            self.add = 0.0
-            thruster_left = self.thruster_mean
-            thruster_right = self.thruster_mean
-
-            thruster_left += action0 * self.thruster_amplitude
-            thruster_right += action0 * self.thruster_amplitude
-            thruster_left += action1 * self.diff_amplitude
-            thruster_right -= action1 * self.diff_amplitude
-
-            # Calculating accelerations with Newton's laws of motions
-            self.xdd += (
-                -(thruster_left + thruster_right) * sin(self.a * pi / 180) / self.mass
-            )
-            self.ydd += (
-                -(thruster_left + thruster_right) * cos(self.a * pi / 180) / self.mass
+            # Calculating accelerations with Newton's laws of motions,
+            # il vento entra come accelerazione extra
+            step_frame(
+                self,
+                thruster_left,
+                thruster_right,
+                self.wind_ax,
+                self.wind_ay,
+                gravity=self.gravity,
+                mass=self.mass,
+                arm=self.arm,
+                substeps=self.physics_substeps,
             )
-            self.add += self.arm * (thruster_right - thruster_left) / self.mass
 
-            # aggiungi contributo del vento come accelerazione extra
-            if self.wind_enabled:
-                self.xdd += self.wind_ax
-                self.ydd += self.wind_ay
-
-            # integrazione (velocità)
-            self.xd += self.xdd
-            self.yd += self.ydd
-            self.ad += self.add
-
-            # integrazione (posizione)
-            self.x += self.xd
-            self.y += self.yd
-            self.a += self.ad
-
-            dist = sqrt((self.x - self.xt) ** 2 + (self.y - self.yt) ** 2)
+            dist = target_distance(self, self.xt, self.yt)
 
             # Reward per step sopravvissuto
             self.reward += 1 / 60
@@ -305,11 +340,14 @@ class droneEnv(gym.Env):
 
             if dist < 50:
                 # Reward se vicino al target
-                self.xt = randrange(200, 600)
-                self.yt = randrange(200, 600)
+                self.xt = int(self.rng.integers(200, 600))
+                self.yt = int(self.rng.integers(200, 600))
                 self.reward += 100
                 self.target_counter += 1
 
+            if self.on_frame is not None:
+                self.on_frame(self, thruster_left, thruster_right)
+
             # If out of time
             if self.time > self.time_limit:
                 done = True
@@ -330,13 +368,44 @@ class droneEnv(gym.Env):
         info = {}
 
         return (
-            self.get_obs(),
+            self.get_obs(self._step_obs),
             self.reward,
             done,
             info,
         )
 
+    def _init_render(self):
+        """
+        Inizializza Pygame e carica gli sprite.
+        Chiamato solo quando serve davvero (render o mouse_target), così
+        gli env di training non aprono finestre e non richiedono un display.
+        """
+        import pygame
+
+        pygame.init()
+        self.screen = pygame.display.set_mode((800, 800))
+        self.FramePerSec = pygame.time.Clock()
+
+        # load sprite drone e target usando path relativo a src/quadai/
+        self.player = pygame.image.load(
+            os.path.join(BASE_PATH, "..", "assets", "sprites", "drone_old.png")
+        )
+        self.player.convert()
+
+        self.target = pygame.image.load(
+            os.path.join(BASE_PATH, "..", "assets", "sprites", "target_old.png")
+        )
+        self.target.convert()
+
+        pygame.font.init()
+        self.myfont = pygame.font.SysFont("Comic Sans MS", 20)
+
     def render(self, mode):
+        import pygame
+
+        if self.screen is None:
+            self._init_render()
+
         # Pygame rendering
         pygame.event.get()
         self.screen.fill(0)
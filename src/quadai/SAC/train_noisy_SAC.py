@@ -1,15 +1,16 @@
 import sys
 import os
+import time
+import argparse
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
 
 from stable_baselines3 import SAC
-from stable_baselines3.common.monitor import Monitor
 from stable_baselines3.common.callbacks import CheckpointCallback
 
 from quadai.utils.paths import get_raw_logs_dir, get_models_dir, get_checkpoints_dir
-from env_noisy_SAC import droneEnv
+from quadai.utils.training import add_vec_env_args, make_vec_env, report_throughput
 
-def train():
+def train(n_envs=1, vec_backend="dummy", seed=None):
     # --- IMPOSTAZIONI ---
     ALGO = "SAC"
     VERSION = "v1_noise"
@@ -23,21 +24,26 @@ def train():
     print(f"--- TRAINING SAC {VERSION} (NOISY) ---")
 
     # --- AMBIENTE (NOISY) ---
-    env = droneEnv(
-        render_every_frame=False,
-        mouse_target=False,
+    env_kwargs = dict(
         wind_enabled=True,
         wind_speed_max=0.04,
-        sensor_noise_enabled=True
+        sensor_noise_enabled=True,
+    )
+    env = make_vec_env(
+        "quadai.SAC.env_noisy_SAC",
+        n_envs,
+        vec_backend,
+        env_kwargs=env_kwargs,
+        monitor_path=log_dir,
+        seed=seed,
     )
-    # Monitor specifico
-    env = Monitor(env, log_dir)
 
     # --- MODELLO SAC ---
     model = SAC(
         "MlpPolicy", 
         env, 
         verbose=1, 
+        seed=seed,
         tensorboard_log=log_dir,
         learning_rate=0.0003,
         ent_coef='auto',
@@ -46,18 +52,21 @@ def train():
 
     # --- CALLBACK ---
     checkpoint_callback = CheckpointCallback(
-        save_freq=50000, 
+        # save_freq conta le chiamate al VecEnv (n_envs step ciascuna)
+        save_freq=max(50000 // env.num_envs, 1),
         save_path=checkpoint_dir,
         name_prefix=f"{ALGO.lower()}_checkpoint_{VERSION}"
     )
 
     # --- TRAINING ---
     # CORREZIONE: tb_log_name va messo QUI!
+    start_time = time.perf_counter()
     model.learn(
         total_timesteps=TIMESTEPS, 
         callback=checkpoint_callback,
         tb_log_name="SAC_NOISY" 
     )
+    report_throughput(model, start_time, env.num_envs, vec_backend)
     
     filename = f"{ALGO.lower()}_model_{VERSION}_{TIMESTEPS}_steps"
     final_path = os.path.join(models_dir, filename)
@@ -66,4 +75,6 @@ def train():
     print(f"Modello Noisy salvato in: {final_path}")
 
 if __name__ == "__main__":
-    train()
\ No newline at end of file
+    parser = add_vec_env_args(argparse.ArgumentParser(description="Training SAC"))
+    args = parser.parse_args()
+    train(n_envs=args.n_envs, vec_backend=args.vec_backend, seed=args.seed)
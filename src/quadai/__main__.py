@@ -8,33 +8,81 @@ This is the main game where you can compete with AI agents
 Collect as many balloons within the time limit
 """
 
-import sys
+import argparse
+
 import quadai
 from quadai.balloon import balloon
 from quadai.snowglobe import snowglobe
 from quadai.balloon_noisy import balloon_noisy
+from quadai.player import PLAYER_REGISTRY
 
 
-def main(game: str = "balloon") -> None:
+def main(
+    game: str = "balloon",
+    players: list = None,
+    headless: bool = False,
+    record: str = None,
+    collisions: bool = False,
+    render_scale: int = 1,
+) -> None:
     """
     Runs the selected game.
 
     Args:
         game (str): The game to run (balloon, snowglobe)
+        players (list): Players of the balloon games, the game's default if None
+        headless (bool): Plays a balloon game without window and prints the
+            results
+        record (str): Trajectory file where the balloon match is recorded
+        collisions (bool): Collisions between the snow particles of snowglobe
+        render_scale (int): Snowglobe draws the snow at 1 / render_scale
+            resolution
     """
-    if game == "balloon":
-        balloon()
+    if game in ("balloon", "balloon_noisy") and headless:
+        game_function = balloon if game == "balloon" else balloon_noisy
+        for result in game_function(players, headless=True, record=record):
+            print(f"{result['name']} collected : {result['balloons']} ({result['crashes']} crashes)")
+    elif game == "balloon":
+        balloon(players, record=record)
     elif game == "snowglobe":
-        snowglobe()
+        snowglobe(collisions=collisions, render_scale=render_scale)
     elif game == "balloon_noisy":
-        balloon_noisy()
+        balloon_noisy(players, record=record)
     else:
         print(f"Unknown tracking library: {game} (expected: balloon or snowglobe)")
 
 
 if __name__ == "__main__":
     print(f"Hello world from {quadai.__name__} ({quadai.__doc__})")
-    if len(sys.argv) > 1:
-        main(sys.argv[1])
-    else:
-        main() 
\ No newline at end of file
+    parser = argparse.ArgumentParser()
+    parser.add_argument("game", nargs="?", default="balloon")
+    parser.add_argument(
+        "--players",
+        nargs="+",
+        choices=list(PLAYER_REGISTRY),
+        help="players of the balloon games (only their models are loaded)",
+    )
+    parser.add_argument(
+        "--headless",
+        action="store_true",
+        help="plays the balloon game without window and frame cap (AI players only)",
+    )
+    parser.add_argument(
+        "--record",
+        metavar="PATH",
+        help="records the balloon match in a trajectory file (replay: python -m quadai.replay PATH)",
+    )
+    parser.add_argument(
+        "--collisions",
+        action="store_true",
+        help="snowglobe: the snow particles collide and pile up (C key in game)",
+    )
+    parser.add_argument(
+        "--render-scale",
+        type=int,
+        default=1,
+        help="snowglobe: draws the snow at 1/N resolution (faster with many particles)",
+    )
+    args = parser.parse_args()
+    main(args.game, args.players, args.headless, args.record, args.collisions, args.render_scale)
+ 
\ No newline at end of file
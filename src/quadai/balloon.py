@@ -8,13 +8,16 @@ This is the main game where you can compete with AI agents
 Collect as many balloons within the time limit
 """
 import os
-from random import randrange
-from math import sin, cos, pi, sqrt
 
 import numpy as np
 import pygame
 from pygame.locals import *
-from quadai.player import HumanPlayer, PIDPlayer, SACPlayer, A2CPlayer, PPOPlayer
+from quadai.match import BalloonMatch, check_headless_players
+from quadai.player import create_players, preload_players
+from quadai.timestep import FixedTimestep
+
+# Players of the game when none are selected from the command line
+DEFAULT_PLAYERS = ["Human", "PID", "SAC", "A2C", "PPO"]
 
 
 def correct_path(current_path):
@@ -24,27 +27,58 @@ def correct_path(current_path):
     return os.path.join(os.path.dirname(__file__), current_path)
 
 
-def balloon():
+def new_match(player_names):
+    """
+    Creates the players and a match of the balloon game (no wind, no
+    sensor noise).
+
+    Args:
+        player_names (list): Names of the players (see PLAYER_REGISTRY)
+
+    Returns:
+        BalloonMatch: The match, not started yet
+    """
+    return BalloonMatch(create_players(player_names))
+
+
+def balloon(player_names=None, fps=60, max_frames=None, headless=False, record=None):
     """
     Runs the balloon game.
+
+    Args:
+        player_names (list): Names of the players (see PLAYER_REGISTRY),
+            DEFAULT_PLAYERS if None (without Human when headless)
+        fps (int): Frame rate cap of the rendering, the game always runs at
+            60 steps per second of game time; 0 for no cap, with one step
+            per rendered frame (benchmarks)
+        max_frames (int): Stops the match after this many steps, None to
+            play the whole match
+        headless (bool): Runs the match without window, rendering and frame
+            cap (tournaments); AI players only
+        record (str): Trajectory file where the match is recorded (see
+            quadai.trajectory and quadai.replay), None to not record
+
+    Returns:
+        list: For every player, dict with name, balloons and crashes
     """
+    if headless:
+        player_names = player_names or [name for name in DEFAULT_PLAYERS if name != "Human"]
+        check_headless_players(player_names)
+        match = new_match(player_names)
+        if record is not None:
+            match.start_recording(record, "balloon")
+        match.run(max_frames)
+        match.close()
+        return match.results()
+
+    player_names = player_names or DEFAULT_PLAYERS
+    # The models load in background while the window and sprites come up
+    preload_players(player_names)
+
     # Game constants
-    FPS = 60
     WIDTH = 800
     HEIGHT = 800
 
-    # Physics constants
-    gravity = 0.08
-    # Propeller force for UP and DOWN
-    thruster_amplitude = 0.04
-    # Propeller force for LEFT and RIGHT rotations
-    diff_amplitude = 0.003
-    # By default, thruster will apply angle force of thruster_mean
-    thruster_mean = 0.04
-    mass = 1
-    # Length from center of mass to propeller
-    arm = 25
-
     # Initialize Pygame, load sprites
     FramePerSec = pygame.time.Clock()
 
@@ -144,276 +178,81 @@ def balloon():
             )
             screen.blit(respawning_text, (position, 70))
 
-    # Initialize game variables
-    time = 0
-    step = 0
-    time_limit = 100
-    respawn_timer_max = 3
+    # Qui puoi scegliere chi gioca: vedi DEFAULT_PLAYERS o l'opzione --players
+    match = new_match(player_names)
+    if record is not None:
+        match.start_recording(record, "balloon")
+    players = match.players
+    drones = match.drones
 
-    # Qui puoi scegliere chi gioca. Aggiungi o togli agenti dalla lista.
-    players = [HumanPlayer(), PIDPlayer(), SACPlayer(), A2CPlayer(), PPOPlayer()]
-
-    # Generate 100 targets
-    targets = []
-    for i in range(100):
-        targets.append((randrange(200, 600), randrange(200, 600)))
+    # Rendering runs at up to fps frames per second, fps=0 renders every step
+    timestep = FixedTimestep(lockstep=fps == 0)
 
     # Game loop
     while True:
         pygame.event.get()
 
+        # Players and physics advance by fixed steps of 1 / 60 s, as many as
+        # the time elapsed since the previous frame (see quadai.timestep)
+        for _ in range(timestep.steps()):
+            match.step()
+
+            x_cloud1 += speed_cloud1
+            if x_cloud1 > WIDTH:
+                x_cloud1 = -cloud1.get_width()
+            x_cloud2 += speed_cloud2
+            if x_cloud2 < -cloud2.get_width():
+                x_cloud2 = WIDTH
+
+            if match.done or match.step_count == max_frames:
+                break
+
         # Display background
         screen.fill((131, 176, 181))
-
-        x_cloud1 += speed_cloud1
-        if x_cloud1 > WIDTH:
-            x_cloud1 = -cloud1.get_width()
         screen.blit(cloud1, (x_cloud1, y_cloud1))
-
-        x_cloud2 += speed_cloud2
-        if x_cloud2 < -cloud2.get_width():
-            x_cloud2 = WIDTH
         screen.blit(cloud2, (x_cloud2, y_cloud2))
-
         screen.blit(sun, (630, -100))
 
-        time += 1 / 60
-        step += 1
-
         # For each player
         for player_index, player in enumerate(players):
-            if player.dead == False:
-                # Initialize accelerations
-                player.x_acceleration = 0
-                player.y_acceleration = gravity
-                player.angular_acceleration = 0
-
-                # Calculate propeller force in function of input
-                if player.name == "DQN" or player.name == "PID":
-                    thruster_left, thruster_right = player.act(
-                        [
-                            targets[player.target_counter][0] - player.x_position,
-                            player.x_speed,
-                            targets[player.target_counter][1] - player.y_position,
-                            player.y_speed,
-                            player.angle,
-                            player.angular_speed,
-                        ]
-                    )
-                    
-                elif player.name == "A2C":
-                    # Recuperiamo le coordinate del target corrente
-                    xt = targets[player.target_counter][0]
-                    yt = targets[player.target_counter][1]
-                    
-                    # Calcoli fisici per l'osservazione (copiati da env_A2C.py)
-                    angle_to_up = player.angle / 180 * pi
-                    velocity = sqrt(player.x_speed**2 + player.y_speed**2)
-                    angle_velocity = player.angular_speed
-                    
-                    dist_val = sqrt((xt - player.x_position) ** 2 + (yt - player.y_position) ** 2)
-                    distance_to_target = dist_val / 500
-                    
-                    angle_to_target = np.arctan2(yt - player.y_position, xt - player.x_position)
-                    
-                    angle_target_and_velocity = np.arctan2(
-                        yt - player.y_position, xt - player.x_position
-                    ) - np.arctan2(player.y_speed, player.x_speed)
-
-                    obs_array = np.array([
-                        angle_to_up,
-                        velocity,
-                        angle_velocity,
-                        distance_to_target,
-                        angle_to_target,
-                        angle_target_and_velocity,
-                        distance_to_target
-                    ]).astype(np.float32)
-
-                    # Passiamo l'array corretto alla funzione act
-                    thruster_left, thruster_right = player.act(obs_array)
-                    
-                elif player.name == "PPO":
-                    # Recuperiamo le coordinate del target corrente
-                    xt = targets[player.target_counter][0]
-                    yt = targets[player.target_counter][1]
-                    
-                    # Calcoli fisici per l'osservazione (copiati da env_A2C.py)
-                    angle_to_up = player.angle / 180 * pi
-                    velocity = sqrt(player.x_speed**2 + player.y_speed**2)
-                    angle_velocity = player.angular_speed
-                    
-                    dist_val = sqrt((xt - player.x_position) ** 2 + (yt - player.y_position) ** 2)
-                    distance_to_target = dist_val / 500
-                    
-                    angle_to_target = np.arctan2(yt - player.y_position, xt - player.x_position)
-                    
-                    angle_target_and_velocity = np.arctan2(
-                        yt - player.y_position, xt - player.x_position
-                    ) - np.arctan2(player.y_speed, player.x_speed)
-
-                    obs_array = np.array([
-                        angle_to_up,
-                        velocity,
-                        angle_velocity,
-                        distance_to_target,
-                        angle_to_target,
-                        angle_target_and_velocity,
-                        distance_to_target
-                    ]).astype(np.float32)
-
-                    # Passiamo l'array corretto alla funzione act
-                    thruster_left, thruster_right = player.act(obs_array)
-                    
-                elif player.name == "SAC":
-                    angle_to_up = player.angle / 180 * pi
-                    velocity = sqrt(player.x_speed**2 + player.y_speed**2)
-                    angle_velocity = player.angular_speed
-                    distance_to_target = (
-                        sqrt(
-                            (targets[player.target_counter][0] - player.x_position) ** 2
-                            + (targets[player.target_counter][1] - player.y_position)
-                            ** 2
-                        )
-                        / 500
-                    )
-                    angle_to_target = np.arctan2(
-                        targets[player.target_counter][1] - player.y_position,
-                        targets[player.target_counter][0] - player.x_position,
-                    )
-                    # Angle between the to_target vector and the velocity vector
-                    angle_target_and_velocity = np.arctan2(
-                        targets[player.target_counter][1] - player.y_position,
-                        targets[player.target_counter][0] - player.x_position,
-                    ) - np.arctan2(player.y_speed, player.x_speed)
-                    distance_to_target = (
-                        sqrt(
-                            (targets[player.target_counter][0] - player.x_position) ** 2
-                            + (targets[player.target_counter][1] - player.y_position)
-                            ** 2
-                        )
-                        / 500
-                    )
-                    thruster_left, thruster_right = player.act(
-                        np.array(
-                            [
-                                angle_to_up,
-                                velocity,
-                                angle_velocity,
-                                distance_to_target,
-                                angle_to_target,
-                                angle_target_and_velocity,
-                                distance_to_target,
-                            ]
-                        ).astype(np.float32)
-                    )
-                else:
-                    # Human player 
-                    thruster_left, thruster_right = player.act([])
-
-                # Calculate accelerations according to Newton's laws of motion
-                player.x_acceleration += (
-                    -(thruster_left + thruster_right)
-                    * sin(player.angle * pi / 180)
-                    / mass
-                )
-                player.y_acceleration += (
-                    -(thruster_left + thruster_right)
-                    * cos(player.angle * pi / 180)
-                    / mass
-                )
-                player.angular_acceleration += (
-                    arm * (thruster_right - thruster_left) / mass
+            # Display respawn timer
+            if player.dead == True and player.name == "Human":
+                respawn_text = respawn_timer_font.render(
+                    str(int(player.respawn_timer) + 1), True, (255, 255, 255)
                 )
-
-                # Calculate speed
-                player.x_speed += player.x_acceleration
-                player.y_speed += player.y_acceleration
-                player.angular_speed += player.angular_acceleration
-
-                # Calculate position
-                player.x_position += player.x_speed
-                player.y_position += player.y_speed
-                player.angle += player.angular_speed
-
-                # Calculate distance to target
-                dist = sqrt(
-                    (player.x_position - targets[player.target_counter][0]) ** 2
-                    + (player.y_position - targets[player.target_counter][1]) ** 2
-                )
-
-                # If target reached, respawn target
-                if dist < 50:
-                    player.target_counter += 1
-
-                # If to far, die and respawn after timer
-                elif dist > 1000:
-                    player.dead = True
-                    player.respawn_timer = respawn_timer_max
-            else:
-                # Display respawn timer
-                if player.name == "Human":
-                    respawn_text = respawn_timer_font.render(
-                        str(int(player.respawn_timer) + 1), True, (255, 255, 255)
-                    )
-                    respawn_text.set_alpha(124)
-                    screen.blit(
-                        respawn_text,
-                        (
-                            WIDTH / 2 - respawn_text.get_width() / 2,
-                            HEIGHT / 2 - respawn_text.get_height() / 2,
-                        ),
-                    )
-
-                player.respawn_timer -= 1 / 60
-                # Respawn
-                if player.respawn_timer < 0:
-                    player.dead = False
+                respawn_text.set_alpha(124)
+                screen.blit(
+                    respawn_text,
                     (
-                        player.angle,
-                        player.angular_speed,
-                        player.angular_acceleration,
-                    ) = (
-                        0,
-                        0,
-                        0,
-                    )
-                    (player.x_position, player.x_speed, player.x_acceleration) = (
-                        400,
-                        0,
-                        0,
-                    )
-                    (player.y_position, player.y_speed, player.y_acceleration) = (
-                        400,
-                        0,
-                        0,
-                    )
+                        WIDTH / 2 - respawn_text.get_width() / 2,
+                        HEIGHT / 2 - respawn_text.get_height() / 2,
+                    ),
+                )
 
             # Display target and player
+            (target_x, target_y) = match.target(player_index)
             target_sprite = target_animation[
-                int(step * target_animation_speed) % len(target_animation)
+                int(match.step_count * target_animation_speed) % len(target_animation)
             ]
             target_sprite.set_alpha(player.alpha)
             screen.blit(
                 target_sprite,
                 (
-                    targets[player.target_counter][0]
-                    - int(target_sprite.get_width() / 2),
-                    targets[player.target_counter][1]
-                    - int(target_sprite.get_height() / 2),
+                    target_x - int(target_sprite.get_width() / 2),
+                    target_y - int(target_sprite.get_height() / 2),
                 ),
             )
 
             player_sprite = player_animation[
-                int(step * player_animation_speed) % len(player_animation)
+                int(match.step_count * player_animation_speed) % len(player_animation)
             ]
-            player_copy = pygame.transform.rotate(player_sprite, player.angle)
+            player_copy = pygame.transform.rotate(player_sprite, drones.a[player_index])
             player_copy.set_alpha(player.alpha)
             screen.blit(
                 player_copy,
                 (
-                    player.x_position - int(player_copy.get_width() / 2),
-                    player.y_position - int(player_copy.get_height() / 2),
+                    drones.x[player_index] - int(player_copy.get_width() / 2),
+                    drones.y[player_index] - int(player_copy.get_height() / 2),
                 ),
             )
 
@@ -422,34 +261,26 @@ def balloon():
             screen.blit(
                 name_hud_text,
                 (
-                    player.x_position - int(name_hud_text.get_width() / 2),
-                    player.y_position - 30 - int(name_hud_text.get_height() / 2),
+                    drones.x[player_index] - int(name_hud_text.get_width() / 2),
+                    drones.y[player_index] - 30 - int(name_hud_text.get_height() / 2),
                 ),
             )
 
             # Display player info
-            if player_index == 0:     # Human
-                display_info(20)
-            elif player_index == 1:   # PID
-                display_info(130)
-            elif player_index == 2:   # SAC
-                display_info(240)
-            elif player_index == 3:   # A2C
-                display_info(350)
-            elif player_index == 4:   # PPO
-                display_info(460)     
+            display_info(20 + 110 * player_index)
 
             time_text = time_font.render(
-                "Time : " + str(int(time_limit - time)), True, (255, 255, 255)
+                "Time : " + str(int(match.time_limit - match.time)), True, (255, 255, 255)
             )
             screen.blit(time_text, (670, 30))
 
         # Ending conditions
-        if time > time_limit:
+        if match.done or match.step_count == max_frames:
             break
 
         pygame.display.update()
-        FramePerSec.tick(FPS)
+        FramePerSec.tick(fps)
+    match.close()
 
     # Print scores and who won
     print("")
@@ -460,4 +291,5 @@ def balloon():
     winner = players[np.argmax(scores)].name
 
     print("")
-    print("Winner is : " + winner + " !")
\ No newline at end of file
+    print("Winner is : " + winner + " !")
+    return match.results()
@@ -12,13 +12,17 @@ Versione estesa con:
 """
 
 import os
-from random import randrange
 from math import sin, cos, pi, sqrt
 
 import numpy as np
 import pygame
 from pygame.locals import *
-from quadai.player import HumanPlayer, PIDPlayer, SACPlayer, A2CPlayer, PPOPlayer, PPO_noisy_Player, PPO_curriculum_Player
+from quadai.match import BalloonMatch, check_headless_players
+from quadai.player import create_players, preload_players
+from quadai.timestep import FixedTimestep
+
+# Players of the game when none are selected from the command line
+DEFAULT_PLAYERS = ["PID", "SAC", "PPO", "PPO_curriculum"]
 
 
 def correct_path(current_path):
@@ -40,12 +44,82 @@ WIND_UPDATE_EVERY = 30
 WIND_DIR_RW_STD_DEG = 2.0
 WIND_SPEED_RW_STD = 0.003
 
-# stato globale del vento
-wind_dir = 0.0       # rad
-wind_speed = 0.0     # intensità (unità ~ accelerazione)
-wind_ax = 0.0        # componente x
-wind_ay = 0.0        # componente y
-wind_step_counter = 0
+
+class GameWind:
+    """
+    Vento globale della partita: domain randomization all'inizio e random
+    walk lento durante la partita. ax e ay sono le componenti applicate ai
+    droni (vedi BalloonMatch).
+
+    Args:
+        enabled (bool): False per una partita senza vento
+        speed_min (float): Intensità minima, sia iniziale che durante il random walk
+        speed_max (float): Intensità massima
+    """
+
+    def __init__(
+        self,
+        enabled: bool = WIND_ENABLED,
+        speed_min: float = WIND_SPEED_MIN,
+        speed_max: float = WIND_SPEED_MAX,
+    ):
+        self.enabled = enabled
+        self.speed_min = speed_min
+        self.speed_max = speed_max
+        self.dir = 0.0       # rad
+        self.speed = 0.0     # intensità (unità ~ accelerazione)
+        self.ax = 0.0        # componente x
+        self.ay = 0.0        # componente y
+        self.step_counter = 0
+
+    def sample_episode(self):
+        """
+        Domain randomization del vento all'inizio della partita.
+        """
+        if not self.enabled:
+            self.dir = 0.0
+            self.speed = 0.0
+            self.ax = 0.0
+            self.ay = 0.0
+            return
+
+        # direzione iniziale uniforme tra min e max (gradi)
+        dir_deg = np.random.uniform(WIND_DIR_MIN_DEG, WIND_DIR_MAX_DEG)
+        self.dir = np.deg2rad(dir_deg)
+
+        # intensità iniziale tra min e max
+        self.speed = np.random.uniform(self.speed_min, self.speed_max)
+
+        # componenti iniziali
+        self.ax = self.speed * np.cos(self.dir)
+        self.ay = self.speed * np.sin(self.dir)
+
+        self.step_counter = 0
+
+    def update(self):
+        """
+        Aggiorna lentamente il vento durante la partita.
+        Random walk su direzione e intensità.
+        """
+        if not self.enabled:
+            return
+
+        self.step_counter += 1
+        if self.step_counter % WIND_UPDATE_EVERY != 0:
+            return
+
+        # random walk sulla direzione
+        dir_delta = np.deg2rad(np.random.normal(0.0, WIND_DIR_RW_STD_DEG))
+        self.dir = (self.dir + dir_delta + 2 * pi) % (2 * pi)
+
+        # random walk sulla velocità
+        self.speed += np.random.normal(0.0, WIND_SPEED_RW_STD)
+        self.speed = max(self.speed_min, min(self.speed_max, self.speed))
+
+        # aggiorna componenti x,y
+        self.ax = self.speed * np.cos(self.dir)
+        self.ay = self.speed * np.sin(self.dir)
+
 
 # -----------------------------
 # Rumore sensori (come nell'env)
@@ -57,60 +131,6 @@ SENSOR_NOISE_STD = np.array(
 )
 
 
-def sample_episode_wind():
-    """
-    Domain randomization del vento all'inizio della partita.
-    """
-    global wind_dir, wind_speed, wind_ax, wind_ay, wind_step_counter
-
-    if not WIND_ENABLED:
-        wind_dir = 0.0
-        wind_speed = 0.0
-        wind_ax = 0.0
-        wind_ay = 0.0
-        return
-
-    # direzione iniziale uniforme tra min e max (gradi)
-    dir_deg = np.random.uniform(WIND_DIR_MIN_DEG, WIND_DIR_MAX_DEG)
-    wind_dir = np.deg2rad(dir_deg)
-
-    # intensità iniziale tra min e max
-    wind_speed = np.random.uniform(WIND_SPEED_MIN, WIND_SPEED_MAX)
-
-    # componenti iniziali
-    wind_ax = wind_speed * np.cos(wind_dir)
-    wind_ay = wind_speed * np.sin(wind_dir)
-
-    wind_step_counter = 0
-
-
-def update_wind():
-    """
-    Aggiorna lentamente il vento durante la partita.
-    Random walk su direzione e intensità.
-    """
-    global wind_dir, wind_speed, wind_ax, wind_ay, wind_step_counter
-
-    if not WIND_ENABLED:
-        return
-
-    wind_step_counter += 1
-    if wind_step_counter % WIND_UPDATE_EVERY != 0:
-        return
-
-    # random walk sulla direzione
-    dir_delta = np.deg2rad(np.random.normal(0.0, WIND_DIR_RW_STD_DEG))
-    wind_dir = (wind_dir + dir_delta + 2 * pi) % (2 * pi)
-
-    # random walk sulla velocità
-    wind_speed += np.random.normal(0.0, WIND_SPEED_RW_STD)
-    wind_speed = max(WIND_SPEED_MIN, min(WIND_SPEED_MAX, wind_speed))
-
-    # aggiorna componenti x,y
-    wind_ax = wind_speed * np.cos(wind_dir)
-    wind_ay = wind_speed * np.sin(wind_dir)
-
-
 def add_sensor_noise(obs: np.ndarray) -> np.ndarray:
     """
     Aggiunge rumore gaussiano alle osservazioni, come in droneEnv.get_obs().
@@ -121,27 +141,63 @@ def add_sensor_noise(obs: np.ndarray) -> np.ndarray:
     return obs + noise
 
 
-def balloon_noisy():
+def new_match(player_names, wind=None):
+    """
+    Crea i giocatori e una partita con vento e rumore sui sensori.
+
+    Args:
+        player_names (list): Nomi dei giocatori (vedi PLAYER_REGISTRY)
+        wind (GameWind): Vento della partita (es. un intervallo di intensità
+            per i tornei), None per quello di default
+
+    Returns:
+        BalloonMatch: La partita, non ancora iniziata
+    """
+    players = create_players(player_names)
+    # Nuovo meteo per questa partita
+    if wind is None:
+        wind = GameWind()
+    wind.sample_episode()
+    return BalloonMatch(players, wind=wind, sensor_noise=add_sensor_noise)
+
+
+def balloon_noisy(player_names=None, fps=60, max_frames=None, headless=False, record=None):
     """
     Runs the balloon game.
+
+    Args:
+        player_names (list): Names of the players (see PLAYER_REGISTRY),
+            DEFAULT_PLAYERS if None
+        fps (int): Frame rate cap of the rendering, the game always runs at
+            60 steps per second of game time; 0 for no cap, with one step
+            per rendered frame (benchmarks)
+        max_frames (int): Stops the match after this many steps, None to
+            play the whole match
+        headless (bool): Runs the match without window, rendering and frame
+            cap (tournaments); AI players only
+        record (str): Trajectory file where the match is recorded (see
+            quadai.trajectory and quadai.replay), None to not record
+
+    Returns:
+        list: For every player, dict with name, balloons and crashes
     """
+    player_names = player_names or DEFAULT_PLAYERS
+    if headless:
+        check_headless_players(player_names)
+        match = new_match(player_names)
+        if record is not None:
+            match.start_recording(record, "balloon_noisy")
+        match.run(max_frames)
+        match.close()
+        return match.results()
+
+    # The models load in background while the window and sprites come up
+    preload_players(player_names)
+
     # Game constants
-    FPS = 60
     WIDTH = 800
     HEIGHT = 800
 
-    # Physics constants
-    gravity = 0.08
-    # Propeller force for UP and DOWN
-    thruster_amplitude = 0.04
-    # Propeller force for LEFT and RIGHT rotations
-    diff_amplitude = 0.003
-    # By default, thruster will apply angle force of thruster_mean
-    thruster_mean = 0.04
-    mass = 1
-    # Length from center of mass to propeller
-    arm = 25
-
     # Initialize Pygame, load sprites
     FramePerSec = pygame.time.Clock()
 
@@ -240,67 +296,44 @@ def balloon_noisy():
             )
             screen.blit(respawning_text, (position, 70))
 
-    # Initialize game variables
-    time = 0
-    step = 0
-    time_limit = 100
-    respawn_timer_max = 3
-
-
-
-
-
-
+    # Qui puoi scegliere chi gioca: vedi DEFAULT_PLAYERS o l'opzione --players
+    match = new_match(player_names)
+    if record is not None:
+        match.start_recording(record, "balloon_noisy")
+    players = match.players
+    drones = match.drones
+    wind = match.wind
 
-    players = [
-        #HumanPlayer(),
-        PIDPlayer(),
-        SACPlayer(),
-        #A2CPlayer(),
-        PPOPlayer(),
-        #PPO_noisy_Player(),
-        PPO_curriculum_Player()
-    ]
-
-
-
-
-
-    # Generate 100 targets
-    targets = []
-    for i in range(100):
-        targets.append((randrange(200, 600), randrange(200, 600)))
-
-    # Nuovo meteo per questa partita
-    sample_episode_wind()
+    # Il rendering va al massimo a fps frame al secondo, fps=0 disegna ogni passo
+    timestep = FixedTimestep(lockstep=fps == 0)
 
     # Game loop
     while True:
         pygame.event.get()
 
+        # Vento, giocatori e fisica avanzano a passi fissi di 1/60 s, tanti
+        # quanti il tempo trascorso dal frame precedente (vedi quadai.timestep)
+        for _ in range(timestep.steps()):
+            match.step()
+
+            x_cloud1 += speed_cloud1
+            if x_cloud1 > WIDTH:
+                x_cloud1 = -cloud1.get_width()
+            x_cloud2 += speed_cloud2
+            if x_cloud2 < -cloud2.get_width():
+                x_cloud2 = WIDTH
+
+            if match.done or match.step_count == max_frames:
+                break
+
         # Display background
         screen.fill((131, 176, 181))
-
-        x_cloud1 += speed_cloud1
-        if x_cloud1 > WIDTH:
-            x_cloud1 = -cloud1.get_width()
         screen.blit(cloud1, (x_cloud1, y_cloud1))
-
-        x_cloud2 += speed_cloud2
-        if x_cloud2 < -cloud2.get_width():
-            x_cloud2 = WIDTH
         screen.blit(cloud2, (x_cloud2, y_cloud2))
-
         screen.blit(sun, (630, -100))
 
-        time += 1 / 60
-        step += 1
-
-        # aggiorna lentamente il vento
-        update_wind()
-
         # Visualizzazione del vento con freccia + intensità in km/h
-        if WIND_ENABLED:
+        if wind.enabled:
             # centro della freccia
             cx, cy = 100, 650
 
@@ -309,8 +342,8 @@ def balloon_noisy():
             scale = base_scale
 
             # punto finale del corpo della freccia
-            end_x = cx + int(wind_ax * scale)
-            end_y = cy + int(wind_ay * scale)
+            end_x = cx + int(wind.ax * scale)
+            end_y = cy + int(wind.ay * scale)
 
             # disegna il corpo della freccia
             pygame.draw.line(screen, (255, 255, 255), (cx, cy), (end_x, end_y), 3)
@@ -344,8 +377,8 @@ def balloon_noisy():
                     screen, (255, 255, 255), (end_x, end_y), (hx2, hy2), 3
                 )
 
-            # intensità del vento in km/h (assumendo wind_speed in m/s)
-            wind_speed_kmh = abs(wind_speed) * 3.6 * 10
+            # intensità del vento in km/h (assumendo wind.speed in m/s)
+            wind_speed_kmh = abs(wind.speed) * 3.6 * 10
             intensity_text = score_font.render(
                 f"Wind: {wind_speed_kmh:.2f} km/h", True, (255, 255, 255)
             )
@@ -360,358 +393,44 @@ def balloon_noisy():
 
         # For each player
         for player_index, player in enumerate(players):
-            if player.dead is False:
-                # Initialize accelerations
-                player.x_acceleration = 0
-                player.y_acceleration = gravity
-                player.angular_acceleration = 0
-
-                # Calculate propeller force in function of input
-                if player.name == "DQN" or player.name == "PID":
-                    thruster_left, thruster_right = player.act(
-                        [
-                            targets[player.target_counter][0] - player.x_position,
-                            player.x_speed,
-                            targets[player.target_counter][1] - player.y_position,
-                            player.y_speed,
-                            player.angle,
-                            player.angular_speed,
-                        ]
-                    )
-
-
-
-
-
-
-                elif player.name == "A2C":
-                    xt = targets[player.target_counter][0]
-                    yt = targets[player.target_counter][1]
-
-                    angle_to_up = player.angle / 180 * pi
-                    velocity = sqrt(player.x_speed**2 + player.y_speed**2)
-                    angle_velocity = player.angular_speed
-                    dist_val = sqrt(
-                        (xt - player.x_position) ** 2 + (yt - player.y_position) ** 2
-                    )
-                    distance_to_target = dist_val / 500
-                    angle_to_target = np.arctan2(
-                        yt - player.y_position, xt - player.x_position
-                    )
-                    angle_target_and_velocity = np.arctan2(
-                        yt - player.y_position, xt - player.x_position
-                    ) - np.arctan2(player.y_speed, player.x_speed)
-
-                    obs_array = np.array(
-                        [
-                            angle_to_up,
-                            velocity,
-                            angle_velocity,
-                            distance_to_target,
-                            angle_to_target,
-                            angle_target_and_velocity,
-                            distance_to_target,
-                        ],
-                        dtype=np.float32,
-                    )
-
-                    # rumore sensori
-                    obs_array = add_sensor_noise(obs_array)
-
-                    thruster_left, thruster_right = player.act(obs_array)
-
-
-
-
-
-
-
-                elif player.name == "PPO":
-                    xt = targets[player.target_counter][0]
-                    yt = targets[player.target_counter][1]
-
-                    angle_to_up = player.angle / 180 * pi
-                    velocity = sqrt(player.x_speed**2 + player.y_speed**2)
-                    angle_velocity = player.angular_speed
-                    dist_val = sqrt(
-                        (xt - player.x_position) ** 2 + (yt - player.y_position) ** 2
-                    )
-                    distance_to_target = dist_val / 500
-                    angle_to_target = np.arctan2(
-                        yt - player.y_position, xt - player.x_position
-                    )
-                    angle_target_and_velocity = np.arctan2(
-                        yt - player.y_position, xt - player.x_position
-                    ) - np.arctan2(player.y_speed, player.x_speed)
-
-                    obs_array = np.array(
-                        [
-                            angle_to_up,
-                            velocity,
-                            angle_velocity,
-                            distance_to_target,
-                            angle_to_target,
-                            angle_target_and_velocity,
-                            distance_to_target,
-                        ],
-                        dtype=np.float32,
-                    )
-
-                    # rumore sensori (puoi disabilitare se vuoi PPO “pulito”)
-                    # obs_array = add_sensor_noise(obs_array)
-
-                    thruster_left, thruster_right = player.act(obs_array)
-
-
-
-
-
-
-
-                elif player.name == "PPO_noisy":
-                    xt = targets[player.target_counter][0]
-                    yt = targets[player.target_counter][1]
-
-                    angle_to_up = player.angle / 180 * pi
-                    velocity = sqrt(player.x_speed**2 + player.y_speed**2)
-                    angle_velocity = player.angular_speed
-                    dist_val = sqrt(
-                        (xt - player.x_position) ** 2 + (yt - player.y_position) ** 2
-                    )
-                    distance_to_target = dist_val / 500
-                    angle_to_target = np.arctan2(
-                        yt - player.y_position, xt - player.x_position
-                    )
-                    angle_target_and_velocity = np.arctan2(
-                        yt - player.y_position, xt - player.x_position
-                    ) - np.arctan2(player.y_speed, player.x_speed)
-
-                    obs_array = np.array(
-                        [
-                            angle_to_up,
-                            velocity,
-                            angle_velocity,
-                            distance_to_target,
-                            angle_to_target,
-                            angle_target_and_velocity,
-                            distance_to_target,
-                        ],
-                        dtype=np.float32,
-                    )
-
-                    # PPO_noisy vede osservazioni disturbate, come in training
-                    obs_array = add_sensor_noise(obs_array)
-
-                    thruster_left, thruster_right = player.act(obs_array)
-
-
-
-
-
-
-                elif player.name == "PPO_curriculum":
-                    xt = targets[player.target_counter][0]
-                    yt = targets[player.target_counter][1]
-
-                    angle_to_up = player.angle / 180 * pi
-                    velocity = sqrt(player.x_speed**2 + player.y_speed**2)
-                    angle_velocity = player.angular_speed
-                    dist_val = sqrt(
-                        (xt - player.x_position) ** 2 + (yt - player.y_position) ** 2
-                    )
-                    distance_to_target = dist_val / 500
-                    angle_to_target = np.arctan2(
-                        yt - player.y_position, xt - player.x_position
-                    )
-                    angle_target_and_velocity = np.arctan2(
-                        yt - player.y_position, xt - player.x_position
-                    ) - np.arctan2(player.y_speed, player.x_speed)
-
-                    obs_array = np.array(
-                        [
-                            angle_to_up,
-                            velocity,
-                            angle_velocity,
-                            distance_to_target,
-                            angle_to_target,
-                            angle_target_and_velocity,
-                            distance_to_target,
-                        ],
-                        dtype=np.float32,
-                    )
-
-                    # PPO_noisy vede osservazioni disturbate, come in training
-                    obs_array = add_sensor_noise(obs_array)
-
-                    thruster_left, thruster_right = player.act(obs_array)
-
-
-
-
-
-
-
-
-                elif player.name == "SAC":
-                    angle_to_up = player.angle / 180 * pi
-                    velocity = sqrt(player.x_speed**2 + player.y_speed**2)
-                    angle_velocity = player.angular_speed
-                    distance_to_target = (
-                        sqrt(
-                            (targets[player.target_counter][0] - player.x_position) ** 2
-                            + (targets[player.target_counter][1] - player.y_position)
-                            ** 2
-                        )
-                        / 500
-                    )
-                    angle_to_target = np.arctan2(
-                        targets[player.target_counter][1] - player.y_position,
-                        targets[player.target_counter][0] - player.x_position,
-                    )
-                    angle_target_and_velocity = np.arctan2(
-                        targets[player.target_counter][1] - player.y_position,
-                        targets[player.target_counter][0] - player.x_position,
-                    ) - np.arctan2(player.y_speed, player.x_speed)
-                    distance_to_target = (
-                        sqrt(
-                            (targets[player.target_counter][0] - player.x_position) ** 2
-                            + (targets[player.target_counter][1] - player.y_position)
-                            ** 2
-                        )
-                        / 500
-                    )
-
-                    obs_array = np.array(
-                        [
-                            angle_to_up,
-                            velocity,
-                            angle_velocity,
-                            distance_to_target,
-                            angle_to_target,
-                            angle_target_and_velocity,
-                            distance_to_target,
-                        ],
-                        dtype=np.float32,
-                    )
-
-                    # se il SAC è stato addestrato con rumore, lo riapplichi qui
-                    # obs_array = add_sensor_noise(obs_array)
-
-                    thruster_left, thruster_right = player.act(obs_array)
-
-
-
-
-
-
-                else:
-                    # Human player
-                    thruster_left, thruster_right = player.act([])
-
-                # Calculate accelerations according to Newton's laws of motion
-                player.x_acceleration += (
-                    -(thruster_left + thruster_right)
-                    * sin(player.angle * pi / 180)
-                    / mass
+            # Display respawn timer
+            if player.dead is True and player.name == "Human":
+                respawn_text = respawn_timer_font.render(
+                    str(int(player.respawn_timer) + 1), True, (255, 255, 255)
                 )
-                player.y_acceleration += (
-                    -(thruster_left + thruster_right)
-                    * cos(player.angle * pi / 180)
-                    / mass
-                )
-                player.angular_acceleration += (
-                    arm * (thruster_right - thruster_left) / mass
-                )
-
-                # aggiungi contributo del vento
-                if WIND_ENABLED:
-                    player.x_acceleration += wind_ax
-                    player.y_acceleration += wind_ay
-
-                # Calculate speed
-                player.x_speed += player.x_acceleration
-                player.y_speed += player.y_acceleration
-                player.angular_speed += player.angular_acceleration
-
-                # Calculate position
-                player.x_position += player.x_speed
-                player.y_position += player.y_speed
-                player.angle += player.angular_speed
-
-                # Calculate distance to target
-                dist = sqrt(
-                    (player.x_position - targets[player.target_counter][0]) ** 2
-                    + (player.y_position - targets[player.target_counter][1]) ** 2
-                )
-
-                # If target reached, respawn target
-                if dist < 50:
-                    player.target_counter += 1
-
-                # If too far, die and respawn after timer
-                elif dist > 1000:
-                    player.dead = True
-                    player.respawn_timer = respawn_timer_max
-            else:
-                # Display respawn timer
-                if player.name == "Human":
-                    respawn_text = respawn_timer_font.render(
-                        str(int(player.respawn_timer) + 1), True, (255, 255, 255)
-                    )
-                    respawn_text.set_alpha(124)
-                    screen.blit(
-                        respawn_text,
-                        (
-                            WIDTH / 2 - respawn_text.get_width() / 2,
-                            HEIGHT / 2 - respawn_text.get_height() / 2,
-                        ),
-                    )
-
-                player.respawn_timer -= 1 / 60
-                # Respawn
-                if player.respawn_timer < 0:
-                    player.dead = False
+                respawn_text.set_alpha(124)
+                screen.blit(
+                    respawn_text,
                     (
-                        player.angle,
-                        player.angular_speed,
-                        player.angular_acceleration,
-                    ) = (0, 0, 0)
-                    (player.x_position, player.x_speed, player.x_acceleration) = (
-                        400,
-                        0,
-                        0,
-                    )
-                    (player.y_position, player.y_speed, player.y_acceleration) = (
-                        400,
-                        0,
-                        0,
-                    )
+                        WIDTH / 2 - respawn_text.get_width() / 2,
+                        HEIGHT / 2 - respawn_text.get_height() / 2,
+                    ),
+                )
 
             # Display target and player
+            (target_x, target_y) = match.target(player_index)
             target_sprite = target_animation[
-                int(step * target_animation_speed) % len(target_animation)
+                int(match.step_count * target_animation_speed) % len(target_animation)
             ]
             target_sprite.set_alpha(player.alpha)
             screen.blit(
                 target_sprite,
                 (
-                    targets[player.target_counter][0]
-                    - int(target_sprite.get_width() / 2),
-                    targets[player.target_counter][1]
-                    - int(target_sprite.get_height() / 2),
+                    target_x - int(target_sprite.get_width() / 2),
+                    target_y - int(target_sprite.get_height() / 2),
                 ),
             )
 
             player_sprite = player_animation[
-                int(step * player_animation_speed) % len(player_animation)
+                int(match.step_count * player_animation_speed) % len(player_animation)
             ]
-            player_copy = pygame.transform.rotate(player_sprite, player.angle)
+            player_copy = pygame.transform.rotate(player_sprite, drones.a[player_index])
             player_copy.set_alpha(player.alpha)
             screen.blit(
                 player_copy,
                 (
-                    player.x_position - int(player_copy.get_width() / 2),
-                    player.y_position - int(player_copy.get_height() / 2),
+                    drones.x[player_index] - int(player_copy.get_width() / 2),
+                    drones.y[player_index] - int(player_copy.get_height() / 2),
                 ),
             )
 
@@ -720,38 +439,26 @@ def balloon_noisy():
             screen.blit(
                 name_hud_text,
                 (
-                    player.x_position - int(name_hud_text.get_width() / 2),
-                    player.y_position - 30 - int(name_hud_text.get_height() / 2),
+                    drones.x[player_index] - int(name_hud_text.get_width() / 2),
+                    drones.y[player_index] - 30 - int(name_hud_text.get_height() / 2),
                 ),
             )
 
             # Display player info
-            if player_index == 0:  # Human
-                display_info(20)
-            elif player_index == 1:  # PID
-                display_info(130)
-            elif player_index == 2:  # SAC
-                display_info(240)
-            elif player_index == 3:  # A2C
-                display_info(350)
-            elif player_index == 4:  # PPO
-                display_info(460)
-            elif player_index == 5:  # PPO_noisy
-                display_info(570)
-            elif player_index == 6:  # PPO_curriculum
-                display_info(680)
+            display_info(20 + 110 * player_index)
 
             time_text = time_font.render(
-                "Time : " + str(int(time_limit - time)), True, (255, 255, 255)
+                "Time : " + str(int(match.time_limit - match.time)), True, (255, 255, 255)
             )
             screen.blit(time_text, (670, 30))
 
         # Ending conditions
-        if time > time_limit:
+        if match.done or match.step_count == max_frames:
             break
 
         pygame.display.update()
-        FramePerSec.tick(FPS)
+        FramePerSec.tick(fps)
+    match.close()
 
     # Print scores and who won
     print("")
@@ -763,3 +470,4 @@ def balloon_noisy():
 
     print("")
     print("Winner is : " + winner + " !")
+    return match.results()
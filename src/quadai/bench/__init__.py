@@ -0,0 +1,7 @@
+"""
+Throughput benchmarks of the environments, the policies and the games.
+
+Run them all with `python -m quadai.bench` (see quadai/bench/__main__.py):
+the results are written as JSON together with the machine description, so
+that runs of different commits can be compared.
+"""
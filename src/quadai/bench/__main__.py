@@ -0,0 +1,92 @@
+"""
+2D Quadcopter AI by Alexandre Sajus
+
+More information at:
+https://github.com/AlexandreSajus/Quadcopter-AI
+
+Runs the benchmark suites and writes the results as JSON.
+
+Usage:
+    python -m quadai.bench
+    python -m quadai.bench --suites envs vec_envs --quick --output bench.json
+"""
+
+import argparse
+import json
+
+from quadai.bench.common import machine_info
+from quadai.bench.envs import bench_envs, bench_vec_envs
+from quadai.bench.games import bench_balloon_games, bench_snowglobe
+from quadai.bench.models import bench_models
+
+# Suite name -> (function, kwargs of a full run, kwargs of a --quick run)
+SUITES = {
+    "envs": (bench_envs, {"n_steps": 20_000}, {"n_steps": 2_000}),
+    "vec_envs": (bench_vec_envs, {"n_steps": 200}, {"n_steps": 20}),
+    "models": (bench_models, {"n_calls": 2_000}, {"n_calls": 200}),
+    "games": (bench_balloon_games, {"n_frames": 600}, {"n_frames": 60}),
+    "snowglobe": (bench_snowglobe, {"n_frames": 120}, {"n_frames": 12}),
+}
+
+
+def _summary(result: dict) -> str:
+    if "skipped" in result:
+        return f"skipped ({result['skipped']})"
+    for key, unit in (
+        ("steps_per_s", "steps/s"),
+        ("predict_us", "us/predict"),
+        ("frame_ms", "ms/frame"),
+    ):
+        if key in result:
+            return f"{result[key]:.1f} {unit}"
+    return ""
+
+
+def run(suites, quick: bool = False) -> dict:
+    """
+    Runs the selected suites.
+
+    Args:
+        suites (list): Names of SUITES
+        quick (bool): Shorter runs, for a smoke test
+
+    Returns:
+        dict: "machine" (see machine_info) and "results" (suite -> list)
+    """
+    report = {"machine": machine_info(), "quick": quick, "results": {}}
+    for suite in suites:
+        (function, full_kwargs, quick_kwargs) = SUITES[suite]
+        print(f"--- {suite} ---")
+        results = function(**(quick_kwargs if quick else full_kwargs))
+        for result in results:
+            label = result["name"]
+            if "n_particles" in result:
+                label += f" [{result['n_particles']} particles]"
+            if result.get("collisions"):
+                label += " [collisions]"
+            if result.get("render_scale", 1) > 1:
+                label += f" [1/{result['render_scale']} resolution]"
+            print(f"{label}: {_summary(result)}")
+        report["results"][suite] = results
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Quadcopter-AI benchmarks")
+    parser.add_argument(
+        "--suites",
+        nargs="+",
+        choices=list(SUITES),
+        default=list(SUITES),
+        help="suites to run (all by default)",
+    )
+    parser.add_argument("--quick", action="store_true", help="short runs (smoke test)")
+    parser.add_argument(
+        "--output", default="bench_results.json", help="JSON file of the results"
+    )
+    args = parser.parse_args()
+
+    report = run(args.suites, args.quick)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
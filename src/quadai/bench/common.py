@@ -0,0 +1,81 @@
+"""
+2D Quadcopter AI by Alexandre Sajus
+
+More information at:
+https://github.com/AlexandreSajus/Quadcopter-AI
+
+Timing helpers and machine description shared by the benchmarks.
+"""
+
+import datetime
+import os
+import platform
+import subprocess
+import sys
+import time
+from typing import Callable
+
+import numpy as np
+
+
+def best_time(fn: Callable[[], None], repeat: int = 3) -> float:
+    """
+    Runs fn several times and keeps the fastest run, the least disturbed
+    by the rest of the machine.
+
+    Args:
+        fn (callable): The measured work, without arguments
+        repeat (int): Number of runs
+
+    Returns:
+        float: Duration of the fastest run in seconds
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=os.path.dirname(__file__),
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _version(module_name: str):
+    try:
+        module = __import__(module_name)
+    except ImportError:
+        return None
+    return getattr(module, "__version__", None)
+
+
+def machine_info() -> dict:
+    """
+    Describes the machine and the software the benchmarks ran on, so that
+    results of different commits are only compared on the same setup.
+
+    Returns:
+        dict: Date, git commit, platform, CPU and library versions
+    """
+    return {
+        "date": datetime.datetime.now().isoformat(timespec="seconds"),
+        "git_commit": _git_commit(),
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "python": sys.version.split()[0],
+        "numpy": np.__version__,
+        "numba": _version("numba"),
+        "pygame": _version("pygame"),
+        "stable_baselines3": _version("stable_baselines3"),
+    }
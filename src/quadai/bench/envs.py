@@ -0,0 +1,132 @@
+"""
+2D Quadcopter AI by Alexandre Sajus
+
+More information at:
+https://github.com/AlexandreSajus/Quadcopter-AI
+
+Step throughput of the training environments: every droneEnv variant and
+the batched DroneVecEnv.
+"""
+
+import importlib
+from typing import List
+
+import numpy as np
+
+from quadai.bench.common import best_time
+from quadai.kernels import run_frames_numba
+
+# Every droneEnv variant
+ENV_MODULES = [
+    "quadai.PPO.env_PPO",
+    "quadai.PPO.env_noisy_PPO",
+    "quadai.A2C.env_A2C",
+    "quadai.A2C.env_noisy_A2C",
+    "quadai.SAC.env_SAC",
+    "quadai.SAC.env_noisy_SAC",
+    "quadai.DQN.env_DQN",
+]
+
+# Configurations of DroneVecEnv: clean env and env with wind and sensor noise
+VEC_CONFIGS = {
+    "clean": {},
+    "noisy": {"wind_enabled": True, "sensor_noise_enabled": True},
+}
+
+
+def bench_env(env_module: str, n_steps: int = 20_000, seed: int = 0) -> dict:
+    """
+    Steps per second of one droneEnv, as built for training
+    (headless, preallocated observations), resets included.
+
+    Args:
+        env_module (str): Module defining droneEnv, e.g. "quadai.PPO.env_PPO"
+        n_steps (int): Steps per measured run
+        seed (int): Seed of the env and of the random actions
+
+    Returns:
+        dict: name, steps, steps_per_s
+    """
+    module = importlib.import_module(env_module)
+    env = module.droneEnv(False, False, preallocated_obs=True)
+    rng = np.random.default_rng(seed)
+    if env_module.endswith("env_DQN"):
+        actions = rng.integers(0, 5, n_steps)
+    else:
+        actions = rng.uniform(-1, 1, (n_steps, 2)).astype(np.float32)
+
+    def run():
+        env.reset(seed=seed)
+        for action in actions:
+            if env.step(action)[2]:
+                env.reset()
+
+    elapsed = best_time(run)
+    return {"name": env_module, "steps": n_steps, "steps_per_s": n_steps / elapsed}
+
+
+def bench_vec_env(
+    n_envs: int, kernel: str, config: str, n_steps: int = 200, seed: int = 0
+) -> dict:
+    """
+    Steps per second (summed over the envs) of DroneVecEnv.
+
+    Args:
+        n_envs (int): Number of drones stepped together
+        kernel (str): Frame kernel (see quadai/kernels.py)
+        config (str): Key of VEC_CONFIGS
+        n_steps (int): Calls to step per measured run
+        seed (int): Seed of the env and of the random actions
+
+    Returns:
+        dict: name, n_envs, kernel, config, steps, steps_per_s
+    """
+    from quadai.vec_env import DroneVecEnv
+
+    env = DroneVecEnv(n_envs, seed=seed, kernel=kernel, **VEC_CONFIGS[config])
+    actions = np.random.default_rng(seed).uniform(-1, 1, (n_steps, n_envs, 2))
+    actions = actions.astype(np.float32)
+    env.reset()
+    # First call outside the measure (Numba compiles or loads its cache)
+    env.step(actions[0])
+
+    def run():
+        for action in actions:
+            env.step(action)
+
+    elapsed = best_time(run)
+    return {
+        "name": f"DroneVecEnv[{config}, {kernel}, {n_envs}]",
+        "n_envs": n_envs,
+        "kernel": kernel,
+        "config": config,
+        "steps": n_steps * n_envs,
+        "steps_per_s": n_steps * n_envs / elapsed,
+    }
+
+
+def bench_envs(n_steps: int = 20_000) -> List[dict]:
+    """
+    Benchmarks every droneEnv of ENV_MODULES.
+    """
+    return [bench_env(env_module, n_steps) for env_module in ENV_MODULES]
+
+
+def bench_vec_envs(n_envs_list=(16, 256), n_steps: int = 200) -> List[dict]:
+    """
+    Benchmarks DroneVecEnv for every configuration, batch size and
+    available kernel. Skipped when stable-baselines3 is not installed
+    (DroneVecEnv implements its VecEnv interface).
+    """
+    try:
+        import quadai.vec_env  # noqa: F401
+    except ImportError as e:
+        return [{"name": "DroneVecEnv", "skipped": str(e)}]
+
+    kernels = ["numpy"] + (["numba"] if run_frames_numba is not None else [])
+    return [
+        bench_vec_env(n_envs, kernel, config, n_steps)
+        for config in VEC_CONFIGS
+        for kernel in kernels
+        for n_envs in n_envs_list
+    ]
@@ -0,0 +1,143 @@
+"""
+2D Quadcopter AI by Alexandre Sajus
+
+More information at:
+https://github.com/AlexandreSajus/Quadcopter-AI
+
+Per-frame cost of the games, run without frame cap on SDL's dummy video
+driver (no window). Loading sprites and models happens before the first
+frame, so the cost of a frame is measured as the difference between a
+long and a one-frame run: (t(n) - t(1)) / (n - 1).
+"""
+
+import contextlib
+import io
+import os
+import random
+import time
+from typing import List
+
+# AI players only: the human player would just fall
+BALLOON_PLAYERS = ["PID", "SAC", "A2C", "PPO"]
+BALLOON_NOISY_PLAYERS = ["PID", "SAC", "PPO", "PPO_curriculum"]
+
+
+def _frame_cost(run, n_frames: int, repeat: int = 3) -> float:
+    """
+    Seconds per frame of run(max_frames), without the setup cost.
+    """
+
+    def timed(max_frames):
+        start = time.perf_counter()
+        # The games print the final scores
+        with contextlib.redirect_stdout(io.StringIO()):
+            run(max_frames)
+        return time.perf_counter() - start
+
+    # Warm-up: imports, font cache and model loading
+    timed(1)
+    best = float("inf")
+    for _ in range(repeat):
+        best = min(best, (timed(n_frames) - timed(1)) / (n_frames - 1))
+    return best
+
+
+def _headless():
+    # Must be set before pygame opens the display
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    random.seed(0)
+
+
+def bench_balloon_games(n_frames: int = 600) -> List[dict]:
+    """
+    Per-frame cost of balloon and balloon_noisy with their AI players,
+    rendered and headless (simulation only).
+
+    Args:
+        n_frames (int): Frames of the measured run
+
+    Returns:
+        list: dict with name, players, frames, frame_ms, headless_frame_ms
+    """
+    _headless()
+    from quadai.balloon import balloon
+    from quadai.balloon_noisy import balloon_noisy
+
+    results = []
+    for name, game, players in (
+        ("balloon", balloon, BALLOON_PLAYERS),
+        ("balloon_noisy", balloon_noisy, BALLOON_NOISY_PLAYERS),
+    ):
+        cost = _frame_cost(
+            lambda max_frames: game(players, fps=0, max_frames=max_frames), n_frames
+        )
+        headless_cost = _frame_cost(
+            lambda max_frames: game(players, max_frames=max_frames, headless=True),
+            n_frames,
+        )
+        results.append(
+            {
+                "name": name,
+                "players": players,
+                "frames": n_frames,
+                "frame_ms": cost * 1e3,
+                "headless_frame_ms": headless_cost * 1e3,
+            }
+        )
+    return results
+
+
+def bench_snowglobe(
+    particle_counts=(500, 1800, 5000, 20000),
+    collision_counts=(1800, 5000),
+    reduced_resolution_counts=(5000, 20000, 50000),
+    n_frames: int = 120,
+) -> List[dict]:
+    """
+    Per-frame cost of snowglobe (particle update and drawing) for several
+    numbers of snow particles, without and with particle collisions, and
+    with the snow drawn at half resolution.
+
+    Args:
+        particle_counts (tuple): Numbers of particles to measure
+        collision_counts (tuple): Numbers of particles to measure with
+            collisions
+        reduced_resolution_counts (tuple): Numbers of particles to measure
+            with render_scale 2
+        n_frames (int): Frames of the measured run
+
+    Returns:
+        list: dict with name, n_particles, collisions, render_scale, frames,
+            frame_ms
+    """
+    _headless()
+    from quadai.snowglobe import snowglobe
+
+    results = []
+    runs = (
+        [(n, False, 1) for n in particle_counts]
+        + [(n, True, 1) for n in collision_counts]
+        + [(n, False, 2) for n in reduced_resolution_counts]
+    )
+    for n_particles, collisions, render_scale in runs:
+        cost = _frame_cost(
+            lambda max_frames: snowglobe(
+                n_particles,
+                fps=0,
+                max_frames=max_frames,
+                collisions=collisions,
+                render_scale=render_scale,
+            ),
+            n_frames,
+        )
+        results.append(
+            {
+                "name": "snowglobe",
+                "n_particles": n_particles,
+                "collisions": collisions,
+                "render_scale": render_scale,
+                "frames": n_frames,
+                "frame_ms": cost * 1e3,
+            }
+        )
+    return results
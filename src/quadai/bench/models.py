@@ -0,0 +1,89 @@
+"""
+2D Quadcopter AI by Alexandre Sajus
+
+More information at:
+https://github.com/AlexandreSajus/Quadcopter-AI
+
+predict latency of every model of models/: the NumPy exports (.npz, used by
+the players) and the stable-baselines3 files (.zip, when SB3 is installed).
+"""
+
+import os
+from typing import List
+
+import numpy as np
+
+from quadai.bench.common import best_time
+from quadai.numpy_policy import NumpyPolicy
+from quadai.obs import OBS_SIZE
+from quadai.utils.paths import get_models_dir
+
+# Batch used for the batched predict, as the inference broker of the games
+BATCH_SIZE = 64
+
+
+def _load(path: str):
+    if path.endswith(".npz"):
+        return NumpyPolicy.load(path)
+    import stable_baselines3
+
+    # The algorithm is the prefix of the file name, e.g. "ppo_model_v1_..."
+    algo_name = os.path.basename(path).split("_")[0].upper()
+    return getattr(stable_baselines3, algo_name).load(path)
+
+
+def bench_model(path: str, n_calls: int = 2000, seed: int = 0) -> dict:
+    """
+    Latency of model.predict for one observation and for a batch.
+
+    Args:
+        path (str): .npz or .zip file
+        n_calls (int): predict calls per measured run
+        seed (int): Seed of the random observations
+
+    Returns:
+        dict: name, runtime, predict_us (one observation) and
+            batch_predict_us (BATCH_SIZE observations)
+    """
+    model = _load(path)
+    rng = np.random.default_rng(seed)
+    obs = rng.normal(size=OBS_SIZE).astype(np.float32)
+    batch = rng.normal(size=(BATCH_SIZE, OBS_SIZE)).astype(np.float32)
+
+    def single():
+        for _ in range(n_calls):
+            model.predict(obs, deterministic=True)
+
+    def batched():
+        for _ in range(n_calls):
+            model.predict(batch, deterministic=True)
+
+    return {
+        "name": os.path.basename(path),
+        "runtime": "numpy" if path.endswith(".npz") else "sb3",
+        "predict_us": best_time(single) / n_calls * 1e6,
+        "batch_predict_us": best_time(batched) / n_calls * 1e6,
+    }
+
+
+def bench_models(n_calls: int = 2000) -> List[dict]:
+    """
+    Benchmarks every .npz and .zip file of models/. The .zip files are
+    skipped when stable-baselines3 is not installed.
+    """
+    try:
+        import stable_baselines3  # noqa: F401
+
+        sb3_error = None
+    except ImportError as e:
+        sb3_error = str(e)
+
+    results = []
+    models_dir = get_models_dir()
+    for filename in sorted(os.listdir(models_dir)):
+        path = os.path.join(models_dir, filename)
+        if filename.endswith(".npz") or (filename.endswith(".zip") and sb3_error is None):
+            results.append(bench_model(path, n_calls))
+        elif filename.endswith(".zip"):
+            results.append({"name": filename, "runtime": "sb3", "skipped": sb3_error})
+    return results
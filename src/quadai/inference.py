@@ -0,0 +1,66 @@
+"""
+2D Quadcopter AI by Alexandre Sajus
+
+More information at:
+https://github.com/AlexandreSajus/Quadcopter-AI
+
+Batched policy inference for the games.
+
+Calling model.predict(obs) once per AI player and per frame pays SB3's
+preprocessing and a torch forward for a batch of one every time. The
+InferenceBroker collects the observations of every AI player during a frame,
+groups them by model and runs a single predict per model on the stacked
+batch.
+"""
+
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+
+class InferenceBroker:
+    """
+    Groups the per-frame observations of the AI players by model.
+
+    Usage, once per frame:
+        broker.submit(player_index, model, obs)   # for every AI player
+        for player_index, action in broker.run():
+            ...
+    """
+
+    def __init__(self, deterministic: bool = False):
+        # predict(obs) in the players is not deterministic by default
+        self.deterministic = deterministic
+        # id(model) -> (model, player indices, observations)
+        self._pending: Dict[int, Tuple[object, List[int], List[np.ndarray]]] = {}
+
+    def submit(self, player_index: int, model, obs) -> None:
+        """
+        Queues the observation of a player for the next run().
+
+        Args:
+            player_index (int): Index of the player in the game
+            model: Policy with an SB3-style predict(obs, deterministic)
+            obs: Observation of the player (7 floats)
+        """
+        entry = self._pending.get(id(model))
+        if entry is None:
+            entry = (model, [], [])
+            self._pending[id(model)] = entry
+        entry[1].append(player_index)
+        entry[2].append(obs)
+
+    def run(self) -> List[Tuple[int, np.ndarray]]:
+        """
+        Runs one forward per model on all the queued observations.
+
+        Returns:
+            list: (player_index, action) for every submitted player
+        """
+        results = []
+        for model, indices, observations in self._pending.values():
+            batch = np.asarray(observations, dtype=np.float32)
+            actions, _ = model.predict(batch, deterministic=self.deterministic)
+            results.extend(zip(indices, actions))
+        self._pending.clear()
+        return results
@@ -0,0 +1,352 @@
+"""
+2D Quadcopter AI by Alexandre Sajus
+
+More information at:
+https://github.com/AlexandreSajus/Quadcopter-AI
+
+Frame kernels of DroneVecEnv.
+
+A kernel runs the frames of one action (wind random walk, Newton update,
+distance, reward, target respawn, termination) for a batch of drones in a
+single call, updating the state arrays in place. The random numbers are
+drawn beforehand by the caller (new_targets, wind_deltas), so every kernel
+consumes exactly the same values and their results can be compared.
+
+Three implementations share the same signature:
+- run_frames_numpy : vectorized over the drones, one NumPy call per frame
+- run_frames_python : scalar loop over drones and frames with the math module,
+  the same arithmetic as droneEnv.step (reference for the parity checks)
+- run_frames_numba : run_frames_python compiled by Numba (None if Numba is
+  not installed), the fast path for training
+
+DroneVecEnv calls a kernel for its whole batch. A droneEnv built with
+kernel=... calls it through EnvKernel, as a batch of one drone.
+
+Kernel arguments:
+    x, xd, y, yd, a, ad (np.ndarray): (n,) float64 state of the drones
+    thruster_left, thruster_right (np.ndarray): (n,) propeller forces
+    wind_ax, wind_ay, wind_dir, wind_speed (np.ndarray): (n,) wind state
+    wind_step_counter, target_counter (np.ndarray): (n,) int64 counters
+    xt, yt, time (np.ndarray): (n,) targets and episode time
+    new_targets (np.ndarray): (2, n_frames, n) targets used when a target is
+        reached at a given frame
+    wind_deltas (np.ndarray): (2, n_frames, n) direction (radians) and speed
+        increments used when the wind is updated at a given frame
+    rewards (np.ndarray): (n,) float64, accumulated in place
+    dones, crashed (np.ndarray): (n,) bool, set in place
+    n_frames (int): Frames per action (frame_skip)
+    physics_substeps (int): Integration steps per frame (see physics.step_frame)
+    dt, gravity, mass, arm, time_limit (float): Physics and episode constants
+    wind_enabled (bool), wind_update_every (int),
+    wind_speed_min, wind_speed_max (float): Wind random walk parameters
+"""
+
+from math import cos, pi, radians, sin, sqrt
+
+import numpy as np
+
+from quadai.physics import step_frame, target_distance
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+KERNELS = ("auto", "numba", "numpy", "python")
+
+
+def run_frames_numpy(
+    x, xd, y, yd, a, ad,
+    thruster_left, thruster_right,
+    wind_ax, wind_ay, wind_dir, wind_speed, wind_step_counter,
+    xt, yt, time, target_counter,
+    new_targets, wind_deltas,
+    rewards, dones, crashed,
+    n_frames, physics_substeps, dt, gravity, mass, arm, time_limit,
+    wind_enabled, wind_update_every, wind_speed_min, wind_speed_max,
+):
+    drones = _ArrayDrones(x, xd, y, yd, a, ad)
+    # Drones still running inside this action
+    active = ~dones
+
+    for frame in range(n_frames):
+        np.add(time, dt, out=time, where=active)
+
+        # Slow random walk of the wind direction and speed
+        if wind_enabled:
+            np.add(wind_step_counter, 1, out=wind_step_counter, where=active)
+            update = active & (wind_step_counter % wind_update_every == 0)
+            if update.any():
+                wind_dir[update] = (
+                    wind_dir[update] + wind_deltas[0, frame, update] + 2 * pi
+                ) % (2 * pi)
+                wind_speed[update] = np.clip(
+                    wind_speed[update] + wind_deltas[1, frame, update],
+                    wind_speed_min,
+                    wind_speed_max,
+                )
+                wind_ax[update] = wind_speed[update] * np.cos(wind_dir[update])
+                wind_ay[update] = wind_speed[update] * np.sin(wind_dir[update])
+
+        step_frame(
+            drones,
+            thruster_left,
+            thruster_right,
+            wind_ax if wind_enabled else None,
+            wind_ay if wind_enabled else None,
+            active=active,
+            gravity=gravity,
+            mass=mass,
+            arm=arm,
+            substeps=physics_substeps,
+        )
+
+        dist = target_distance(drones, xt, yt)
+
+        # Reward per step survived, penalty according to the distance
+        np.add(rewards, 1 / 60, out=rewards, where=active)
+        np.subtract(rewards, dist / (100 * 60), out=rewards, where=active)
+
+        # Reward if close to target, then respawn the target
+        reached = active & (dist < 50)
+        if reached.any():
+            xt[reached] = new_targets[0, frame, reached]
+            yt[reached] = new_targets[1, frame, reached]
+            rewards[reached] += 100
+            target_counter[reached] += 1
+
+        # Out of time, or too far from target (crash)
+        timeout = active & (time > time_limit)
+        crash = active & ~timeout & (dist > 1000)
+        rewards[crash] -= 1000
+        crashed |= crash
+        dones |= timeout | crash
+        active &= ~dones
+        if not active.any():
+            break
+
+
+def run_frames_python(
+    x, xd, y, yd, a, ad,
+    thruster_left, thruster_right,
+    wind_ax, wind_ay, wind_dir, wind_speed, wind_step_counter,
+    xt, yt, time, target_counter,
+    new_targets, wind_deltas,
+    rewards, dones, crashed,
+    n_frames, physics_substeps, dt, gravity, mass, arm, time_limit,
+    wind_enabled, wind_update_every, wind_speed_min, wind_speed_max,
+):
+    h = 1 / physics_substeps
+    for i in range(x.shape[0]):
+        if dones[i]:
+            continue
+        for frame in range(n_frames):
+            time[i] += dt
+
+            # Slow random walk of the wind direction and speed
+            if wind_enabled:
+                wind_step_counter[i] += 1
+                if wind_step_counter[i] % wind_update_every == 0:
+                    wind_dir[i] = (wind_dir[i] + wind_deltas[0, frame, i] + 2 * pi) % (2 * pi)
+                    speed = wind_speed[i] + wind_deltas[1, frame, i]
+                    wind_speed[i] = min(max(speed, wind_speed_min), wind_speed_max)
+                    wind_ax[i] = wind_speed[i] * cos(wind_dir[i])
+                    wind_ay[i] = wind_speed[i] * sin(wind_dir[i])
+
+            # Calculating accelerations with Newton's laws of motions
+            # (h = 1 without substeps, the products are then exact)
+            for _ in range(physics_substeps):
+                angle = a[i] * pi / 180
+                thrust = thruster_left[i] + thruster_right[i]
+                xdd = -thrust * sin(angle) / mass
+                ydd = gravity + -thrust * cos(angle) / mass
+                add = arm * (thruster_right[i] - thruster_left[i]) / mass
+                if wind_enabled:
+                    xdd = xdd + wind_ax[i]
+                    ydd = ydd + wind_ay[i]
+                xd[i] += xdd * h
+                yd[i] += ydd * h
+                ad[i] += add * h
+                x[i] += xd[i] * h
+                y[i] += yd[i] * h
+                a[i] += ad[i] * h
+
+            dist = sqrt((x[i] - xt[i]) ** 2 + (y[i] - yt[i]) ** 2)
+
+            # Reward per step survived, penalty according to the distance
+            rewards[i] += 1 / 60
+            rewards[i] -= dist / (100 * 60)
+
+            # Reward if close to target, then respawn the target
+            if dist < 50:
+                xt[i] = new_targets[0, frame, i]
+                yt[i] = new_targets[1, frame, i]
+                rewards[i] += 100
+                target_counter[i] += 1
+
+            # Out of time, or too far from target (crash)
+            if time[i] > time_limit:
+                dones[i] = True
+                break
+            if dist > 1000:
+                rewards[i] -= 1000
+                crashed[i] = True
+                dones[i] = True
+                break
+
+
+if numba is not None:
+    run_frames_numba = numba.njit(cache=True)(run_frames_python)
+else:
+    run_frames_numba = None
+
+
+class _ArrayDrones:
+    """
+    State arrays seen as a drone object by physics.step_frame.
+    """
+
+    __slots__ = ("x", "xd", "y", "yd", "a", "ad")
+
+    def __init__(self, x, xd, y, yd, a, ad):
+        (self.x, self.xd, self.y, self.yd, self.a, self.ad) = (x, xd, y, yd, a, ad)
+
+
+def get_kernel(name: str = "auto"):
+    """
+    Selects a frame kernel.
+
+    Args:
+        name (str): "numba" (raises ImportError without Numba), "numpy",
+            "python" (reference, slow) or "auto" for Numba when installed and
+            NumPy otherwise
+
+    Returns:
+        callable: The kernel, see the module docstring for its arguments
+    """
+    if name == "auto":
+        name = "numpy" if run_frames_numba is None else "numba"
+    if name == "numba":
+        if run_frames_numba is None:
+            raise ImportError("The numba kernel requires Numba (pip install numba)")
+        return run_frames_numba
+    if name == "numpy":
+        return run_frames_numpy
+    if name == "python":
+        return run_frames_python
+    raise ValueError(f"Unknown kernel: {name} (expected one of {KERNELS})")
+
+
+class EnvKernel:
+    """
+    Runs the frames of one droneEnv.step with a frame kernel.
+
+    The state of the env is copied into arrays of one drone, the kernel runs
+    the frames of the action and the state is copied back into the env.
+
+    The targets that replace a reached balloon are drawn from env.rng before
+    the kernel runs (2 * frame_skip uniform values per step), so with the
+    same seed the targets differ from the frame loop of droneEnv.step. The
+    physics, rewards and terminations are the same (see tests/test_kernels.py).
+    """
+
+    def __init__(self, name: str = "auto"):
+        """
+        Args:
+            name (str): Kernel, see get_kernel
+        """
+        self.run_frames = get_kernel(name)
+        # One array per group of values, so that the state of the env is
+        # loaded and stored with one operation; the kernel gets its rows
+        # x, xd, y, yd, a, ad, xt, yt, time, wind_ax, wind_ay, wind_dir,
+        # wind_speed, thruster_left, thruster_right, reward
+        self.floats = np.zeros((16, 1))
+        (
+            self.x, self.xd, self.y, self.yd, self.a, self.ad,
+            self.xt, self.yt, self.time,
+            self.wind_ax, self.wind_ay, self.wind_dir, self.wind_speed,
+            self.thruster_left, self.thruster_right, self.rewards,
+        ) = self.floats
+        # wind_step_counter, target_counter
+        self.counters = np.zeros((2, 1), dtype=np.int64)
+        (self.wind_step_counter, self.target_counter) = self.counters
+        # dones, crashed
+        self.flags = np.zeros((2, 1), dtype=bool)
+        (self.dones, self.crashed) = self.flags
+        self.new_targets = None
+        self.wind_deltas = None
+
+    def step(self, env, thruster_left: float, thruster_right: float):
+        """
+        Runs env.frame_skip frames of env with constant thrusts.
+
+        Args:
+            env: A droneEnv (the noisy ones with wind_enabled use their wind)
+            thruster_left (float): Left propeller force
+            thruster_right (float): Right propeller force
+
+        Returns:
+            tuple: (reward, done) of the action
+        """
+        n_frames = env.frame_skip
+        wind_enabled = getattr(env, "wind_enabled", False)
+        if wind_enabled:
+            wind = (env.wind_ax, env.wind_ay, env.wind_dir, env.wind_speed)
+            wind_step_counter = env.wind_step_counter
+        else:
+            wind = (0.0, 0.0, 0.0, 0.0)
+            wind_step_counter = 0
+        self.floats[:, 0] = (
+            env.x, env.xd, env.y, env.yd, env.a, env.ad, env.xt, env.yt, env.time,
+            *wind, thruster_left, thruster_right, 0.0,
+        )
+        self.counters[:, 0] = (wind_step_counter, env.target_counter)
+        self.flags.fill(False)
+
+        if self.wind_deltas is None or self.wind_deltas.shape[1] != n_frames:
+            self.new_targets = np.zeros((2, n_frames, 1))
+            self.wind_deltas = np.zeros((2, n_frames, 1))
+        # Integer targets in [200, 600) from uniform values: a call to
+        # rng.integers with a size costs several times more than rng.random
+        new_targets = self.new_targets
+        env.rng.random(out=new_targets)
+        new_targets *= 400
+        np.floor(new_targets, out=new_targets)
+        new_targets += 200
+        wind_update_every = 1
+        if wind_enabled:
+            # The increments of the wind stream go to the frames that update
+            # the wind, as in droneEnv._update_wind
+            wind_update_every = env.wind_update_every
+            self.wind_deltas.fill(0.0)
+            for frame in range(n_frames):
+                if (wind_step_counter + 1 + frame) % wind_update_every == 0:
+                    (dir_delta_deg, speed_delta) = env._wind_stream.next().tolist()
+                    self.wind_deltas[0, frame, 0] = radians(dir_delta_deg)
+                    self.wind_deltas[1, frame, 0] = speed_delta
+
+        self.run_frames(
+            self.x, self.xd, self.y, self.yd, self.a, self.ad,
+            self.thruster_left, self.thruster_right,
+            self.wind_ax, self.wind_ay, self.wind_dir, self.wind_speed, self.wind_step_counter,
+            self.xt, self.yt, self.time, self.target_counter,
+            new_targets, self.wind_deltas,
+            self.rewards, self.dones, self.crashed,
+            n_frames, env.physics_substeps,
+            1 / env.FPS, env.gravity, env.mass, env.arm, env.time_limit,
+            wind_enabled, wind_update_every,
+            getattr(env, "wind_speed_min", 0.0), getattr(env, "wind_speed_max", 0.0),
+        )
+
+        (
+            env.x, env.xd, env.y, env.yd, env.a, env.ad, xt, yt, env.time,
+            wind_ax, wind_ay, wind_dir, wind_speed, _, _, reward,
+        ) = self.floats[:, 0].tolist()
+        (env.xt, env.yt) = (int(xt), int(yt))
+        (wind_step_counter, env.target_counter) = self.counters[:, 0].tolist()
+        if wind_enabled:
+            (env.wind_ax, env.wind_ay, env.wind_dir, env.wind_speed) = (
+                wind_ax, wind_ay, wind_dir, wind_speed,
+            )
+            env.wind_step_counter = wind_step_counter
+        return reward, bool(self.dones[0])
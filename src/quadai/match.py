@@ -0,0 +1,281 @@
+"""
+2D Quadcopter AI by Alexandre Sajus
+
+More information at:
+https://github.com/AlexandreSajus/Quadcopter-AI
+
+Simulation of a balloon match: targets, players, physics, deaths and
+respawns, without any rendering.
+
+The balloon games draw a BalloonMatch every frame; headless runs (tournaments,
+benchmarks) only call step() until the match is over, with no window and no
+frame cap, and get the same scores for the same seeds.
+"""
+
+from random import randrange
+from typing import Callable, List, Optional
+
+import numpy as np
+
+from quadai.inference import InferenceBroker
+from quadai.obs import OBS_SIZE, build_obs_batch
+from quadai.physics import ARM, FPS, GRAVITY, MASS, DroneState, step_frame, target_distance
+from quadai.player import PLAYER_REGISTRY, Player
+
+# Duration of a match in seconds
+TIME_LIMIT = 100
+# Seconds before a crashed player respawns
+RESPAWN_TIMER_MAX = 3
+# Number of targets generated for a match
+N_TARGETS = 100
+
+
+def check_headless_players(player_names: List[str]) -> None:
+    """
+    Raises ValueError if a player needs the keyboard, so it can't play a
+    match without window.
+
+    Args:
+        player_names (list): Names of the players (keys of PLAYER_REGISTRY)
+    """
+    for name in player_names:
+        spec = PLAYER_REGISTRY.get(name)
+        if spec is not None and spec.obs == "human":
+            raise ValueError(f"{name} needs the game window, it can't play a headless match")
+
+
+class BalloonMatch:
+    """
+    State of a balloon match, advanced one frame at a time by step().
+
+    The random draws happen in the same order as the original game loop:
+    targets with the random module at creation, then every frame the wind
+    update, the sensor noise of the players in order and the predict of the
+    models, so a match is reproduced by seeding random, np.random and the
+    models.
+    """
+
+    def __init__(
+        self,
+        players: List[Player],
+        wind=None,
+        sensor_noise: Optional[Callable[[np.ndarray], np.ndarray]] = None,
+        time_limit: float = TIME_LIMIT,
+        respawn_timer_max: float = RESPAWN_TIMER_MAX,
+    ):
+        """
+        Args:
+            players (list): The players, see quadai.player.create_players
+            wind: None for no wind, or an object with ax and ay attributes
+                (wind acceleration) and an update() method called every frame
+            sensor_noise (callable): Applied to the observation of the
+                "policy_noisy" players, None to give them the clean observation
+            time_limit (float): Duration of the match in seconds
+            respawn_timer_max (float): Seconds before a crashed player respawns
+        """
+        self.players = players
+        self.wind = wind
+        self.sensor_noise = sensor_noise
+        self.time_limit = time_limit
+        self.respawn_timer_max = respawn_timer_max
+
+        self.time = 0
+        self.step_count = 0
+        # Crashes of every player (flew more than 1000 pixels from its target)
+        self.crashes = [0] * len(players)
+
+        # Physics state of every player
+        self.drones = DroneState(len(players))
+        # Groups the observations of the AI players by model every frame
+        self.broker = InferenceBroker()
+        # Observations of every drone for the AI players, refreshed every frame
+        self.observations = np.empty((len(players), OBS_SIZE), dtype=np.float32)
+        self._obs_kinds = [PLAYER_REGISTRY[player.name].obs for player in players]
+
+        self.targets = [
+            (randrange(200, 600), randrange(200, 600)) for _ in range(N_TARGETS)
+        ]
+
+        # TrajectoryWriter of the match, see start_recording
+        self.recorder = None
+
+    @property
+    def done(self) -> bool:
+        """
+        True once the time limit is over.
+        """
+        return self.time > self.time_limit
+
+    def target(self, player_index: int):
+        """
+        Current target (x, y) of a player.
+        """
+        return self.targets[self.players[player_index].target_counter]
+
+    def step(self) -> None:
+        """
+        Advances the match by one frame (1/60 s).
+        """
+        players = self.players
+        drones = self.drones
+
+        self.time += 1 / FPS
+        self.step_count += 1
+
+        if self.wind is not None:
+            self.wind.update()
+
+        # Current target of every player and observations for the AI players
+        targets_x = np.array([self.targets[player.target_counter][0] for player in players])
+        targets_y = np.array([self.targets[player.target_counter][1] for player in players])
+        build_obs_batch(
+            drones.x,
+            drones.y,
+            drones.xd,
+            drones.yd,
+            drones.a,
+            drones.ad,
+            targets_x,
+            targets_y,
+            out=self.observations,
+        )
+
+        # Calculate propeller force of the alive players in function of input
+        alive = np.array([not player.dead for player in players])
+        for player_index, player in enumerate(players):
+            if player.dead:
+                continue
+            obs_kind = self._obs_kinds[player_index]
+            if obs_kind == "pid":
+                thruster_left, thruster_right = player.act(
+                    [
+                        targets_x[player_index] - drones.x[player_index],
+                        drones.xd[player_index],
+                        targets_y[player_index] - drones.y[player_index],
+                        drones.yd[player_index],
+                        drones.a[player_index],
+                        drones.ad[player_index],
+                    ]
+                )
+            elif obs_kind in ("policy", "policy_noisy"):
+                obs_array = self.observations[player_index]
+
+                # Sensor noise for the players trained with noisy observations
+                if obs_kind == "policy_noisy" and self.sensor_noise is not None:
+                    obs_array = self.sensor_noise(obs_array)
+
+                # Queued, the broker runs one forward per model below
+                self.broker.submit(player_index, player.model, obs_array)
+                continue
+            else:
+                # Human player
+                thruster_left, thruster_right = player.act([])
+
+            drones.thruster_left[player_index] = thruster_left
+            drones.thruster_right[player_index] = thruster_right
+
+        # Batched inference: one predict per model for all the AI players
+        for player_index, action in self.broker.run():
+            (
+                drones.thruster_left[player_index],
+                drones.thruster_right[player_index],
+            ) = players[player_index].thrusts_from_action(action)
+
+        # Calculate accelerations according to Newton's laws of motion,
+        # all the alive players are updated at once
+        step_frame(
+            drones,
+            drones.thruster_left,
+            drones.thruster_right,
+            None if self.wind is None else self.wind.ax,
+            None if self.wind is None else self.wind.ay,
+            active=alive,
+            gravity=GRAVITY,
+            mass=MASS,
+            arm=ARM,
+        )
+
+        # Calculate distance to target
+        dist = target_distance(drones, targets_x, targets_y)
+
+        for player_index, player in enumerate(players):
+            if alive[player_index]:
+                # If target reached, respawn target
+                if dist[player_index] < 50:
+                    player.target_counter += 1
+
+                # If too far, die and respawn after timer
+                elif dist[player_index] > 1000:
+                    player.dead = True
+                    player.respawn_timer = self.respawn_timer_max
+                    self.crashes[player_index] += 1
+            else:
+                player.respawn_timer -= 1 / FPS
+                # Respawn
+                if player.respawn_timer < 0:
+                    player.dead = False
+                    drones.reset(player_index)
+
+        if self.recorder is not None:
+            self._record()
+
+    def start_recording(self, path: str, source: str = "balloon") -> None:
+        """
+        Records every following frame in a trajectory file (see
+        quadai.trajectory), written until close().
+
+        Args:
+            path (str): Trajectory file to write
+            source (str): Name of the game, stored in the file
+        """
+        from quadai.trajectory import TrajectoryWriter
+
+        meta = {"time_limit": self.time_limit}
+        if self.wind is not None:
+            meta["wind_speed"] = float(getattr(self.wind, "speed", 0.0))
+        names = [player.name for player in self.players]
+        self.recorder = TrajectoryWriter(path, len(self.players), names, source=source, meta=meta)
+        self._target_array = np.array(self.targets, dtype=np.float32)
+
+    def _record(self) -> None:
+        counters = [player.target_counter for player in self.players]
+        targets = self._target_array[counters]
+        self.recorder.append(
+            self.step_count,
+            self.drones.x,
+            self.drones.y,
+            self.drones.a,
+            targets[:, 0],
+            targets[:, 1],
+            self.drones.thruster_left,
+            self.drones.thruster_right,
+            0.0 if self.wind is None else self.wind.ax,
+            0.0 if self.wind is None else self.wind.ay,
+            counters,
+            [not player.dead for player in self.players],
+            self.crashes,
+        )
+
+    def close(self) -> None:
+        """
+        Ends the recording, if any.
+        """
+        if self.recorder is not None:
+            self.recorder.close()
+
+    def run(self, max_frames: Optional[int] = None) -> None:
+        """
+        Steps the match until the time limit (or max_frames frames).
+        """
+        while not (self.done or self.step_count == max_frames):
+            self.step()
+
+    def results(self) -> List[dict]:
+        """
+        Returns:
+            list: For every player, dict with name, balloons and crashes
+        """
+        return [
+            {"name": player.name, "balloons": player.target_counter, "crashes": crashes}
+            for player, crashes in zip(self.players, self.crashes)
+        ]
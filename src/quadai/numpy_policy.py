@@ -0,0 +1,273 @@
+"""
+2D Quadcopter AI by Alexandre Sajus
+
+More information at:
+https://github.com/AlexandreSajus/Quadcopter-AI
+
+NumPy-only runtime for the trained policies.
+
+The game only needs the actor network of each model: a small MLP. The
+exporter converts the SB3 .zip files of models/ into a compact .npz holding
+the actor weights and the activation, and NumpyPolicy replays it with plain
+matrix products, so the players run without importing torch or SB3.
+
+The exporter reads policy.pth directly (a zip of raw tensor storages plus a
+pickle describing them), so it does not need torch either.
+
+Export every model of models/ with:
+    python -m quadai.numpy_policy
+"""
+
+import io
+import json
+import os
+import pickle
+import sys
+import zipfile
+from collections import OrderedDict
+from typing import Optional
+
+import numpy as np
+
+# dtype of the legacy torch storage classes found in policy.pth
+_STORAGE_DTYPES = {
+    "FloatStorage": np.float32,
+    "DoubleStorage": np.float64,
+    "HalfStorage": np.float16,
+    "LongStorage": np.int64,
+    "IntStorage": np.int32,
+    "BoolStorage": np.bool_,
+}
+
+# Default activations of the SB3 policies (net_arch not customized)
+_DEFAULT_ACTIVATION = {"actor_critic": "tanh", "sac": "relu"}
+
+# SAC clamps log_std to this range
+LOG_STD_MIN = -20
+LOG_STD_MAX = 2
+
+
+def _rebuild_tensor(storage, storage_offset, size, stride, *args):
+    if len(size) == 0:
+        return storage[storage_offset].copy()
+    itemsize = storage.itemsize
+    return np.lib.stride_tricks.as_strided(
+        storage[storage_offset:],
+        shape=tuple(size),
+        strides=tuple(s * itemsize for s in stride),
+    ).copy()
+
+
+def _rebuild_parameter(data, *args):
+    return data
+
+
+class _StateDictUnpickler(pickle.Unpickler):
+    """
+    Unpickler for torch's zip checkpoints that builds NumPy arrays instead
+    of tensors.
+    """
+
+    def __init__(self, file, archive: zipfile.ZipFile, prefix: str):
+        super().__init__(file)
+        self.archive = archive
+        self.prefix = prefix
+
+    def find_class(self, module, name):
+        if module == "torch._utils" and name == "_rebuild_tensor_v2":
+            return _rebuild_tensor
+        if module == "torch._utils" and name == "_rebuild_parameter":
+            return _rebuild_parameter
+        if module == "collections" and name == "OrderedDict":
+            return OrderedDict
+        if module == "torch" and name in _STORAGE_DTYPES:
+            return name
+        raise pickle.UnpicklingError(f"Unsupported global in checkpoint: {module}.{name}")
+
+    def persistent_load(self, pid):
+        # ("storage", storage_type, key, location, numel)
+        _, storage_type, key, _, _ = pid
+        raw = self.archive.read(f"{self.prefix}/data/{key}")
+        return np.frombuffer(raw, dtype=_STORAGE_DTYPES[storage_type])
+
+
+def read_state_dict(pth_bytes: bytes) -> "OrderedDict[str, np.ndarray]":
+    """
+    Reads a torch state_dict saved with torch.save (zip format) as NumPy arrays.
+
+    Args:
+        pth_bytes (bytes): Content of the .pth file
+
+    Returns:
+        OrderedDict: parameter name -> np.ndarray
+    """
+    archive = zipfile.ZipFile(io.BytesIO(pth_bytes))
+    data_pkl = next(name for name in archive.namelist() if name.endswith("/data.pkl"))
+    prefix = data_pkl[: -len("/data.pkl")]
+    with archive.open(data_pkl) as f:
+        return _StateDictUnpickler(f, archive, prefix).load()
+
+
+def _parse_box_bound(text: str) -> np.ndarray:
+    return np.array(text.strip("[]").split(), dtype=np.float32)
+
+
+def _mlp_layers(state_dict, prefix: str):
+    """
+    Weights of an nn.Sequential of Linear layers (activations at odd indices).
+    """
+    layers = []
+    index = 0
+    while f"{prefix}.{index}.weight" in state_dict:
+        layers.append(
+            (state_dict[f"{prefix}.{index}.weight"], state_dict[f"{prefix}.{index}.bias"])
+        )
+        index += 2
+    return layers
+
+
+def export_model(zip_path: str, npz_path: Optional[str] = None) -> str:
+    """
+    Converts an SB3 PPO/A2C/SAC .zip into a NumpyPolicy .npz.
+
+    Args:
+        zip_path (str): Path of the SB3 model
+        npz_path (str): Output path (same name with .npz by default)
+
+    Returns:
+        str: The path of the written .npz
+    """
+    if npz_path is None:
+        npz_path = os.path.splitext(zip_path)[0] + ".npz"
+
+    with zipfile.ZipFile(zip_path) as archive:
+        data = json.loads(archive.read("data"))
+        state_dict = read_state_dict(archive.read("policy.pth"))
+
+    activation_fn = str(data["policy_kwargs"].get("activation_fn", "")).lower()
+
+    if "action_net.weight" in state_dict:
+        # PPO / A2C: Gaussian policy, action = mean clipped to the bounds
+        kind = "actor_critic"
+        layers = _mlp_layers(state_dict, "mlp_extractor.policy_net")
+        extra = {
+            "mu_w": state_dict["action_net.weight"],
+            "mu_b": state_dict["action_net.bias"],
+            "log_std": state_dict["log_std"],
+        }
+    elif "actor.mu.weight" in state_dict:
+        # SAC: squashed Gaussian, action = tanh(mean) rescaled to the bounds
+        kind = "sac"
+        layers = _mlp_layers(state_dict, "actor.latent_pi")
+        extra = {
+            "mu_w": state_dict["actor.mu.weight"],
+            "mu_b": state_dict["actor.mu.bias"],
+            "log_std_w": state_dict["actor.log_std.weight"],
+            "log_std_b": state_dict["actor.log_std.bias"],
+        }
+    else:
+        raise ValueError(f"Unsupported policy in {zip_path} (only PPO, A2C and SAC)")
+
+    low = _parse_box_bound(data["action_space"]["low"])
+    high = _parse_box_bound(data["action_space"]["high"])
+
+    if "relu" in activation_fn:
+        activation = "relu"
+    elif "tanh" in activation_fn:
+        activation = "tanh"
+    else:
+        activation = _DEFAULT_ACTIVATION[kind]
+
+    arrays = {f"w{i}": w for i, (w, _) in enumerate(layers)}
+    arrays.update({f"b{i}": b for i, (_, b) in enumerate(layers)})
+    arrays.update(extra)
+    np.savez_compressed(
+        npz_path,
+        kind=kind,
+        activation=activation,
+        n_layers=len(layers),
+        low=low,
+        high=high,
+        **{k: v.astype(np.float32) for k, v in arrays.items()},
+    )
+    return npz_path
+
+
+class NumpyPolicy:
+    """
+    Actor network of an exported model, evaluated with NumPy.
+
+    predict() has the same signature as SB3's, so it can replace the model
+    in the players, in the inference broker and in the evaluator.
+    """
+
+    def __init__(self, params: dict, seed=None):
+        self.kind = str(params["kind"])
+        self.activation = np.tanh if str(params["activation"]) == "tanh" else _relu
+        n_layers = int(params["n_layers"])
+        self.layers = [(params[f"w{i}"].T.copy(), params[f"b{i}"]) for i in range(n_layers)]
+        self.mu_w = params["mu_w"].T.copy()
+        self.mu_b = params["mu_b"]
+        if self.kind == "sac":
+            self.log_std_w = params["log_std_w"].T.copy()
+            self.log_std_b = params["log_std_b"]
+        else:
+            self.log_std = params["log_std"]
+        self.low = params["low"]
+        self.high = params["high"]
+        self.rng = np.random.default_rng(seed)
+
+    @classmethod
+    def load(cls, path: str, seed=None) -> "NumpyPolicy":
+        """
+        Loads a .npz written by export_model.
+        """
+        with np.load(path) as params:
+            return cls(dict(params), seed=seed)
+
+    def predict(self, observation, state=None, episode_start=None, deterministic=False):
+        """
+        Computes the action for one observation or a batch of observations.
+
+        Returns:
+            tuple: (action, None) like SB3's predict
+        """
+        obs = np.asarray(observation, dtype=np.float32)
+        single = obs.ndim == 1
+        latent = obs.reshape(1, -1) if single else obs
+        for w, b in self.layers:
+            latent = self.activation(latent @ w + b)
+        mean = latent @ self.mu_w + self.mu_b
+
+        if self.kind == "sac":
+            if deterministic:
+                action = np.tanh(mean)
+            else:
+                log_std = np.clip(latent @ self.log_std_w + self.log_std_b, LOG_STD_MIN, LOG_STD_MAX)
+                action = np.tanh(mean + np.exp(log_std) * self.rng.standard_normal(mean.shape))
+            # Rescale from [-1, 1] to the action space
+            action = self.low + 0.5 * (action + 1.0) * (self.high - self.low)
+        else:
+            action = mean
+            if not deterministic:
+                action = mean + np.exp(self.log_std) * self.rng.standard_normal(mean.shape)
+            action = np.clip(action, self.low, self.high)
+
+        action = action.astype(np.float32)
+        return (action[0] if single else action), None
+
+
+def _relu(x):
+    return np.maximum(x, 0.0)
+
+
+if __name__ == "__main__":
+    models_dir = os.path.join(os.path.dirname(__file__), "models")
+    paths = sys.argv[1:] or sorted(
+        os.path.join(models_dir, name) for name in os.listdir(models_dir) if name.endswith(".zip")
+    )
+    for path in paths:
+        try:
+            print(f"{os.path.basename(path)} -> {os.path.basename(export_model(path))}")
+        except ValueError as e:
+            print(f"{os.path.basename(path)}: skipped ({e})")
@@ -0,0 +1,101 @@
+"""
+2D Quadcopter AI by Alexandre Sajus
+
+More information at:
+https://github.com/AlexandreSajus/Quadcopter-AI
+
+Observation of the RL agents, shared by the envs, the native VecEnv and the
+games so that training and inference always see the same features.
+
+The 7 features are:
+- angle_to_up : angle between the drone and the up vector (to observe gravity)
+- velocity : velocity of the drone
+- angle_velocity : angular velocity of the drone
+- distance_to_target : distance to the target / 500
+- angle_to_target : angle between the drone and the target
+- angle_target_and_velocity : angle between the to_target vector and the velocity vector
+- distance_to_target : distance to the target / 500 (repeated)
+
+The distance and the angle to the target are computed once and reused.
+"""
+
+from math import atan2, pi, sqrt
+from typing import Optional
+
+import numpy as np
+
+OBS_SIZE = 7
+
+
+def build_obs(x, y, xd, yd, a, ad, xt, yt, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Observation of a single drone.
+
+    Args:
+        x, y (float): Position of the drone
+        xd, yd (float): Velocity of the drone
+        a, ad (float): Angle (degrees) and angular velocity of the drone
+        xt, yt (float): Position of the target
+        out (np.ndarray): Optional (7,) float32 buffer to write into, so that
+            no array is allocated
+
+    Returns:
+        np.ndarray: (7,) float32 array (out if given)
+    """
+    to_target_x = xt - x
+    to_target_y = yt - y
+    angle_to_target = atan2(to_target_y, to_target_x)
+    distance_to_target = sqrt(to_target_x**2 + to_target_y**2) / 500
+    if out is not None:
+        out[0] = a / 180 * pi
+        out[1] = sqrt(xd**2 + yd**2)
+        out[2] = ad
+        out[3] = distance_to_target
+        out[4] = angle_to_target
+        out[5] = angle_to_target - atan2(yd, xd)
+        out[6] = distance_to_target
+        return out
+    return np.array(
+        [
+            a / 180 * pi,
+            sqrt(xd**2 + yd**2),
+            ad,
+            distance_to_target,
+            angle_to_target,
+            angle_to_target - atan2(yd, xd),
+            distance_to_target,
+        ],
+        dtype=np.float32,
+    )
+
+
+def build_obs_batch(
+    x, y, xd, yd, a, ad, xt, yt, out: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """
+    Observations of N drones, one row per drone.
+
+    Args:
+        x, y, xd, yd, a, ad (np.ndarray): (N,) state of the drones, as in build_obs
+        xt, yt (np.ndarray): (N,) positions of the targets
+        out (np.ndarray): Optional (N, 7) float32 buffer to write into
+
+    Returns:
+        np.ndarray: (N, 7) float32 array (out if given)
+    """
+    if out is None:
+        out = np.empty((len(x), OBS_SIZE), dtype=np.float32)
+    to_target_x = xt - x
+    to_target_y = yt - y
+    angle_to_target = np.arctan2(to_target_y, to_target_x)
+    distance_to_target = np.sqrt(to_target_x**2 + to_target_y**2) / 500
+
+    out[:, 0] = a / 180 * pi
+    out[:, 1] = np.sqrt(xd**2 + yd**2)
+    out[:, 2] = ad
+    out[:, 3] = distance_to_target
+    out[:, 4] = angle_to_target
+    out[:, 5] = angle_to_target - np.arctan2(yd, xd)
+    out[:, 6] = distance_to_target
+    return out
+
@@ -0,0 +1,213 @@
+"""
+2D Quadcopter AI by Alexandre Sajus
+
+More information at:
+https://github.com/AlexandreSajus/Quadcopter-AI
+
+Rigid-body physics shared by every droneEnv variant and by the games.
+
+The update works on structure-of-arrays buffers, so N drones are stepped with
+one vectorized call per frame. The same functions also accept objects holding
+plain float attributes (a single droneEnv), in which case the scalar math
+module is used to avoid NumPy call overhead on size-one problems.
+"""
+
+from math import sin, cos, pi, sqrt
+from typing import Optional
+
+import numpy as np
+
+# Physics constants (same values as Human/drone_game.py)
+FPS = 60
+GRAVITY = 0.08
+# Propeller force for UP and DOWN
+THRUSTER_AMPLITUDE = 0.04
+# Propeller force for LEFT and RIGHT rotations
+DIFF_AMPLITUDE = 0.003
+# By default, thruster will apply a force of THRUSTER_MEAN
+THRUSTER_MEAN = 0.04
+MASS = 1
+# Length from center of mass to propeller
+ARM = 25
+# Spawn position of the drone
+SPAWN_X = 400.0
+SPAWN_Y = 400.0
+# The agent acts every FRAMES_PER_ACTION frames (default frame_skip of the envs)
+FRAMES_PER_ACTION = 5
+
+
+class DroneState:
+    """
+    Structure-of-arrays state for N drones.
+
+    Every attribute is a float64 array of shape (n,):
+    - x, xd : horizontal position and speed
+    - y, yd : vertical position and speed (pygame y-axis points down)
+    - a, ad : angle (degrees) and angular speed
+    - thruster_left, thruster_right : thrust applied during the next frame
+    - wind_ax, wind_ay : wind acceleration applied during the next frame
+    """
+
+    def __init__(self, n: int):
+        self.n = n
+        self.x = np.full(n, SPAWN_X)
+        self.xd = np.zeros(n)
+        self.y = np.full(n, SPAWN_Y)
+        self.yd = np.zeros(n)
+        self.a = np.zeros(n)
+        self.ad = np.zeros(n)
+        self.thruster_left = np.full(n, THRUSTER_MEAN)
+        self.thruster_right = np.full(n, THRUSTER_MEAN)
+        self.wind_ax = np.zeros(n)
+        self.wind_ay = np.zeros(n)
+
+    def reset(self, index=None):
+        """
+        Puts the selected drones back at the spawn point with zero speed.
+
+        Args:
+            index: Index, slice or boolean mask of the drones to reset (all if None)
+        """
+        if index is None:
+            index = slice(None)
+        self.x[index] = SPAWN_X
+        self.xd[index] = 0.0
+        self.y[index] = SPAWN_Y
+        self.yd[index] = 0.0
+        self.a[index] = 0.0
+        self.ad[index] = 0.0
+
+
+def mix_thrusters(
+    action0,
+    action1,
+    thruster_mean: float = THRUSTER_MEAN,
+    thruster_amplitude: float = THRUSTER_AMPLITUDE,
+    diff_amplitude: float = DIFF_AMPLITUDE,
+):
+    """
+    Converts the (thrust amplitude, thrust difference) action into the
+    left and right propeller forces.
+
+    Args:
+        action0: Thrust amplitude in [-1, 1] (float or array)
+        action1: Thrust difference in [-1, 1] (float or array)
+
+    Returns:
+        tuple: (thruster_left, thruster_right)
+    """
+    thruster_left = thruster_mean + action0 * thruster_amplitude
+    thruster_right = thruster_mean + action0 * thruster_amplitude
+    thruster_left = thruster_left + action1 * diff_amplitude
+    thruster_right = thruster_right - action1 * diff_amplitude
+    return thruster_left, thruster_right
+
+
+def step_frame(
+    drones,
+    thruster_left,
+    thruster_right,
+    wind_ax=None,
+    wind_ay=None,
+    active: Optional[np.ndarray] = None,
+    gravity: float = GRAVITY,
+    mass: float = MASS,
+    arm: float = ARM,
+    substeps: int = 1,
+) -> None:
+    """
+    Advances the drones by one frame with Newton's laws of motion.
+
+    `drones` is either a DroneState or any object with float attributes
+    x, xd, y, yd, a, ad (e.g. a droneEnv). The state is updated in place.
+
+    Args:
+        drones: The drones to update
+        thruster_left: Left propeller force (float or array)
+        thruster_right: Right propeller force (float or array)
+        wind_ax: Wind acceleration along x, None for no wind
+        wind_ay: Wind acceleration along y, None for no wind
+        active: Boolean mask of the drones to update (all if None)
+        substeps (int): Integration steps per frame. Speeds stay in pixels
+            per frame, so the trajectory converges as substeps grows and
+            substeps=1 is the original update
+    """
+    if substeps == 1:
+        _integrate(drones, thruster_left, thruster_right, wind_ax, wind_ay, active, gravity, mass, arm)
+        return
+    h = 1 / substeps
+    for _ in range(substeps):
+        _integrate(
+            drones, thruster_left, thruster_right, wind_ax, wind_ay, active, gravity, mass, arm, h
+        )
+
+
+def _integrate(
+    drones, thruster_left, thruster_right, wind_ax, wind_ay, active, gravity, mass, arm, h=None
+) -> None:
+    """
+    Semi-implicit Euler step of h frames (a whole frame if h is None).
+    """
+    angle = drones.a * pi / 180
+    if isinstance(angle, float):
+        (sin_a, cos_a) = (sin(angle), cos(angle))
+    else:
+        (sin_a, cos_a) = (np.sin(angle), np.cos(angle))
+
+    # Calculating accelerations with Newton's laws of motions
+    thrust = thruster_left + thruster_right
+    xdd = -thrust * sin_a / mass
+    ydd = gravity + -thrust * cos_a / mass
+    add = arm * (thruster_right - thruster_left) / mass
+
+    # Wind acts as an extra acceleration
+    if wind_ax is not None:
+        xdd = xdd + wind_ax
+        ydd = ydd + wind_ay
+
+    if h is not None:
+        (xdd, ydd, add) = (xdd * h, ydd * h, add * h)
+
+    if active is None:
+        drones.xd += xdd
+        drones.yd += ydd
+        drones.ad += add
+        if h is None:
+            drones.x += drones.xd
+            drones.y += drones.yd
+            drones.a += drones.ad
+        else:
+            drones.x += drones.xd * h
+            drones.y += drones.yd * h
+            drones.a += drones.ad * h
+    else:
+        np.add(drones.xd, xdd, out=drones.xd, where=active)
+        np.add(drones.yd, ydd, out=drones.yd, where=active)
+        np.add(drones.ad, add, out=drones.ad, where=active)
+        if h is None:
+            np.add(drones.x, drones.xd, out=drones.x, where=active)
+            np.add(drones.y, drones.yd, out=drones.y, where=active)
+            np.add(drones.a, drones.ad, out=drones.a, where=active)
+        else:
+            np.add(drones.x, drones.xd * h, out=drones.x, where=active)
+            np.add(drones.y, drones.yd * h, out=drones.y, where=active)
+            np.add(drones.a, drones.ad * h, out=drones.a, where=active)
+
+
+def target_distance(drones, xt, yt):
+    """
+    Distance between the drones and their targets.
+
+    Args:
+        drones: DroneState or object with float x, y attributes
+        xt: Target x (float or array)
+        yt: Target y (float or array)
+
+    Returns:
+        float or np.ndarray: The euclidean distance
+    """
+    dx = drones.x - xt
+    dy = drones.y - yt
+    if isinstance(dx, (int, float)):
+        return sqrt(dx**2 + dy**2)
+    return np.sqrt(dx**2 + dy**2)
@@ -8,15 +8,64 @@ This is where the players for the main game are defined
 """
 
 import os
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, List, NamedTuple, Optional
 
+import numpy as np
 import pygame
 from pygame.locals import *
 
-from stable_baselines3 import SAC
-from stable_baselines3 import A2C
-from stable_baselines3 import PPO  
-
 from quadai.PID.controller_PID import PID
+from quadai.numpy_policy import NumpyPolicy
+from quadai.physics import mix_thrusters
+
+# Models being loaded or already loaded (as futures), shared by players
+# using the same file
+_MODEL_CACHE = {}
+
+# Background loader, created on the first preload
+_LOADER: Optional[ThreadPoolExecutor] = None
+
+
+def model_path(filename):
+    """
+    Path of a file of the models folder.
+    """
+    return os.path.join(os.path.dirname(__file__), "models", filename)
+
+
+def _load(algo_name, path):
+    # The NumPy export next to the .zip (see quadai.numpy_policy) is used
+    # when present, so torch and SB3 are only imported as a fallback
+    npz_path = os.path.splitext(path)[0] + ".npz"
+    if os.path.exists(npz_path):
+        return NumpyPolicy.load(npz_path)
+
+    import stable_baselines3
+
+    return getattr(stable_baselines3, algo_name).load(path)
+
+
+def preload_model(algo_name, path) -> Future:
+    """
+    Starts loading a model in a background thread (once per file).
+    """
+    global _LOADER
+    key = (algo_name, os.path.abspath(path))
+    if key not in _MODEL_CACHE:
+        if _LOADER is None:
+            _LOADER = ThreadPoolExecutor(max_workers=os.cpu_count() or 1)
+        _MODEL_CACHE[key] = _LOADER.submit(_load, algo_name, path)
+    return _MODEL_CACHE[key]
+
+
+def load_model(algo_name, path):
+    """
+    Loads a model once per file, so several players with the same
+    model share it (and the inference broker batches them together).
+    Waits for the background load if preload_model already started it.
+    """
+    return preload_model(algo_name, path).result()
 
 
 class Player:
@@ -31,6 +80,22 @@ class Player:
         self.dead = False
         self.respawn_timer = 3
 
+    # Policy used by AI players, None for Human and PID
+    model = None
+
+    def thrusts_from_action(self, action):
+        """
+        Converts a policy action (thrust amplitude, thrust difference)
+        into the left and right propeller forces.
+        """
+        return mix_thrusters(
+            action[0],
+            action[1],
+            self.thruster_mean,
+            self.thruster_amplitude,
+            self.diff_amplitude,
+        )
+
 
 class HumanPlayer(Player):
     def __init__(self):
@@ -118,32 +183,28 @@ class HumanPlayer(Player):
 
 
 class SACPlayer(Player):
+    algo = "SAC"
+    model_file = "sac_model_v2_5000000_steps.zip"
+
     def __init__(self):
         self.name = "SAC"
         self.alpha = 50
         self.thruster_amplitude = 0.04
         self.diff_amplitude = 0.003
-        model_path = "models/sac_model_v2_5000000_steps.zip"
-        model_path = os.path.join(os.path.dirname(__file__), model_path)
-        self.path = model_path
+        self.path = model_path(self.model_file)
         super().__init__()
 
-        self.action_value = SAC.load(self.path)
+        self.model = load_model(self.algo, self.path)
+        self.action_value = self.model
 
     def act(self, obs):
-        action, _ = self.action_value.predict(obs)
-        (action0, action1) = (action[0], action[1])
-
-        thruster_left = self.thruster_mean
-        thruster_right = self.thruster_mean
-
-        thruster_left += action0 * self.thruster_amplitude
-        thruster_right += action0 * self.thruster_amplitude
-        thruster_left += action1 * self.diff_amplitude
-        thruster_right -= action1 * self.diff_amplitude
-        return thruster_left, thruster_right
+        action, _ = self.model.predict(obs)
+        return self.thrusts_from_action(action)
 
 class A2CPlayer(Player):
+    algo = "A2C"
+    model_file = "a2c_model_v2_5000000_steps.zip"
+
     def __init__(self):
         self.name = "A2C"  # Il nome che apparirà sopra il drone
         self.alpha = 50
@@ -152,30 +213,21 @@ class A2CPlayer(Player):
         self.diff_amplitude = 0.003
         self.thruster_mean = 0.04 
 
-        filename = "models/a2c_model_v2_5000000_steps.zip" 
-        model_path = os.path.join(os.path.dirname(__file__), filename)
-        self.path = model_path
+        self.path = model_path(self.model_file)
         
         super().__init__()
 
-        self.model = A2C.load(self.path)
+        self.model = load_model(self.algo, self.path)
 
 
     def act(self, obs):           
         action, _ = self.model.predict(obs)
-        (action0, action1) = (action[0], action[1])
-
-        thruster_left = self.thruster_mean
-        thruster_right = self.thruster_mean
-
-        thruster_left += action0 * self.thruster_amplitude
-        thruster_right += action0 * self.thruster_amplitude
-        thruster_left += action1 * self.diff_amplitude
-        thruster_right -= action1 * self.diff_amplitude
-
-        return thruster_left, thruster_right
+        return self.thrusts_from_action(action)
     
 class PPOPlayer(Player):
+    algo = "PPO"
+    model_file = "ppo_model_v1_4000000_steps.zip"
+
     def __init__(self):
         self.name = "PPO"  # Il nome che apparirà sopra il drone
         self.alpha = 50
@@ -184,30 +236,21 @@ class PPOPlayer(Player):
         self.diff_amplitude = 0.003
         self.thruster_mean = 0.04 
 
-        filename = "models/ppo_model_v1_4000000_steps.zip" 
-        model_path = os.path.join(os.path.dirname(__file__), filename)
-        self.path = model_path
+        self.path = model_path(self.model_file)
         
         super().__init__()
 
-        self.model = PPO.load(self.path)
+        self.model = load_model(self.algo, self.path)
 
 
     def act(self, obs):           
         action, _ = self.model.predict(obs)
-        (action0, action1) = (action[0], action[1])
-
-        thruster_left = self.thruster_mean
-        thruster_right = self.thruster_mean
-
-        thruster_left += action0 * self.thruster_amplitude
-        thruster_right += action0 * self.thruster_amplitude
-        thruster_left += action1 * self.diff_amplitude
-        thruster_right -= action1 * self.diff_amplitude
-
-        return thruster_left, thruster_right
+        return self.thrusts_from_action(action)
     
 class PPO_noisy_Player(Player):
+    algo = "PPO"
+    model_file = "ppo_model_v2_noise_4000000_steps.zip"
+
     def __init__(self):
         self.name = "PPO_noisy"  # Il nome che apparirà sopra il drone
         self.alpha = 50
@@ -216,33 +259,24 @@ class PPO_noisy_Player(Player):
         self.diff_amplitude = 0.003
         self.thruster_mean = 0.04 
 
-        filename = "models/ppo_model_v2_noise_4000000_steps.zip" 
-        model_path = os.path.join(os.path.dirname(__file__), filename)
-        self.path = model_path
+        self.path = model_path(self.model_file)
         
         super().__init__()
 
-        self.model = PPO.load(self.path)
+        self.model = load_model(self.algo, self.path)
 
 
     def act(self, obs):           
         action, _ = self.model.predict(obs)
-        (action0, action1) = (action[0], action[1])
-
-        thruster_left = self.thruster_mean
-        thruster_right = self.thruster_mean
-
-        thruster_left += action0 * self.thruster_amplitude
-        thruster_right += action0 * self.thruster_amplitude
-        thruster_left += action1 * self.diff_amplitude
-        thruster_right -= action1 * self.diff_amplitude
-
-        return thruster_left, thruster_right
+        return self.thrusts_from_action(action)
     
 
     
 
 class PPO_curriculum_Player(Player):
+    algo = "PPO"
+    model_file = "ppo_model_v2_curriculum_4000000_steps.zip"
+
     def __init__(self):
         self.name = "PPO_curriculum"  # Il nome che apparirà sopra il drone
         self.alpha = 50
@@ -251,25 +285,94 @@ class PPO_curriculum_Player(Player):
         self.diff_amplitude = 0.003
         self.thruster_mean = 0.04 
 
-        filename = "models/ppo_model_v2_curriculum_4000000_steps.zip" 
-        model_path = os.path.join(os.path.dirname(__file__), filename)
-        self.path = model_path
+        self.path = model_path(self.model_file)
         
         super().__init__()
 
-        self.model = PPO.load(self.path)
+        self.model = load_model(self.algo, self.path)
 
 
     def act(self, obs):           
         action, _ = self.model.predict(obs)
-        (action0, action1) = (action[0], action[1])
-
-        thruster_left = self.thruster_mean
-        thruster_right = self.thruster_mean
-
-        thruster_left += action0 * self.thruster_amplitude
-        thruster_right += action0 * self.thruster_amplitude
-        thruster_left += action1 * self.diff_amplitude
-        thruster_right -= action1 * self.diff_amplitude
-
-        return thruster_left, thruster_right
\ No newline at end of file
+        return self.thrusts_from_action(action)
+
+
+class PlayerSpec(NamedTuple):
+    """
+    Registry entry of a player.
+
+    obs is the observation the game builds for the player: "human" (none),
+    "pid" (errors to the target), "policy" (the 7 floats of the RL envs) or
+    "policy_noisy" (same, with sensor noise in the noisy game).
+    """
+
+    factory: Callable[[], Player]
+    algo: Optional[str]
+    model_path: Optional[str]
+    obs: str
+
+
+def _spec(factory, obs):
+    algo = getattr(factory, "algo", None)
+    path = model_path(factory.model_file) if algo else None
+    return PlayerSpec(factory, algo, path, obs)
+
+
+# Players that can join a game, by name
+PLAYER_REGISTRY = {
+    "Human": _spec(HumanPlayer, "human"),
+    "PID": _spec(PIDPlayer, "pid"),
+    "SAC": _spec(SACPlayer, "policy"),
+    "A2C": _spec(A2CPlayer, "policy_noisy"),
+    "PPO": _spec(PPOPlayer, "policy"),
+    "PPO_noisy": _spec(PPO_noisy_Player, "policy_noisy"),
+    "PPO_curriculum": _spec(PPO_curriculum_Player, "policy_noisy"),
+}
+
+
+def preload_players(names: List[str]) -> None:
+    """
+    Starts loading in background the models of the selected players, so
+    they load while the game window and the sprites come up.
+
+    Args:
+        names (list): Names of the players (keys of PLAYER_REGISTRY)
+    """
+    for name in names:
+        if name not in PLAYER_REGISTRY:
+            raise ValueError(
+                f"Unknown player: {name} (expected one of: {', '.join(PLAYER_REGISTRY)})"
+            )
+        spec = PLAYER_REGISTRY[name]
+        if spec.model_path is not None:
+            preload_model(spec.algo, spec.model_path)
+
+
+def seed_models(seed: int) -> None:
+    """
+    Reseeds the action sampling of every loaded model, so a match played
+    with the same seeds gives the same result in any process.
+
+    Args:
+        seed (int): Seed of the models
+    """
+    for future in _MODEL_CACHE.values():
+        model = future.result()
+        if isinstance(model, NumpyPolicy):
+            model.rng = np.random.default_rng(seed)
+        else:
+            model.set_random_seed(seed)
+
+
+def create_players(names: List[str]) -> List[Player]:
+    """
+    Creates the selected players, waiting for their models if needed.
+
+    Args:
+        names (list): Names of the players (keys of PLAYER_REGISTRY)
+
+    Returns:
+        list: The players, in the same order
+    """
+    preload_players(names)
+    return [PLAYER_REGISTRY[name].factory() for name in names]
@@ -0,0 +1,112 @@
+"""
+2D Quadcopter AI by Alexandre Sajus
+
+More information at:
+https://github.com/AlexandreSajus/Quadcopter-AI
+
+Random numbers drawn in blocks.
+
+A call to np.random.normal costs microseconds of overhead, whatever the
+number of values it draws. The noisy envs need a handful of normal values
+per step (sensor noise) and every few frames (wind random walk), so
+NormalStream draws them from a Generator in large blocks and hands them
+out one row at a time.
+
+BatchStream does the same for DroneVecEnv, which has one Generator per env:
+each env draws its values in blocks from its own Generator, and the values of
+a whole batch are gathered with one indexing operation.
+"""
+
+import numpy as np
+
+# Rows drawn per call to the Generator
+BLOCK_SIZE = 4096
+# Values drawn per env by BatchStream: a block of (BATCH_BLOCK_SIZE, num_envs)
+# float64 values is 2 MB for 256 envs
+BATCH_BLOCK_SIZE = 1024
+
+
+class NormalStream:
+    """
+    Zero-mean normal values pre-generated in blocks of (block_size, width).
+
+    Every row follows N(0, scale**2), like rng.normal(0.0, scale) would give:
+    the block is scaled once when it is drawn, so a row can be added to an
+    observation as is. The scale is read at every refill.
+    """
+
+    def __init__(
+        self,
+        rng: np.random.Generator,
+        width: int,
+        scale=1.0,
+        block_size: int = BLOCK_SIZE,
+        dtype=np.float64,
+    ):
+        self.rng = rng
+        self.scale = scale
+        self.block = np.empty((block_size, width), dtype=dtype)
+        # Rows already consumed (the block is filled on the first call)
+        self.index = block_size
+
+    def next(self) -> np.ndarray:
+        """
+        Returns the next row of normal values.
+
+        The row is a view of the block: use it before the next refill (after
+        block_size calls) or copy it.
+        """
+        if self.index == len(self.block):
+            self.rng.standard_normal(dtype=self.block.dtype, out=self.block)
+            self.block *= np.asarray(self.scale, dtype=self.block.dtype)
+            self.index = 0
+        row = self.block[self.index]
+        self.index += 1
+        return row
+
+
+class BatchStream:
+    """
+    Random values of a batch of envs, one Generator per env, pre-generated
+    in blocks of (block_size, num_envs).
+
+    Column i is filled only by rngs[i] and each env has its own read
+    position, so the values an env receives depend only on its Generator,
+    not on the other envs of the batch or on when they are reset.
+    """
+
+    def __init__(self, rngs, draw, block_size: int = BATCH_BLOCK_SIZE):
+        """
+        Args:
+            rngs (list): One np.random.Generator per env
+            draw (callable): draw(rng, size) -> array of size values,
+                e.g. lambda rng, size: rng.integers(200, 600, size)
+            block_size (int): Values drawn per env at every refill
+        """
+        self.rngs = rngs
+        self.draw = draw
+        self.block = np.empty((block_size, len(rngs)))
+        # Values already consumed by each env (filled on the first call)
+        self.position = np.full(len(rngs), block_size)
+        self._envs = np.arange(len(rngs))
+
+    def take(self, n_values: int, index=slice(None)) -> np.ndarray:
+        """
+        Returns the next n_values values of the selected envs.
+
+        Args:
+            n_values (int): Values per env (at most block_size)
+            index: Slice or boolean mask of the envs (all by default)
+
+        Returns:
+            np.ndarray: (n_values, n_selected) float64 array
+        """
+        envs = self._envs[index]
+        block_size = len(self.block)
+        for i in envs[self.position[envs] + n_values > block_size]:
+            # The values left in the block are skipped
+            self.block[:, i] = self.draw(self.rngs[i], block_size)
+            self.position[i] = 0
+        rows = self.position[envs] + np.arange(n_values)[:, None]
+        self.position[envs] += n_values
+        return self.block[rows, envs]
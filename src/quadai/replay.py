@@ -0,0 +1,247 @@
+"""
+2D Quadcopter AI by Alexandre Sajus
+
+More information at:
+https://github.com/AlexandreSajus/Quadcopter-AI
+
+Replay viewer for the trajectory files of quadai.trajectory.
+
+The drones, targets, scores and wind are drawn from the recorded states:
+no physics, no models. Controls: SPACE pause, LEFT/RIGHT seek 5 seconds,
+UP/DOWN double/halve the speed, HOME back to the start.
+
+Usage:
+    python -m quadai.replay match.traj [--start-frame N] [--speed 2]
+"""
+
+import argparse
+import os
+from math import cos, pi, sin, sqrt
+
+import pygame
+from pygame.locals import *
+
+from quadai.trajectory import Trajectory
+
+# Score panels are drawn only when they fit the window
+MAX_SCORE_PANELS = 7
+# Seconds skipped by LEFT/RIGHT
+SEEK_SECONDS = 5
+
+
+def correct_path(current_path):
+    """
+    This function is used to get the correct path to the assets folder
+    """
+    return os.path.join(os.path.dirname(__file__), current_path)
+
+
+def draw_wind_arrow(screen, font, wind_ax, wind_ay):
+    """
+    Wind arrow and intensity, as in balloon_noisy.
+    """
+    (cx, cy) = (100, 650)
+    scale = 2000
+    end_x = cx + int(wind_ax * scale)
+    end_y = cy + int(wind_ay * scale)
+    pygame.draw.line(screen, (255, 255, 255), (cx, cy), (end_x, end_y), 3)
+
+    dx = end_x - cx
+    dy = end_y - cy
+    length = sqrt(dx * dx + dy * dy)
+    if length > 0:
+        (udx, udy) = (dx / length, dy / length)
+        head_len = 15
+        (sin_a, cos_a) = (sin(pi / 6), cos(pi / 6))
+        hx1 = end_x - head_len * (udx * cos_a - udy * sin_a)
+        hy1 = end_y - head_len * (udx * sin_a + udy * cos_a)
+        hx2 = end_x - head_len * (udx * cos_a + udy * sin_a)
+        hy2 = end_y - head_len * (-udx * sin_a + udy * cos_a)
+        pygame.draw.line(screen, (255, 255, 255), (end_x, end_y), (hx1, hy1), 3)
+        pygame.draw.line(screen, (255, 255, 255), (end_x, end_y), (hx2, hy2), 3)
+
+    wind_speed_kmh = sqrt(wind_ax * wind_ax + wind_ay * wind_ay) * 3.6 * 10
+    intensity_text = font.render(f"Wind: {wind_speed_kmh:.2f} km/h", True, (255, 255, 255))
+    screen.blit(intensity_text, (cx - intensity_text.get_width() // 2, cy + 100))
+
+
+def replay(path, start_frame=0, speed=1.0, max_frames=None):
+    """
+    Plays a trajectory file in a window.
+
+    Args:
+        path (str): Trajectory file (see quadai.trajectory)
+        start_frame (int): Frame number of the source where the replay starts
+        speed (float): Playback speed, 1 for real time
+        max_frames (int): Stops after this many displayed frames, None to
+            play until the window is closed
+    """
+    traj = Trajectory(path)
+    if len(traj) == 0:
+        print(f"{path}: empty trajectory")
+        return
+
+    # Game constants
+    WIDTH = 800
+    HEIGHT = 800
+    display_fps = 60
+
+    FramePerSec = pygame.time.Clock()
+    pygame.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption(f"Replay: {os.path.basename(path)} ({traj.source})")
+
+    # Loading player and target sprites
+    player_width = 80
+    player_animation_speed = 0.3
+    player_animation = []
+    for i in range(1, 5):
+        image = pygame.image.load(
+            correct_path(
+                "assets/balloon-flat-asset-pack/png/objects/drone-sprites/drone-"
+                + str(i)
+                + ".png"
+            )
+        )
+        image.convert()
+        player_animation.append(
+            pygame.transform.scale(image, (player_width, int(player_width * 0.30)))
+        )
+
+    target_width = 30
+    target_animation_speed = 0.1
+    target_animation = []
+    for i in range(1, 8):
+        image = pygame.image.load(
+            correct_path(
+                "assets/balloon-flat-asset-pack/png/balloon-sprites/red-plain/red-plain-"
+                + str(i)
+                + ".png"
+            )
+        )
+        image.convert()
+        target_animation.append(
+            pygame.transform.scale(image, (target_width, int(target_width * 1.73)))
+        )
+
+    sun = pygame.image.load(
+        correct_path("assets/balloon-flat-asset-pack/png/background-elements/sun.png")
+    )
+    sun.set_alpha(124)
+
+    # Loading fonts
+    pygame.font.init()
+    name_font = pygame.font.Font(correct_path("assets/fonts/Roboto-Bold.ttf"), 20)
+    name_hud_font = pygame.font.Font(correct_path("assets/fonts/Roboto-Bold.ttf"), 15)
+    time_font = pygame.font.Font(correct_path("assets/fonts/Roboto-Bold.ttf"), 30)
+    score_font = pygame.font.Font(correct_path("assets/fonts/Roboto-Regular.ttf"), 20)
+    # Names are rendered once, they don't change during the replay
+    name_texts = [name_font.render(name, True, (255, 255, 255)) for name in traj.names]
+    name_hud_texts = [name_hud_font.render(name, True, (255, 255, 255)) for name in traj.names]
+
+    # Position in the records, fractional when the speed is not an integer
+    # multiple of the recording rate
+    cursor = float(min(traj.seek(start_frame), len(traj) - 1))
+    paused = False
+    step = 0
+
+    while True:
+        for event in pygame.event.get():
+            if event.type == QUIT:
+                pygame.quit()
+                return
+            if event.type == KEYDOWN:
+                if event.key == K_SPACE:
+                    paused = not paused
+                elif event.key == K_LEFT:
+                    cursor = max(0.0, cursor - SEEK_SECONDS * traj.fps)
+                elif event.key == K_RIGHT:
+                    cursor = min(len(traj) - 1.0, cursor + SEEK_SECONDS * traj.fps)
+                elif event.key == K_UP:
+                    speed *= 2
+                elif event.key == K_DOWN:
+                    speed /= 2
+                elif event.key == K_HOME:
+                    cursor = 0.0
+
+        step += 1
+        record = traj[int(cursor)]
+
+        # Display background
+        screen.fill((131, 176, 181))
+        screen.blit(sun, (630, -100))
+
+        if record["wind_ax"].any() or record["wind_ay"].any():
+            # Same wind for every drone in the games, drone 0's in the envs
+            wind = (float(record["wind_ax"][0]), float(record["wind_ay"][0]))
+            draw_wind_arrow(screen, score_font, *wind)
+
+        target_sprite = target_animation[int(step * target_animation_speed) % len(target_animation)]
+        player_sprite = player_animation[int(step * player_animation_speed) % len(player_animation)]
+        # Python floats for pygame, which doesn't take NumPy scalars as positions
+        (x, y, a) = (record["x"].tolist(), record["y"].tolist(), record["a"].tolist())
+        (target_x, target_y) = (record["target_x"].tolist(), record["target_y"].tolist())
+        for i in range(traj.n_drones):
+            alpha = 255 if record["alive"][i] else 80
+            target_sprite.set_alpha(alpha)
+            screen.blit(
+                target_sprite,
+                (
+                    target_x[i] - int(target_sprite.get_width() / 2),
+                    target_y[i] - int(target_sprite.get_height() / 2),
+                ),
+            )
+
+            player_copy = pygame.transform.rotate(player_sprite, float(a[i]))
+            player_copy.set_alpha(alpha)
+            screen.blit(
+                player_copy,
+                (
+                    x[i] - int(player_copy.get_width() / 2),
+                    y[i] - int(player_copy.get_height() / 2),
+                ),
+            )
+
+            name_hud_text = name_hud_texts[i]
+            screen.blit(
+                name_hud_text,
+                (
+                    x[i] - int(name_hud_text.get_width() / 2),
+                    y[i] - 30 - int(name_hud_text.get_height() / 2),
+                ),
+            )
+
+            # Display player info
+            if traj.n_drones <= MAX_SCORE_PANELS:
+                position = 20 + 110 * i
+                screen.blit(name_texts[i], (position, 20))
+                target_text = score_font.render(
+                    "Score : " + str(record["score"][i]), True, (255, 255, 255)
+                )
+                screen.blit(target_text, (position, 45))
+
+        # Recorded frame and playback state
+        time_text = time_font.render(
+            f"Frame : {record['frame']}" + ("  ||" if paused else f"  x{speed:g}"),
+            True,
+            (255, 255, 255),
+        )
+        screen.blit(time_text, (WIDTH - time_text.get_width() - 20, HEIGHT - 50))
+
+        pygame.display.update()
+        FramePerSec.tick(display_fps)
+
+        if not paused:
+            cursor = min(len(traj) - 1.0, cursor + speed * traj.fps / display_fps)
+
+        if step == max_frames:
+            break
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replays a trajectory file")
+    parser.add_argument("path", help="trajectory file written by a game or an env")
+    parser.add_argument("--start-frame", type=int, default=0, help="frame where the replay starts")
+    parser.add_argument("--speed", type=float, default=1.0, help="playback speed")
+    args = parser.parse_args()
+    replay(args.path, args.start_frame, args.speed)
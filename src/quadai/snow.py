@@ -0,0 +1,476 @@
+"""
+2D Quadcopter AI by Alexandre Sajus
+
+More information at:
+https://github.com/AlexandreSajus/Quadcopter-AI
+
+Snow particles of the snowglobe game.
+
+The particles are held in NumPy arrays (structure of arrays) and every frame
+is computed with whole-array operations: drag and reduced gravity, the
+attraction/repulsion cones under and over the drone, random agitation, the
+bounce on the glass and the clamp inside the globe. The formulas are the
+ones of the original per-particle loop of snowglobe.py.
+
+A uniform grid (cell list) over the window indexes the particles by cell,
+so the drone interaction only visits the particles of the cells that
+overlap its cones instead of every particle.
+
+Optionally the particles collide with each other, so the snow piles up: a
+finer spatial hash, with cells as large as the largest particle, gives the
+candidate pairs, and the overlaps are resolved with a few relaxation
+iterations per frame.
+
+SnowRenderer draws all the particles at once: one Surface.blits call with a
+sprite per radius, or at reduced resolution a NumPy splat whose cost does
+not depend on the number of particles.
+"""
+
+from math import ceil, pi
+from typing import Optional
+
+import numpy as np
+import pygame
+
+# Snowglobe geometry (window of 800x800 pixels)
+CENTER_X = 400
+CENTER_Y = 400
+SNOWGLOBE_RADIUS = 350
+# Radius range of the snow particles (randrange(3, 9) in the original)
+SNOW_MIN_RADIUS = 3
+SNOW_MAX_RADIUS = 9
+# Factor to define collision snow-snowglobe
+PARTICLE_COLLISION_MARGIN = 0.95
+# Drag coefficient for snow
+DRAG = 0.02
+# Gravity and its reduction for snow
+GRAVITY = 0.08
+GRAVITY_REDUCTION = 0.2
+# Snow-drone interaction force
+INTERACTION_FORCE_X = 0.1
+INTERACTION_FORCE_Y = 0.08
+# Snow-drone interaction distance
+INTERACTION_DISTANCE = 150
+# Snow-drone interaction cone angle (degrees)
+INTERACTION_ANGLE = 30
+# Random snow speed
+RANDOM_SNOW_SPEED = 0.1
+# Snow collision drag
+COLLISION_DRAG = 0.3
+# Side of the cells of the spatial grid (pixels)
+CELL_SIZE = 32
+GRID_SIZE = -(-2 * CENTER_X // CELL_SIZE)
+TAN_INTERACTION_ANGLE = np.tan(np.radians(INTERACTION_ANGLE))
+# Cells of the collision hash: two particles in contact are in the same or
+# in neighbouring cells (randrange excludes SNOW_MAX_RADIUS)
+COLLISION_CELL_SIZE = 2 * (SNOW_MAX_RADIUS - 1)
+COLLISION_GRID_SIZE = -(-2 * CENTER_X // COLLISION_CELL_SIZE)
+# Same cell and the 4 neighbours after it: every pair of cells is visited once
+COLLISION_NEIGHBOURS = ((0, 0), (1, 0), (-1, 1), (0, 1), (1, 1))
+# Relaxation iterations per frame, and fraction of the overlaps resolved by
+# each one (under 1, a particle pushed by several neighbours overshoots less)
+COLLISION_ITERATIONS = 3
+COLLISION_RELAXATION = 0.5
+SNOW_COLOR = (255, 255, 255)
+
+
+class SnowField:
+    """
+    N snow particles in a snowglobe.
+
+    Attributes (arrays of shape (n,)): x, y, xd, yd (position and speed,
+    float64) and radius (int64, pixels).
+
+    Grid: cell[i] is the cell of particle i (row-major, CELL_SIZE pixels),
+    order the particle indices sorted by cell, and the particles of cell c
+    are order[cell_start[c] : cell_start[c + 1]].
+    """
+
+    def __init__(
+        self,
+        n: int,
+        rng: Optional[np.random.Generator] = None,
+        collisions: bool = False,
+        collision_iterations: int = COLLISION_ITERATIONS,
+    ):
+        """
+        Args:
+            n (int): Number of particles
+            rng (np.random.Generator): Random placement and agitation of the
+                particles, a new unseeded Generator if None
+            collisions (bool): Particle-particle collisions (can be changed
+                between steps)
+            collision_iterations (int): Relaxation iterations per frame
+        """
+        self.n = n
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.collisions = collisions
+        self.collision_iterations = collision_iterations
+        self.x = np.empty(n)
+        self.y = np.empty(n)
+        self.xd = np.zeros(n)
+        self.yd = np.zeros(n)
+        self.radius = np.empty(n, dtype=np.int64)
+        self.cell = np.zeros(n, dtype=np.int32)
+        self.order = np.arange(n)
+        self.cell_start = np.zeros(GRID_SIZE * GRID_SIZE + 1, dtype=np.int64)
+        # Corners of every cell, to select the cells near the drone
+        (rows, columns) = np.divmod(np.arange(GRID_SIZE * GRID_SIZE), GRID_SIZE)
+        (self._cell_x0, self._cell_y0) = (columns * CELL_SIZE, rows * CELL_SIZE)
+        self.respawn()
+
+    def respawn(self) -> None:
+        """
+        Places the particles at rest at random integer positions inside the
+        globe, with random radii.
+        """
+        filled = 0
+        while filled < self.n:
+            # Rejection sampling of the window, as the original loop
+            candidates = self.rng.integers(0, 2 * CENTER_X, (2, 2 * (self.n - filled)))
+            distance = np.hypot(candidates[0] - CENTER_X, candidates[1] - CENTER_Y)
+            inside = distance < SNOWGLOBE_RADIUS
+            accepted = candidates[:, inside][:, : self.n - filled]
+            count = accepted.shape[1]
+            self.x[filled : filled + count] = accepted[0]
+            self.y[filled : filled + count] = accepted[1]
+            filled += count
+        self.xd[:] = 0.0
+        self.yd[:] = 0.0
+        self.radius[:] = self.rng.integers(SNOW_MIN_RADIUS, SNOW_MAX_RADIUS, self.n)
+        self.update_grid()
+
+    def update_grid(self) -> None:
+        """
+        Moves the particles that changed cell in the grid.
+
+        The new order is sorted starting from the previous one: the particles
+        move a few pixels per frame, so it is almost sorted already and the
+        stable sort (timsort) runs in close to linear time.
+        """
+        # The particles stay in the globe, inside the window: truncation is
+        # the floor and no clipping is needed
+        cell = (self.y * (1 / CELL_SIZE)).astype(np.int32)
+        cell *= GRID_SIZE
+        cell += (self.x * (1 / CELL_SIZE)).astype(np.int32)
+        if np.array_equal(cell, self.cell) and self.cell_start[-1] == self.n:
+            return
+        self.cell = cell
+        self.order = self.order[np.argsort(cell[self.order], kind="stable")]
+        counts = np.bincount(cell, minlength=GRID_SIZE * GRID_SIZE)
+        np.cumsum(counts, out=self.cell_start[1:])
+
+    def near(self, player_x: float, player_y: float) -> np.ndarray:
+        """
+        Indices of the particles in the cells that overlap the interaction
+        cones of the drone: the cells within INTERACTION_DISTANCE, except the
+        ones entirely in the horizontal sectors where the snow is not pushed.
+
+        Args:
+            player_x (float): Position of the drone
+            player_y (float): Position of the drone
+
+        Returns:
+            np.ndarray: Particle indices (a superset of the interacting ones)
+        """
+        # Cell corners relative to the drone
+        x0 = self._cell_x0 - player_x
+        y0 = self._cell_y0 - player_y
+        (x1, y1) = (x0 + CELL_SIZE, y0 + CELL_SIZE)
+        # Distance from the drone to the closest point of every cell
+        gap_x = np.maximum(np.maximum(x0, -x1), 0)
+        gap_y = np.maximum(np.maximum(y0, -y1), 0)
+        overlap = gap_x**2 + gap_y**2 < INTERACTION_DISTANCE**2
+        # A cell on one side of the drone whose corners are all within
+        # INTERACTION_ANGLE of the horizontal is out of the cones
+        height = np.maximum(np.abs(y0), np.abs(y1))
+        sideways = height < TAN_INTERACTION_ANGLE * np.maximum(x0, -x1)
+        cells = np.flatnonzero(overlap & ~sideways)
+
+        # Concatenation of the particle slices of the selected cells
+        starts = self.cell_start[cells]
+        counts = self.cell_start[cells + 1] - starts
+        total = counts.sum()
+        offsets = np.repeat(starts - (np.cumsum(counts) - counts), counts)
+        return self.order[np.arange(total) + offsets]
+
+    def step(self, player_x: float, player_y: float) -> None:
+        """
+        Advances all the particles by one frame.
+
+        Args:
+            player_x (float): Position of the drone
+            player_y (float): Position of the drone (pygame y-axis points down)
+        """
+        (x, y, xd, yd) = (self.x, self.y, self.xd, self.yd)
+
+        # Accelerations: drag and reduced gravity
+        xdd = -DRAG * xd
+        ydd = GRAVITY * GRAVITY_REDUCTION - DRAG * yd
+
+        # Drone interaction, for the particles of the cells near the drone
+        candidates = self.near(player_x, player_y)
+        dx = x[candidates] - player_x
+        dy = y[candidates] - player_y
+        distance_to_player = np.sqrt(dy**2 + dx**2)
+        angle_to_player = np.arctan2(dy, -dx) * 180 / pi
+        near = distance_to_player < INTERACTION_DISTANCE
+        # Snow below the player is attracted, snow above is repelled
+        below = (
+            near
+            & (INTERACTION_ANGLE < angle_to_player)
+            & (angle_to_player < 180 - INTERACTION_ANGLE)
+        )
+        above = (
+            near
+            & (-INTERACTION_ANGLE > angle_to_player)
+            & (angle_to_player > -180 + INTERACTION_ANGLE)
+        )
+        if below.any() or above.any():
+            with np.errstate(divide="ignore", invalid="ignore"):
+                push_x = INTERACTION_FORCE_X * dx / distance_to_player
+                push_y = INTERACTION_FORCE_Y * dy / distance_to_player
+            (cxdd, cydd) = (xdd[candidates], ydd[candidates])
+            xdd[candidates] = np.where(below, cxdd - push_x, np.where(above, cxdd + push_x, cxdd))
+            ydd[candidates] = np.where(below, cydd - push_y, np.where(above, cydd + push_y, cydd))
+
+        # Speed with random agitation
+        xd += xdd
+        yd += ydd
+        noise = self.rng.uniform(-RANDOM_SNOW_SPEED, RANDOM_SNOW_SPEED, (2, self.n))
+        xd += noise[0]
+        yd += noise[1]
+
+        # Bounce on the glass: the outward radial speed is reversed, both
+        # components are damped
+        rel_x = x - CENTER_X
+        rel_y = y - CENTER_Y
+        distance_to_center = np.sqrt(rel_x**2 + rel_y**2)
+        bounce = distance_to_center > SNOWGLOBE_RADIUS * PARTICLE_COLLISION_MARGIN
+        if bounce.any():
+            (r_speed, theta_speed, cos_a, sin_a) = _to_circular(
+                xd[bounce], yd[bounce], rel_x[bounce], rel_y[bounce]
+            )
+            outward = r_speed > 0
+            bounce[bounce] = outward
+            r_speed = -r_speed[outward] * COLLISION_DRAG
+            theta_speed = theta_speed[outward] * COLLISION_DRAG
+            (cos_a, sin_a) = (cos_a[outward], sin_a[outward])
+            xd[bounce] = r_speed * cos_a - theta_speed * sin_a
+            yd[bounce] = -(r_speed * sin_a + theta_speed * cos_a)
+
+        # Position
+        x += xd
+        y += yd
+
+        if self.collisions:
+            self.collide()
+
+        # Clamp inside the globe
+        rel_x = x - CENTER_X
+        rel_y = y - CENTER_Y
+        outside = np.sqrt(rel_x**2 + rel_y**2) > SNOWGLOBE_RADIUS * PARTICLE_COLLISION_MARGIN
+        if outside.any():
+            (r_position, theta_position, cos_a, sin_a) = _to_circular(
+                rel_x[outside], rel_y[outside], rel_x[outside], rel_y[outside]
+            )
+            clamp = r_position > SNOWGLOBE_RADIUS * PARTICLE_COLLISION_MARGIN
+            outside[outside] = clamp
+            r_position = SNOWGLOBE_RADIUS * PARTICLE_COLLISION_MARGIN
+            (theta_position, cos_a, sin_a) = (theta_position[clamp], cos_a[clamp], sin_a[clamp])
+            x[outside] = r_position * cos_a - theta_position * sin_a + CENTER_X
+            y[outside] = -(r_position * sin_a + theta_position * cos_a) + CENTER_Y
+
+        self.update_grid()
+
+    def contact_pairs(self):
+        """
+        Pairs of overlapping particles, found with the collision hash.
+
+        Returns:
+            tuple: Index arrays (i, j), every pair once
+        """
+        (x, y) = (self.x, self.y)
+        # The particles stay in the globe: truncation is the floor and the
+        # neighbour cells never wrap around the edges of the grid
+        cell = (y * (1 / COLLISION_CELL_SIZE)).astype(np.int64)
+        cell *= COLLISION_GRID_SIZE
+        cell += (x * (1 / COLLISION_CELL_SIZE)).astype(np.int64)
+        order = np.argsort(cell, kind="stable")
+        sorted_cell = cell[order]
+        cell_start = np.zeros(COLLISION_GRID_SIZE**2 + 1, dtype=np.int64)
+        np.cumsum(np.bincount(cell, minlength=COLLISION_GRID_SIZE**2), out=cell_start[1:])
+
+        # Pairs are built on positions sorted by cell: the gathers stay local
+        (xs, ys, reach_s) = (x[order], y[order], self.radius[order])
+        position = np.arange(self.n)
+        (pairs_i, pairs_j) = ([], [])
+        for (offset_x, offset_y) in COLLISION_NEIGHBOURS:
+            if offset_x == offset_y == 0:
+                # In its own cell a particle pairs with the ones after it
+                first = position + 1
+                last = cell_start[sorted_cell + 1]
+            else:
+                neighbour = sorted_cell + offset_y * COLLISION_GRID_SIZE + offset_x
+                first = cell_start[neighbour]
+                last = cell_start[neighbour + 1]
+            counts = last - first
+            a = np.repeat(position, counts)
+            b = np.arange(counts.sum()) + np.repeat(first - (np.cumsum(counts) - counts), counts)
+            reach = reach_s[a] + reach_s[b]
+            touching = (xs[b] - xs[a]) ** 2 + (ys[b] - ys[a]) ** 2 < reach**2
+            pairs_i.append(order[a[touching]])
+            pairs_j.append(order[b[touching]])
+        return np.concatenate(pairs_i), np.concatenate(pairs_j)
+
+    def collide(self) -> None:
+        """
+        Separates the overlapping particles.
+
+        The contacts are found once, then every iteration pushes the particles
+        of each contact apart along the line of centers (Jacobi relaxation,
+        heavier particles move less). The first iteration also damps the
+        approach speed of the contacts, with COLLISION_DRAG as for the glass.
+        """
+        (i, j) = self.contact_pairs()
+        if len(i) == 0:
+            return
+        (x, y, xd, yd) = (self.x, self.y, self.xd, self.yd)
+        # Mass proportional to the area of the particles
+        (mass_i, mass_j) = (self.radius[i] ** 2, self.radius[j] ** 2)
+        share_i = mass_j / (mass_i + mass_j)
+        share_j = mass_i / (mass_i + mass_j)
+        reach = self.radius[i] + self.radius[j]
+
+        for iteration in range(self.collision_iterations):
+            dx = x[j] - x[i]
+            dy = y[j] - y[i]
+            distance = np.sqrt(dx**2 + dy**2)
+            overlap = np.maximum(reach - distance, 0.0)
+            # Normal from i to j, along x for particles at the same position
+            with np.errstate(divide="ignore", invalid="ignore"):
+                normal_x = np.where(distance > 0, dx / distance, 1.0)
+                normal_y = np.where(distance > 0, dy / distance, 0.0)
+
+            if iteration == 0:
+                approach = (xd[j] - xd[i]) * normal_x + (yd[j] - yd[i]) * normal_y
+                impulse = np.where(approach < 0, -(1 + COLLISION_DRAG) * approach, 0.0)
+                impulse *= COLLISION_RELAXATION
+                self._push(xd, yd, i, j, impulse * share_i, impulse * share_j, normal_x, normal_y)
+
+            push = overlap * COLLISION_RELAXATION
+            self._push(x, y, i, j, push * share_i, push * share_j, normal_x, normal_y)
+
+    def _push(self, x, y, i, j, amount_i, amount_j, normal_x, normal_y) -> None:
+        """
+        Moves i by -amount_i and j by +amount_j along the normals, summing the
+        contributions of all the contacts of a particle.
+        """
+        n = self.n
+        x -= np.bincount(i, amount_i * normal_x, n)
+        x += np.bincount(j, amount_j * normal_x, n)
+        y -= np.bincount(i, amount_i * normal_y, n)
+        y += np.bincount(j, amount_j * normal_y, n)
+
+
+def _to_circular(vx, vy, rel_x, rel_y):
+    """
+    Radial and tangential components of (vx, vy) at particles of position
+    (rel_x, rel_y) relative to the center, with cos and sin of their polar
+    angle (the y-axis of pygame points down).
+    """
+    angle = np.arctan2(-rel_y, rel_x)
+    (cos_a, sin_a) = (np.cos(angle), np.sin(angle))
+    r = vx * cos_a + -vy * sin_a
+    theta = -sin_a * vx + cos_a * -vy
+    return r, theta, cos_a, sin_a
+
+
+class SnowRenderer:
+    """
+    Draws the particles of a SnowField.
+
+    With scale 1 every radius has a sprite drawn once with pygame.draw.circle,
+    and all the particles are drawn by a single Surface.blits call: the same
+    pixels as one draw.circle per particle, at a fraction of the cost.
+
+    With scale > 1 the snow is splatted at 1 / scale resolution over the
+    globe and upscaled: the particle centers are written in an array, grown
+    into discs by two separable max passes (pixel covered if dx^2 + dy^2 <=
+    r^2 for some particle), and the mask is blitted with a color key. The cost
+    depends on the resolution, not on the number of particles.
+    """
+
+    def __init__(self, scale: int = 1):
+        """
+        Args:
+            scale (int): 1 to draw at full resolution, 2 or more to draw at
+                1 / scale resolution (faster with many particles, blockier)
+        """
+        self.scale = scale
+        if scale == 1:
+            # Sprite of radius r at index r, the top left corner is at
+            # (x - r, y - r) for a circle centered on (x, y)
+            self._sprites = np.empty(SNOW_MAX_RADIUS, dtype=object)
+            for radius in range(SNOW_MAX_RADIUS):
+                sprite = pygame.Surface((2 * radius + 1, 2 * radius + 1))
+                sprite.set_colorkey((0, 0, 0))
+                pygame.draw.circle(sprite, SNOW_COLOR, (radius, radius), radius, 0)
+                self._sprites[radius] = sprite
+        else:
+            # Square of low resolution pixels around the globe
+            self._low = (CENTER_X - SNOWGLOBE_RADIUS) // scale
+            high = ceil((CENTER_X + SNOWGLOBE_RADIUS) / scale)
+            size = high - self._low
+            self._reach = ceil((SNOW_MAX_RADIUS - 1) / scale)
+            self._field = np.empty((size, size), dtype=np.float32)
+            self._rows = np.empty_like(self._field)
+            self._discs = np.empty_like(self._field)
+            self._shifted = np.empty_like(self._field)
+            self._layer = pygame.Surface((size, size))
+            self._layer.set_colorkey((0, 0, 0))
+            self._upscaled = pygame.Surface((size * scale, size * scale))
+            self._upscaled.set_colorkey((0, 0, 0))
+            self._color = self._layer.map_rgb(SNOW_COLOR)
+
+    def draw(self, screen: pygame.Surface, snow: SnowField) -> None:
+        """
+        Draws the particles on the screen.
+        """
+        if self.scale == 1:
+            # Truncation as int(x) in the original loop, positions are > 0
+            left = (snow.x - snow.radius).astype(np.int64).tolist()
+            top = (snow.y - snow.radius).astype(np.int64).tolist()
+            sprites = self._sprites[snow.radius].tolist()
+            screen.blits(zip(sprites, zip(left, top)), doreturn=False)
+            return
+
+        scale = self.scale
+        # Squared radius at the center of every particle, -inf elsewhere
+        field = self._field
+        field.fill(-np.inf)
+        column = (snow.x * (1 / scale)).astype(np.intp) - self._low
+        row = (snow.y * (1 / scale)).astype(np.intp) - self._low
+        np.maximum.at(field, (column, row), ((snow.radius / scale) ** 2).astype(np.float32))
+        # max over the particles of r^2 - dx^2 - dy^2, one axis at a time
+        _max_plus(field, self._rows, self._shifted, 0, self._reach)
+        _max_plus(self._rows, self._discs, self._shifted, 1, self._reach)
+
+        pygame.surfarray.blit_array(self._layer, np.where(self._discs >= 0, self._color, 0))
+        pygame.transform.scale(self._layer, self._upscaled.get_size(), self._upscaled)
+        screen.blit(self._upscaled, (self._low * scale, self._low * scale))
+
+
+def _max_plus(source, out, shifted, axis, reach):
+    """
+    out[p] = max over |d| <= reach of source[p + d] - d^2, along an axis
+    (arrays indexed [x, y] as pygame.surfarray).
+    """
+    out[...] = source
+    for d in range(1, reach + 1):
+        (head, tail) = (slice(None, -d), slice(d, None))
+        for (src, dst) in ((head, tail), (tail, head)):
+            index_src = (src, slice(None)) if axis == 0 else (slice(None), src)
+            index_dst = (dst, slice(None)) if axis == 0 else (slice(None), dst)
+            np.subtract(source[index_src], d * d, out=shifted[index_dst])
+            np.maximum(out[index_dst], shifted[index_dst], out=out[index_dst])
@@ -8,14 +8,14 @@ Christmas themed mod to the main game
 """
 
 import os
-import random
-from random import randrange
 from math import sin, cos, pi, sqrt, atan2
 
 import pygame
 from pygame.locals import *
 
 from quadai.player import PIDPlayer
+from quadai.snow import SNOWGLOBE_RADIUS, SnowField, SnowRenderer
+from quadai.timestep import FixedTimestep
 
 
 def correct_path(current_path):
@@ -25,43 +25,33 @@ def correct_path(current_path):
     return os.path.join(os.path.dirname(__file__), current_path)
 
 
-def snowglobe():
+def snowglobe(n_particles=1800, fps=60, max_frames=None, collisions=False, render_scale=1):
     """
     Runs the snowglobe game
+
+    Args:
+        n_particles (int): Number of snow particles
+        fps (int): Frame rate cap of the rendering, the simulation always
+            runs at 60 steps per second; 0 for no cap, with one step per
+            rendered frame (benchmarks)
+        max_frames (int): Stops after this many steps, None to run until the
+            window is closed
+        collisions (bool): Collisions between snow particles, so the snow
+            piles up (toggled in game with the C key)
+        render_scale (int): 1 to draw the snow at full resolution, 2 or more
+            to draw it at 1 / render_scale resolution (for many particles)
     """
-    # FPS, w and h of the window
-    FPS = 60
+    # w and h of the window
     WIDTH = 800
     HEIGHT = 800
 
     # simulation step number
     step = 0
-    # snowglobe geometry
-    snowglobe_radius = 350
+    # snowglobe geometry (the snow constants are in quadai/snow.py)
+    snowglobe_radius = SNOWGLOBE_RADIUS
     snowglobe_edge = 20
-    # radius of the snow particles
-    (snow_min_radius, snow_max_radius) = (3, 9)
-    # number of snow particles
-    n_particles = 1800
     # factor to define collision player-snowglobe
     player_collision_margin = 0.9
-    # factor to define collision player-snow
-    particle_collision_margin = 0.95
-    # drag coefficient for snow
-    drag = 0.02
-    # gravity reduction for snow
-    gravity_reduction = 0.2
-    # snow-drone interaction force
-    interaction_force_x = 0.1
-    interaction_force_y = 0.08
-    # snow-drone interaction distance
-    interaction_distance = 150
-    # snow-drone interaction cone angle
-    interaction_angle = 30
-    # random snow speed
-    random_snow_speed = 0.1
-    # snow collision drag
-    collision_drag = 0.3
 
     # Drone constants
     # Physics constants
@@ -131,36 +121,7 @@ def snowglobe():
     # Create player
     player = PIDPlayer()
 
-    class SnowParticle:
-        """
-        A snow particle
-        """
-
-        def __init__(self, x, y, radius):
-            self.x_position = x
-            self.y_position = y
-            self.x_speed = 0
-            self.y_speed = 0
-            self.x_acceleration = 0
-            self.y_acceleration = 0
-            self.radius = radius
-
     # Utilities
-    def create_snow_particles(n_particles):
-        snow_particles = []
-        for _ in range(0, n_particles):
-            while True:
-                x = randrange(0, WIDTH)
-                y = randrange(0, HEIGHT)
-                if (
-                    sqrt((x - WIDTH / 2) ** 2 + (y - HEIGHT / 2) ** 2)
-                    < snowglobe_radius
-                ):
-                    break
-            r = randrange(snow_min_radius, snow_max_radius)
-            snow_particles.append(SnowParticle(x, y, r))
-        return snow_particles
-
     def convert_to_circular(x, y, x_pos, y_pos):
         """
         Convert cartesian coordinates to circular
@@ -185,57 +146,20 @@ def snowglobe():
         y = -y
         return x, y
 
-    snow_particles = create_snow_particles(n_particles)
-
-    # Game loop
-    while True:
-
-        # Quit if user closes window
-        for event in pygame.event.get():
-            if event.type == QUIT:
-                pygame.quit()
-                exit()
-
-        step += 1
-
-        # If spacebar is pressed, reset snow particles
-        if pygame.key.get_pressed()[pygame.K_SPACE]:
-            snow_particles = create_snow_particles(n_particles)
-
-        # Background
-        screen.fill((131, 176, 181))
-
-        x_cloud1 += speed_cloud1
-        if x_cloud1 > WIDTH:
-            x_cloud1 = -cloud1.get_width()
-        screen.blit(cloud1, (x_cloud1, y_cloud1))
-
-        x_cloud2 += speed_cloud2
-        if x_cloud2 < -cloud2.get_width():
-            x_cloud2 = WIDTH
-        screen.blit(cloud2, (x_cloud2, y_cloud2))
-
-        screen.blit(sun, (630, -100))
-
-        # Snowglobe
-        pygame.draw.circle(
-            screen,
-            (200, 200, 200),
-            (int(WIDTH / 2), int(HEIGHT / 2)),
-            snowglobe_radius,
-            snowglobe_edge,
-        )
+    # All the snow particles, updated with array operations
+    snow = SnowField(n_particles, collisions=collisions)
+    snow_renderer = SnowRenderer(render_scale)
 
+    def physics_step(target_x, target_y):
+        """
+        Advances the drone and the snow by one step of 1 / 60 s
+        """
         # Player
         # Initialize accelerations
         player.x_acceleration = 0
         player.y_acceleration = gravity
         player.angular_acceleration = 0
 
-        # Get mouse position
-        mouse_pos = pygame.mouse.get_pos()
-        (target_x, target_y) = mouse_pos
-
         # Calculate propeller force in function of input
         thruster_left, thruster_right = player.act(
             [
@@ -291,6 +215,62 @@ def snowglobe():
         player.y_position += player.y_speed
         player.angle += player.angular_speed
 
+        # Snow particles
+        snow.step(player.x_position, player.y_position)
+
+    # Rendering runs at up to fps frames per second, fps=0 renders every step
+    timestep = FixedTimestep(lockstep=fps == 0)
+
+    # Game loop
+    while True:
+
+        # Quit if user closes window
+        for event in pygame.event.get():
+            if event.type == QUIT:
+                pygame.quit()
+                exit()
+            if event.type == KEYDOWN and event.key == K_c:
+                snow.collisions = not snow.collisions
+
+        # If spacebar is pressed, reset snow particles
+        if pygame.key.get_pressed()[pygame.K_SPACE]:
+            snow.respawn()
+
+        # Get mouse position
+        mouse_pos = pygame.mouse.get_pos()
+        (target_x, target_y) = mouse_pos
+
+        # The simulation advances by fixed steps of 1 / 60 s, as many as the
+        # time elapsed since the previous frame (see quadai.timestep)
+        for _ in range(timestep.steps()):
+            step += 1
+            physics_step(target_x, target_y)
+
+            x_cloud1 += speed_cloud1
+            if x_cloud1 > WIDTH:
+                x_cloud1 = -cloud1.get_width()
+            x_cloud2 += speed_cloud2
+            if x_cloud2 < -cloud2.get_width():
+                x_cloud2 = WIDTH
+
+            if step == max_frames:
+                break
+
+        # Background
+        screen.fill((131, 176, 181))
+        screen.blit(cloud1, (x_cloud1, y_cloud1))
+        screen.blit(cloud2, (x_cloud2, y_cloud2))
+        screen.blit(sun, (630, -100))
+
+        # Snowglobe
+        pygame.draw.circle(
+            screen,
+            (200, 200, 200),
+            (int(WIDTH / 2), int(HEIGHT / 2)),
+            snowglobe_radius,
+            snowglobe_edge,
+        )
+
         # Animation
         player_sprite = player_animation[
             int(step * player_animation_speed) % len(player_animation)
@@ -304,122 +284,10 @@ def snowglobe():
                 player.y_position - int(player_copy.get_height() / 2),
             ),
         )
-
-        # Snow particles
-        for snow_particle in snow_particles:
-            # Accelerations
-            snow_particle.x_acceleration = 0 - drag * snow_particle.x_speed
-            snow_particle.y_acceleration = (
-                gravity * gravity_reduction - drag * snow_particle.y_speed
-            )
-
-            # Drone interaction
-            distance_to_player = sqrt(
-                (snow_particle.y_position - player.y_position) ** 2
-                + (snow_particle.x_position - player.x_position) ** 2
-            )
-            angle_to_player = atan2(
-                snow_particle.y_position - player.y_position,
-                player.x_position - snow_particle.x_position,
-            )
-            angle_to_player = angle_to_player * 180 / pi
-
-            if distance_to_player < interaction_distance:
-                # If snow below the player, snow is attracted to the player
-                if interaction_angle < angle_to_player < 180 - interaction_angle:
-                    snow_particle.x_acceleration -= (
-                        interaction_force_x
-                        * (snow_particle.x_position - player.x_position)
-                        / distance_to_player
-                    )
-                    snow_particle.y_acceleration -= (
-                        interaction_force_y
-                        * (snow_particle.y_position - player.y_position)
-                        / distance_to_player
-                    )
-                # If snow above the player, snow is repelled from the player
-                elif -interaction_angle > angle_to_player > -180 + interaction_angle:
-                    snow_particle.x_acceleration += (
-                        interaction_force_x
-                        * (snow_particle.x_position - player.x_position)
-                        / distance_to_player
-                    )
-                    snow_particle.y_acceleration += (
-                        interaction_force_y
-                        * (snow_particle.y_position - player.y_position)
-                        / distance_to_player
-                    )
-
-            # Calculate speed
-            snow_particle.x_speed += snow_particle.x_acceleration
-            snow_particle.y_speed += snow_particle.y_acceleration
-
-            # Add random noise to speed
-            snow_particle.x_speed += random.uniform(
-                -random_snow_speed, random_snow_speed
-            )
-            snow_particle.y_speed += random.uniform(
-                -random_snow_speed, random_snow_speed
-            )
-
-            # Boundary conditions
-            distance_to_center = sqrt(
-                (snow_particle.x_position - WIDTH / 2) ** 2
-                + (snow_particle.y_position - HEIGHT / 2) ** 2
-            )
-            r_speed, theta_speed = convert_to_circular(
-                snow_particle.x_speed,
-                snow_particle.y_speed,
-                snow_particle.x_position,
-                snow_particle.y_position,
-            )
-
-            if (
-                distance_to_center > snowglobe_radius * particle_collision_margin
-                and r_speed > 0
-            ):
-                r_speed = -r_speed * collision_drag
-                theta_speed = theta_speed * collision_drag
-                x_speed, y_speed = convert_to_cartesian(
-                    r_speed,
-                    theta_speed,
-                    snow_particle.x_position,
-                    snow_particle.y_position,
-                )
-                snow_particle.x_speed = x_speed
-                snow_particle.y_speed = y_speed
-
-            # Calculate position
-            snow_particle.x_position += snow_particle.x_speed
-            snow_particle.y_position += snow_particle.y_speed
-
-            # Clamp position
-            r_position, theta_position = convert_to_circular(
-                snow_particle.x_position - WIDTH / 2,
-                snow_particle.y_position - HEIGHT / 2,
-                snow_particle.x_position,
-                snow_particle.y_position,
-            )
-
-            if r_position > snowglobe_radius * particle_collision_margin:
-                r_position = snowglobe_radius * particle_collision_margin
-                x_position, y_position = convert_to_cartesian(
-                    r_position,
-                    theta_position,
-                    snow_particle.x_position,
-                    snow_particle.y_position,
-                )
-                snow_particle.x_position = x_position + WIDTH / 2
-                snow_particle.y_position = y_position + HEIGHT / 2
-
-            # Animation
-            pygame.draw.circle(
-                screen,
-                (255, 255, 255),
-                (int(snow_particle.x_position), int(snow_particle.y_position)),
-                snow_particle.radius,
-                0,
-            )
+        snow_renderer.draw(screen, snow)
 
         pygame.display.update()
-        FramePerSec.tick(FPS)
+        FramePerSec.tick(fps)
+
+        if step == max_frames:
+            break
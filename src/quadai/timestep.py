@@ -0,0 +1,80 @@
+"""
+2D Quadcopter AI by Alexandre Sajus
+
+More information at:
+https://github.com/AlexandreSajus/Quadcopter-AI
+
+Fixed-timestep game loop.
+
+The games simulate in steps of 1 / FPS seconds of game time, whatever the
+render rate. Every rendered frame asks FixedTimestep how many steps to run:
+the wall-clock time elapsed since the previous frame is added to an
+accumulator and whole steps are taken out of it. A slow frame is followed
+by several steps (the frames in between are dropped), a fast one by none.
+The simulated results only depend on the number of steps, never on how
+they were spread over the rendered frames.
+"""
+
+import time
+
+from quadai.physics import FPS
+
+# Steps run at most per rendered frame: below FPS / MAX_STEPS_PER_FRAME
+# rendered frames per second the game slows down instead of catching up
+MAX_STEPS_PER_FRAME = 5
+
+
+class FixedTimestep:
+    """
+    Accumulator of elapsed time, converted into a number of physics steps.
+
+    Usage:
+        timestep = FixedTimestep()
+        while True:
+            for _ in range(timestep.steps()):
+                simulate one step
+            render
+    """
+
+    def __init__(
+        self,
+        step_rate: float = FPS,
+        max_steps_per_frame: int = MAX_STEPS_PER_FRAME,
+        lockstep: bool = False,
+    ):
+        """
+        Args:
+            step_rate (float): Steps per second of wall-clock time
+            max_steps_per_frame (int): Cap on the steps of one rendered frame,
+                the rest of the backlog is dropped
+            lockstep (bool): One step per rendered frame, whatever the elapsed
+                time (benchmarks without frame cap)
+        """
+        self.step_rate = step_rate
+        self.max_steps_per_frame = max_steps_per_frame
+        self.lockstep = lockstep
+        self.dropped_steps = 0
+        # The first frame runs one step, as the loops did before
+        self._accumulator = 1.0 / step_rate
+        self._last = time.perf_counter()
+
+    def steps(self) -> int:
+        """
+        Number of steps to run before rendering the current frame.
+        """
+        if self.lockstep:
+            return 1
+        now = time.perf_counter()
+        self._accumulator += now - self._last
+        self._last = now
+
+        step_time = 1.0 / self.step_rate
+        n_steps = int(self._accumulator / step_time)
+        if n_steps > self.max_steps_per_frame:
+            # Too far behind (slow rendering, window dragged): slow down
+            self.dropped_steps += n_steps - self.max_steps_per_frame
+            n_steps = self.max_steps_per_frame
+            self._accumulator = 0.0
+        else:
+            self._accumulator -= n_steps * step_time
+        return n_steps
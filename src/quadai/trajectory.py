@@ -0,0 +1,297 @@
+"""
+2D Quadcopter AI by Alexandre Sajus
+
+More information at:
+https://github.com/AlexandreSajus/Quadcopter-AI
+
+Record-and-replay format for trajectories of the games and the envs.
+
+A trajectory file holds one fixed-size binary record per recorded frame, with
+the state of every drone (position, angle, thrusts, wind, target, score).
+The writer fills a preallocated chunk of records and appends it to the file
+when it is full, so recording a frame allocates no Python object. The reader
+memory-maps the records: any frame is read without loading the rest of the
+file, and a frame number is found by binary search on the "frame" column.
+
+Layout: MAGIC, header length (uint64 little endian), JSON header padded to
+a multiple of 64 bytes, then the records (see record_dtype).
+"""
+
+import json
+import os
+import struct
+from typing import List, Optional
+
+import gym
+import numpy as np
+
+from quadai.physics import FPS, target_distance
+
+MAGIC = b"QUADTRJ1"
+# Records written to the file at once
+CHUNK_FRAMES = 1024
+_HEADER_ALIGN = 64
+
+
+def record_dtype(n_drones: int) -> np.dtype:
+    """
+    Record of one frame for n_drones drones.
+
+    - frame: frame number in the source (game frame, or env frame counted
+      across episodes), increasing along the file
+    - episode: episode (env) or life (game) of every drone
+    - x, y, a: position and angle of every drone
+    - target_x, target_y: current target of every drone
+    - thruster_left, thruster_right: thrusts applied during the frame
+    - wind_ax, wind_ay: wind acceleration applied during the frame
+    - score: balloons collected
+    - alive: False while a game player waits to respawn, or on the last
+      record of a crashed env episode
+    """
+    n = (n_drones,)
+    return np.dtype(
+        [
+            ("frame", "<i8"),
+            ("episode", "<i4", n),
+            ("x", "<f4", n),
+            ("y", "<f4", n),
+            ("a", "<f4", n),
+            ("target_x", "<f4", n),
+            ("target_y", "<f4", n),
+            ("thruster_left", "<f4", n),
+            ("thruster_right", "<f4", n),
+            ("wind_ax", "<f4", n),
+            ("wind_ay", "<f4", n),
+            ("score", "<i4", n),
+            ("alive", "?", n),
+        ]
+    )
+
+
+class TrajectoryWriter:
+    """
+    Append-only writer of a trajectory file.
+
+    Usage:
+        with TrajectoryWriter("match.traj", n_drones, names) as writer:
+            writer.append(frame, x, y, a, ...)   # once per recorded frame
+    """
+
+    def __init__(
+        self,
+        path: str,
+        n_drones: int,
+        names: Optional[List[str]] = None,
+        fps: float = FPS,
+        source: str = "",
+        meta: Optional[dict] = None,
+        chunk_frames: int = CHUNK_FRAMES,
+    ):
+        """
+        Args:
+            path (str): File to create (overwritten if it exists)
+            n_drones (int): Number of drones of every record
+            names (list): Name of every drone, shown by the replay viewer
+            fps (float): Records per simulated second (60 for the games,
+                60 / frame_skip for DroneVecEnv)
+            source (str): What was recorded, e.g. "balloon_noisy"
+            meta (dict): Extra JSON-serializable information
+            chunk_frames (int): Records buffered before each write
+        """
+        self.n_drones = n_drones
+        self.dtype = record_dtype(n_drones)
+        header = {
+            "n_drones": n_drones,
+            "names": list(names) if names is not None else [str(i) for i in range(n_drones)],
+            "fps": fps,
+            "source": source,
+            "meta": meta or {},
+        }
+        data = json.dumps(header).encode()
+        data += b" " * (-(len(MAGIC) + 8 + len(data)) % _HEADER_ALIGN)
+
+        self._file = open(path, "wb")
+        self._file.write(MAGIC + struct.pack("<Q", len(data)) + data)
+        self._chunk = np.zeros(chunk_frames, dtype=self.dtype)
+        # One view per field, so append only writes into existing arrays
+        self._columns = {name: self._chunk[name] for name in self.dtype.names}
+        self._count = 0
+        self.n_frames = 0
+
+    def append(
+        self,
+        frame: int,
+        x,
+        y,
+        a,
+        target_x,
+        target_y,
+        thruster_left,
+        thruster_right,
+        wind_ax=0.0,
+        wind_ay=0.0,
+        score=0,
+        alive=True,
+        episode=0,
+    ) -> None:
+        """
+        Records one frame. Every argument but frame is a scalar (same value
+        for every drone) or an array of n_drones values.
+        """
+        i = self._count
+        columns = self._columns
+        columns["frame"][i] = frame
+        columns["episode"][i] = episode
+        columns["x"][i] = x
+        columns["y"][i] = y
+        columns["a"][i] = a
+        columns["target_x"][i] = target_x
+        columns["target_y"][i] = target_y
+        columns["thruster_left"][i] = thruster_left
+        columns["thruster_right"][i] = thruster_right
+        columns["wind_ax"][i] = wind_ax
+        columns["wind_ay"][i] = wind_ay
+        columns["score"][i] = score
+        columns["alive"][i] = alive
+        self._count += 1
+        self.n_frames += 1
+        if self._count == len(self._chunk):
+            self._write_chunk()
+
+    def _write_chunk(self) -> None:
+        self._chunk[: self._count].tofile(self._file)
+        self._count = 0
+
+    def flush(self) -> None:
+        """
+        Writes the buffered records, the file is readable up to here.
+        """
+        if self._file.closed:
+            return
+        self._write_chunk()
+        self._file.flush()
+
+    def close(self) -> None:
+        if self._file.closed:
+            return
+        self.flush()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class Trajectory:
+    """
+    Read-only view of a trajectory file.
+
+    traj[i] is the i-th record (a NumPy structured scalar, fields of
+    record_dtype), traj.records[field] a column over all the records.
+    """
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not a trajectory file")
+            (header_size,) = struct.unpack("<Q", f.read(8))
+            header = json.loads(f.read(header_size))
+        self.path = path
+        self.n_drones = header["n_drones"]
+        self.names = header["names"]
+        self.fps = header["fps"]
+        self.source = header["source"]
+        self.meta = header["meta"]
+        self.dtype = record_dtype(self.n_drones)
+
+        offset = len(MAGIC) + 8 + header_size
+        # A partial last record (interrupted recording) is ignored
+        n_frames = (os.path.getsize(path) - offset) // self.dtype.itemsize
+        if n_frames == 0:
+            self.records = np.zeros(0, dtype=self.dtype)
+        else:
+            self.records = np.memmap(
+                path, dtype=self.dtype, mode="r", offset=offset, shape=(n_frames,)
+            )
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __getitem__(self, index):
+        return self.records[index]
+
+    def seek(self, frame: int) -> int:
+        """
+        Index of the first record at or after a frame number of the source.
+        """
+        return int(np.searchsorted(self.records["frame"], frame))
+
+    def episode_starts(self, drone: int = 0) -> np.ndarray:
+        """
+        Indices of the records where a new episode (or life) of a drone starts.
+        """
+        episodes = self.records["episode"][:, drone]
+        return np.flatnonzero(np.r_[True, episodes[1:] != episodes[:-1]])
+
+
+class EnvRecorder(gym.Wrapper):
+    """
+    Records a droneEnv at every frame (fps of the file 60, frame_skip records
+    per action), across episodes, in a trajectory file.
+
+    The records are written by the env's on_frame hook, called inside the
+    frame loop of droneEnv.step.
+    """
+
+    def __init__(self, env, path: str, meta: Optional[dict] = None):
+        """
+        Args:
+            env: A droneEnv of any algorithm folder
+            path (str): Trajectory file to write
+            meta (dict): Extra information stored in the header
+        """
+        super().__init__(env)
+        drone_env = env.unwrapped
+        module = type(drone_env).__module__
+        self.writer = TrajectoryWriter(
+            path,
+            1,
+            names=[module.rsplit(".", 1)[-1]],
+            fps=FPS,
+            source=module,
+            meta=meta,
+        )
+        self._frame = 0
+        self._episode = -1
+        drone_env.on_frame = self._record_frame
+
+    def reset(self, **kwargs):
+        self._episode += 1
+        return self.env.reset(**kwargs)
+
+    def _record_frame(self, env, thruster_left, thruster_right) -> None:
+        self._frame += 1
+        # The episode ends early only on a crash (too far from the target)
+        crashed = env.time <= env.time_limit and target_distance(env, env.xt, env.yt) > 1000
+        self.writer.append(
+            self._frame,
+            env.x,
+            env.y,
+            env.a,
+            env.xt,
+            env.yt,
+            thruster_left,
+            thruster_right,
+            getattr(env, "wind_ax", 0.0),
+            getattr(env, "wind_ay", 0.0),
+            env.target_counter,
+            not crashed,
+            self._episode,
+        )
+
+    def close(self):
+        self.writer.close()
+        self.env.unwrapped.on_frame = None
+        return self.env.close()
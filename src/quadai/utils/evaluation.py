@@ -0,0 +1,236 @@
+"""
+Valutazione statistica dei modelli, condivisa dagli script test_*.
+
+Un solo passaggio su un DroneVecEnv (tanti droni in parallelo) raccoglie per
+ogni episodio reward, palloncini, crash e lunghezza, al posto dei due cicli
+seriali di prima (evaluate_policy + run manuale). Gli episodi si possono
+dividere su più processi (shards), ognuno con il proprio modello e il
+proprio seme.
+"""
+
+import multiprocessing as mp
+from math import sqrt
+
+import numpy as np
+
+from quadai.utils.training import native_env_kwargs
+from quadai.vec_env import DroneVecEnv
+
+# Quantile della normale per intervalli di confidenza al 95%
+Z_95 = 1.96
+
+
+def evaluate(
+    model,
+    env_module: str,
+    n_episodes: int,
+    env_kwargs: dict = None,
+    n_envs: int = 64,
+    deterministic: bool = True,
+    seed=None,
+) -> dict:
+    """
+    Valuta un modello su n_episodes episodi in un unico processo.
+
+    Ogni drone del VecEnv gioca un numero fisso di episodi (come fa
+    evaluate_policy di SB3), così gli episodi brevi (crash) non vengono
+    sovra-rappresentati.
+
+    Args:
+        model: Oggetto con predict(obs, deterministic) che accetta un batch di osservazioni
+        env_module (str): Modulo del droneEnv da riprodurre, es. "quadai.PPO.env_noisy_PPO"
+        n_episodes (int): Numero di episodi
+        env_kwargs (dict): Parametri del droneEnv (vento, rumore, ...)
+        n_envs (int): Droni simulati in parallelo
+        deterministic (bool): Azioni deterministiche
+        seed: Seme del VecEnv (int o np.random.SeedSequence)
+
+    Returns:
+        dict: array per episodio "reward", "balloons", "crashed", "length"
+    """
+    n_envs = max(1, min(n_envs, n_episodes))
+    venv = DroneVecEnv(n_envs, seed=seed, **native_env_kwargs(env_module, env_kwargs or {}))
+    targets = np.array([(n_episodes + i) // n_envs for i in range(n_envs)])
+    counts = np.zeros(n_envs, dtype=np.int64)
+    current_reward = np.zeros(n_envs)
+    current_length = np.zeros(n_envs, dtype=np.int64)
+
+    episodes = {"reward": [], "balloons": [], "crashed": [], "length": []}
+    obs = venv.reset()
+    while (counts < targets).any():
+        actions, _ = model.predict(obs, deterministic=deterministic)
+        obs, rewards, dones, infos = venv.step(actions)
+        current_reward += rewards
+        current_length += 1
+        for i in np.flatnonzero(dones):
+            if counts[i] < targets[i]:
+                episodes["reward"].append(current_reward[i])
+                episodes["balloons"].append(infos[i]["balloons"])
+                episodes["crashed"].append(infos[i]["crashed"])
+                episodes["length"].append(current_length[i])
+                counts[i] += 1
+            current_reward[i] = 0.0
+            current_length[i] = 0
+    venv.close()
+
+    return {
+        "reward": np.array(episodes["reward"]),
+        "balloons": np.array(episodes["balloons"], dtype=np.int64),
+        "crashed": np.array(episodes["crashed"], dtype=bool),
+        "length": np.array(episodes["length"], dtype=np.int64),
+    }
+
+
+def _evaluate_shard(job: dict) -> dict:
+    """
+    Valutazione eseguita in un processo figlio: carica il modello e valuta
+    la sua parte di episodi.
+    """
+    import stable_baselines3
+    import torch
+
+    torch.set_num_threads(1)
+    algo_class = getattr(stable_baselines3, job["algo"])
+    model = algo_class.load(job["model_path"], device="cpu")
+    return evaluate(
+        model,
+        job["env_module"],
+        job["n_episodes"],
+        env_kwargs=job["env_kwargs"],
+        n_envs=job["n_envs"],
+        deterministic=job["deterministic"],
+        seed=job["seed"],
+    )
+
+
+def evaluate_parallel(
+    algo: str,
+    model_path: str,
+    env_module: str,
+    n_episodes: int,
+    env_kwargs: dict = None,
+    n_envs: int = 64,
+    shards: int = 1,
+    deterministic: bool = True,
+    seed: int = None,
+) -> dict:
+    """
+    Valuta un modello SB3 salvato dividendo gli episodi su `shards` processi.
+
+    Args:
+        algo (str): Nome della classe SB3 ("PPO", "A2C", "SAC")
+        model_path (str): Percorso del file .zip
+        env_module (str): Modulo del droneEnv da riprodurre
+        n_episodes (int): Numero totale di episodi
+        env_kwargs (dict): Parametri del droneEnv
+        n_envs (int): Droni in parallelo per ogni processo
+        shards (int): Numero di processi
+        deterministic (bool): Azioni deterministiche
+        seed (int): Seme globale, ogni shard riceve un seme figlio indipendente
+
+    Returns:
+        dict: come evaluate, con gli episodi di tutti gli shard concatenati
+    """
+    shards = max(1, min(shards, n_episodes))
+    seeds = np.random.SeedSequence(seed).spawn(shards)
+    jobs = [
+        {
+            "algo": algo,
+            "model_path": model_path,
+            "env_module": env_module,
+            "env_kwargs": env_kwargs or {},
+            "n_episodes": (n_episodes + i) // shards,
+            "n_envs": n_envs,
+            "deterministic": deterministic,
+            "seed": seeds[i],
+        }
+        for i in range(shards)
+    ]
+
+    if shards == 1:
+        results = [_evaluate_shard(jobs[0])]
+    else:
+        with mp.Pool(shards) as pool:
+            results = pool.map(_evaluate_shard, jobs)
+
+    return {key: np.concatenate([r[key] for r in results]) for key in results[0]}
+
+
+def _mean_ci(values: np.ndarray):
+    """
+    Media e semi-ampiezza dell'intervallo di confidenza al 95% (normale).
+    """
+    n = len(values)
+    mean = float(np.mean(values))
+    if n < 2:
+        return mean, float("nan")
+    return mean, Z_95 * float(np.std(values, ddof=1)) / sqrt(n)
+
+
+def _wilson_ci(successes: int, n: int):
+    """
+    Intervallo di Wilson al 95% per una proporzione (più affidabile della
+    normale quando i crash sono rari).
+    """
+    if n == 0:
+        return float("nan"), float("nan")
+    p = successes / n
+    denom = 1 + Z_95**2 / n
+    center = (p + Z_95**2 / (2 * n)) / denom
+    half = Z_95 * sqrt(p * (1 - p) / n + Z_95**2 / (4 * n**2)) / denom
+    return center - half, center + half
+
+
+def summarize(episodes: dict) -> dict:
+    """
+    Statistiche aggregate con intervalli di confidenza al 95%.
+
+    Args:
+        episodes (dict): Output di evaluate / evaluate_parallel
+
+    Returns:
+        dict: n_episodes, reward_mean, reward_std, reward_ci, balloons_mean,
+            balloons_ci, length_mean, length_ci, crash_rate, crash_ci (low, high)
+    """
+    n = len(episodes["reward"])
+    reward_mean, reward_ci = _mean_ci(episodes["reward"])
+    balloons_mean, balloons_ci = _mean_ci(episodes["balloons"])
+    length_mean, length_ci = _mean_ci(episodes["length"])
+    crashes = int(np.count_nonzero(episodes["crashed"]))
+    return {
+        "n_episodes": n,
+        "reward_mean": reward_mean,
+        "reward_std": float(np.std(episodes["reward"])),
+        "reward_ci": reward_ci,
+        "balloons_mean": balloons_mean,
+        "balloons_ci": balloons_ci,
+        "length_mean": length_mean,
+        "length_ci": length_ci,
+        "crash_rate": crashes / n if n else float("nan"),
+        "crash_ci": _wilson_ci(crashes, n),
+    }
+
+
+def print_report(stats: dict, title: str, model_name: str, env_name: str) -> None:
+    """
+    Stampa i risultati nello stesso formato dei vecchi script test_*.
+    """
+    print("\n" + "=" * 50)
+    print(f"RISULTATI TEST {title} ({stats['n_episodes']} EPISODI)")
+    print(f"Modello: {model_name}")
+    print(f"Environment: {env_name}")
+    print("=" * 50)
+    print(f"Reward Medio: {stats['reward_mean']:.2f} ± {stats['reward_ci']:.2f}")
+    print(f"Reward Std: {stats['reward_std']:.2f}")
+    print(
+        f"Palloncini medi/episodio: {stats['balloons_mean']:.2f} ± {stats['balloons_ci']:.2f}"
+    )
+    print(
+        f"Durata media (step): {stats['length_mean']:.1f} ± {stats['length_ci']:.1f}"
+    )
+    low, high = stats["crash_ci"]
+    print(
+        f"% Crash: {stats['crash_rate'] * 100:.1f}% "
+        f"(IC 95%: {low * 100:.1f}% - {high * 100:.1f}%)"
+    )
+    print("=" * 50)
@@ -34,6 +34,11 @@ def plot_tuning_comparison(txt_file, algo_name):
         print(f"[TUNING] Colonna MEAN_REWARD mancante nel file {base_name}.")
         return
 
+    # Solo le configurazioni addestrate per tutti gli step: quelle eliminate
+    # presto da successive halving hanno reward non confrontabili
+    if "TIMESTEPS" in df.columns:
+        df = df[df["TIMESTEPS"] == df["TIMESTEPS"].max()]
+
     # Ordina per reward
     df = df.sort_values(by="MEAN_REWARD", ascending=True)
 
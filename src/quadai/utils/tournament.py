@@ -0,0 +1,306 @@
+"""
+Torneo di balloon_noisy: tante partite headless in un pool di processi.
+
+Ogni partita è identificata da (condizione di vento, seme). Il seme
+inizializza random (palloncini), np.random (vento e rumore dei sensori) e il
+campionamento delle azioni dei modelli, quindi una partita dà lo stesso
+risultato in qualunque worker. Ogni worker carica i modelli una volta sola
+(cache di quadai.player) e li riusa per tutte le sue partite.
+
+Il CSV riassume, per ogni condizione di vento e in totale ("all"), partite,
+vittorie, win rate, palloncini medi e crash di ogni giocatore.
+
+Uso:
+    python -m quadai.utils.tournament --matches 250 --workers 8
+"""
+
+import argparse
+import csv
+import multiprocessing as mp
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+from quadai.balloon_noisy import GameWind, new_match
+from quadai.match import check_headless_players
+from quadai.player import PLAYER_REGISTRY, create_players, seed_models
+
+DEFAULT_PLAYERS = ["PID", "SAC", "PPO", "PPO_noisy", "PPO_curriculum"]
+
+# Condizioni di vento: nome -> intervallo di intensità (None = senza vento).
+# Gli intervalli dividono quello del gioco (WIND_SPEED_MIN..WIND_SPEED_MAX)
+WIND_CONDITIONS = {
+    "none": None,
+    "light": (0.01, 0.02),
+    "medium": (0.02, 0.035),
+    "strong": (0.035, 0.05),
+}
+
+SUMMARY_COLUMNS = [
+    "wind",
+    "player",
+    "matches",
+    "wins",
+    "win_rate",
+    "mean_balloons",
+    "std_balloons",
+    "crashes",
+    "mean_crashes",
+]
+
+# Giocatori e cartella delle registrazioni del worker, impostati da _init_worker
+_PLAYER_NAMES = None
+_RECORD_DIR = None
+
+
+def _init_worker(player_names, record_dir=None):
+    """
+    Inizializzazione di ogni processo: carica una volta i modelli dei giocatori.
+    """
+    global _PLAYER_NAMES, _RECORD_DIR
+    _PLAYER_NAMES = player_names
+    _RECORD_DIR = record_dir
+    create_players(player_names)
+    # Fallback SB3: un solo thread torch per worker, come in tuning.py
+    if "torch" in sys.modules:
+        sys.modules["torch"].set_num_threads(1)
+
+
+def make_wind(condition: str) -> GameWind:
+    """
+    Vento di una condizione di WIND_CONDITIONS.
+    """
+    speed_range = WIND_CONDITIONS[condition]
+    if speed_range is None:
+        return GameWind(enabled=False)
+    return GameWind(speed_min=speed_range[0], speed_max=speed_range[1])
+
+
+def play_match(job) -> dict:
+    """
+    Gioca una partita headless (eseguita nel worker).
+
+    Args:
+        job (tuple): (condizione di vento, seme)
+
+    Returns:
+        dict: wind, seed, wind_speed (intensità iniziale) e results
+            (per giocatore: name, balloons, crashes)
+    """
+    condition, seed = job
+    random.seed(seed)
+    np.random.seed(seed)
+    seed_models(seed)
+
+    match = new_match(_PLAYER_NAMES, make_wind(condition))
+    wind_speed = match.wind.speed
+    if _RECORD_DIR is not None:
+        # Rivedibile con python -m quadai.replay
+        path = os.path.join(_RECORD_DIR, f"{condition}_{seed}.traj")
+        match.start_recording(path, "balloon_noisy")
+    match.run()
+    match.close()
+    return {
+        "wind": condition,
+        "seed": seed,
+        "wind_speed": wind_speed,
+        "results": match.results(),
+    }
+
+
+def run_tournament(
+    player_names=None,
+    n_matches: int = 250,
+    conditions=None,
+    workers: int = 1,
+    seed: int = 0,
+    record_dir: str = None,
+) -> list:
+    """
+    Gioca n_matches partite per ogni condizione di vento.
+
+    Le condizioni usano gli stessi semi (seed, seed + 1, ...), quindi gli
+    stessi palloncini: le differenze tra condizioni dipendono dal vento.
+
+    Args:
+        player_names (list): Giocatori di ogni partita, DEFAULT_PLAYERS se None
+        n_matches (int): Partite per condizione
+        conditions (list): Chiavi di WIND_CONDITIONS, tutte se None
+        workers (int): Numero di processi
+        seed (int): Seme della prima partita
+        record_dir (str): Cartella dove registrare ogni partita
+            (<vento>_<seme>.traj, vedi quadai.trajectory), None per non registrare
+
+    Returns:
+        list: Risultati delle partite (vedi play_match), ordinati per
+            condizione e seme
+    """
+    player_names = player_names or DEFAULT_PLAYERS
+    conditions = conditions or list(WIND_CONDITIONS)
+    check_headless_players(player_names)
+    jobs = [(condition, seed + i) for condition in conditions for i in range(n_matches)]
+
+    if record_dir is not None:
+        os.makedirs(record_dir, exist_ok=True)
+
+    workers = max(1, min(workers, len(jobs)))
+    matches = []
+    start = time.perf_counter()
+    if workers == 1:
+        _init_worker(player_names, record_dir)
+        pool = None
+        results = map(play_match, jobs)
+    else:
+        pool = mp.Pool(workers, initializer=_init_worker, initargs=(player_names, record_dir))
+        chunksize = max(1, len(jobs) // (workers * 8))
+        results = pool.imap_unordered(play_match, jobs, chunksize=chunksize)
+
+    try:
+        step = max(1, len(jobs) // 10)
+        for counter, match in enumerate(results, start=1):
+            matches.append(match)
+            if counter % step == 0 or counter == len(jobs):
+                print(f"[{counter}/{len(jobs)}] partite giocate in {time.perf_counter() - start:.1f} s")
+    finally:
+        if pool is not None:
+            pool.terminate()
+            pool.join()
+
+    order = {condition: i for i, condition in enumerate(conditions)}
+    matches.sort(key=lambda match: (order[match["wind"]], match["seed"]))
+    return matches
+
+
+def summarize(matches: list) -> list:
+    """
+    Statistiche per condizione di vento e giocatore, più le righe "all".
+
+    In caso di pareggio la vittoria viene divisa tra i giocatori con più
+    palloncini (1/k a testa per un pareggio tra k giocatori).
+
+    Args:
+        matches (list): Risultati di run_tournament
+
+    Returns:
+        list: dict con le colonne di SUMMARY_COLUMNS
+    """
+    if not matches:
+        return []
+    names = [result["name"] for result in matches[0]["results"]]
+    conditions = list(dict.fromkeys(match["wind"] for match in matches))
+    rows = []
+    for condition in conditions + ["all"]:
+        selected = [m for m in matches if condition in ("all", m["wind"])]
+        balloons = np.array([[r["balloons"] for r in m["results"]] for m in selected])
+        crashes = np.array([[r["crashes"] for r in m["results"]] for m in selected])
+        winners = balloons == balloons.max(axis=1, keepdims=True)
+        wins = (winners / winners.sum(axis=1, keepdims=True)).sum(axis=0)
+        for i, name in enumerate(names):
+            rows.append(
+                {
+                    "wind": condition,
+                    "player": name,
+                    "matches": len(selected),
+                    "wins": round(float(wins[i]), 3),
+                    "win_rate": round(float(wins[i]) / len(selected), 4),
+                    "mean_balloons": round(float(balloons[:, i].mean()), 3),
+                    "std_balloons": round(float(balloons[:, i].std()), 3),
+                    "crashes": int(crashes[:, i].sum()),
+                    "mean_crashes": round(float(crashes[:, i].mean()), 4),
+                }
+            )
+    return rows
+
+
+def write_summary(path: str, rows: list) -> None:
+    """
+    Scrive il CSV riassuntivo (colonne SUMMARY_COLUMNS).
+    """
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=SUMMARY_COLUMNS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def write_matches(path: str, matches: list) -> None:
+    """
+    Scrive una riga per partita: vento, seme, intensità iniziale e
+    palloncini/crash di ogni giocatore.
+    """
+    names = [result["name"] for result in matches[0]["results"]]
+    columns = ["wind", "seed", "wind_speed"]
+    for name in names:
+        columns += [f"{name}_balloons", f"{name}_crashes"]
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(columns)
+        for match in matches:
+            row = [match["wind"], match["seed"], f"{match['wind_speed']:.5f}"]
+            for result in match["results"]:
+                row += [result["balloons"], result["crashes"]]
+            writer.writerow(row)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--players",
+        nargs="+",
+        choices=[name for name, spec in PLAYER_REGISTRY.items() if spec.obs != "human"],
+        default=DEFAULT_PLAYERS,
+        help="giocatori di ogni partita",
+    )
+    parser.add_argument("--matches", type=int, default=250, help="partite per condizione di vento")
+    parser.add_argument(
+        "--wind",
+        nargs="+",
+        choices=list(WIND_CONDITIONS),
+        default=list(WIND_CONDITIONS),
+        help="condizioni di vento giocate",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="numero di processi",
+    )
+    parser.add_argument("--seed", type=int, default=0, help="seme della prima partita")
+    parser.add_argument(
+        "--output",
+        default="tournament_results.csv",
+        help="CSV riassuntivo per condizione di vento e giocatore",
+    )
+    parser.add_argument(
+        "--matches-output",
+        default=None,
+        help="CSV opzionale con il risultato di ogni partita",
+    )
+    parser.add_argument(
+        "--record-dir",
+        default=None,
+        help="registra ogni partita in questa cartella (python -m quadai.replay per rivederle)",
+    )
+    args = parser.parse_args(argv)
+
+    matches = run_tournament(
+        args.players, args.matches, args.wind, args.workers, args.seed, args.record_dir
+    )
+    rows = summarize(matches)
+    write_summary(args.output, rows)
+    if args.matches_output:
+        write_matches(args.matches_output, matches)
+
+    for row in rows:
+        if row["wind"] == "all":
+            print(
+                f"{row['player']}: win rate {row['win_rate']:.1%} | "
+                f"palloncini {row['mean_balloons']:.1f} | crash {row['crashes']}"
+            )
+    print(f"Risultati salvati in {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""
+Launcher condiviso per gli script train_*.
+
+Costruisce il VecEnv di training a partire dal modulo dell'env
+(es. "quadai.PPO.env_noisy_PPO") con tre backend:
+- dummy   : DummyVecEnv, tutti gli env nello stesso processo
+- subproc : SubprocVecEnv, un processo per env (scala su tutti i core)
+- native  : DroneVecEnv, stato batched in NumPy senza oggetti droneEnv
+
+Con un seed, ogni env riceve un figlio di np.random.SeedSequence(seed).spawn:
+flussi indipendenti anche tra processi diversi, e traiettorie identiche a
+ogni esecuzione con lo stesso seed e lo stesso numero di env.
+"""
+
+import argparse
+import importlib
+import inspect
+import os
+import time
+
+import numpy as np
+from stable_baselines3.common.vec_env import DummyVecEnv, SubprocVecEnv, VecMonitor
+
+from quadai.kernels import run_frames_numba
+from quadai.vec_env import DroneVecEnv
+
+VEC_BACKENDS = ("dummy", "subproc", "native")
+
+
+class EnvFactory:
+    """
+    Costruttore picklable di un droneEnv, usato da DummyVecEnv/SubprocVecEnv.
+
+    Il modulo viene importato per nome dentro il worker, quindi l'oggetto
+    contiene solo stringhe e dizionari e si serializza senza problemi
+    (a differenza delle lambda usate prima negli script curriculum).
+    Il seed (int o np.random.SeedSequence) viene passato a env.seed().
+    """
+
+    def __init__(self, env_module: str, env_kwargs: dict = None, seed=None):
+        self.env_module = env_module
+        self.env_kwargs = dict(env_kwargs or {})
+        self.seed = seed
+
+    def __call__(self):
+        module = importlib.import_module(self.env_module)
+        # Osservazioni in buffer riutilizzati (il VecEnv le copia a ogni step)
+        # e frame di step nel kernel Numba, se installato (vedi
+        # quadai/kernels.py): per un drone solo il kernel NumPy è più lento
+        # del ciclo Python di droneEnv.step
+        kwargs = {
+            "render_every_frame": False,
+            "mouse_target": False,
+            "preallocated_obs": True,
+            "kernel": None if run_frames_numba is None else "numba",
+        }
+        kwargs.update(self.env_kwargs)
+        env = module.droneEnv(**kwargs)
+        if self.seed is not None:
+            env.seed(self.seed)
+        return env
+
+
+def add_vec_env_args(parser: argparse.ArgumentParser) -> argparse.ArgumentParser:
+    """
+    Aggiunge --n-envs, --vec-backend e --seed al parser di uno script di training.
+    """
+    parser.add_argument(
+        "--n-envs",
+        type=int,
+        default=1,
+        help="numero di env in parallelo (-1 = tutti i core)",
+    )
+    parser.add_argument(
+        "--vec-backend",
+        choices=VEC_BACKENDS,
+        default="dummy",
+        help="come parallelizzare gli env",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=None,
+        help="seed di env e modello (None = non riproducibile)",
+    )
+    return parser
+
+
+def native_env_kwargs(env_module: str, env_kwargs: dict) -> dict:
+    """
+    Traduce i parametri di un droneEnv in quelli di DroneVecEnv.
+
+    Parte dai default del costruttore del droneEnv (così env_noisy_* ha
+    vento e rumore attivi come nella versione a singolo env) e applica
+    sopra gli env_kwargs espliciti.
+    """
+    module = importlib.import_module(env_module)
+    accepted = inspect.signature(DroneVecEnv.__init__).parameters
+    kwargs = {}
+    for name, param in inspect.signature(module.droneEnv.__init__).parameters.items():
+        if name in accepted and param.default is not inspect.Parameter.empty:
+            kwargs[name] = param.default
+    for name, value in env_kwargs.items():
+        if name in accepted:
+            kwargs[name] = value
+        elif name not in ("render_every_frame", "mouse_target", "preallocated_obs"):
+            raise ValueError(f"Parametro non supportato dal backend native: {name}")
+    # kernel=None (ciclo Python del droneEnv) non esiste in DroneVecEnv
+    if kwargs.get("kernel", "auto") is None:
+        del kwargs["kernel"]
+    return kwargs
+
+
+def make_vec_env(
+    env_module: str,
+    n_envs: int = 1,
+    backend: str = "dummy",
+    env_kwargs: dict = None,
+    monitor_path: str = None,
+    seed: int = None,
+):
+    """
+    Crea il VecEnv di training.
+
+    Args:
+        env_module (str): Modulo che definisce droneEnv, es. "quadai.PPO.env_PPO"
+        n_envs (int): Numero di env in parallelo (-1 = os.cpu_count())
+        backend (str): "dummy", "subproc" o "native"
+        env_kwargs (dict): Parametri del costruttore di droneEnv
+        monitor_path (str): File monitor.csv (VecMonitor), None per non loggare
+        seed (int): Seed degli env, None per entropia nuova a ogni esecuzione
+
+    Returns:
+        VecEnv: L'env vettorizzato, già avvolto in VecMonitor
+    """
+    env_kwargs = dict(env_kwargs or {})
+    if n_envs == -1:
+        n_envs = os.cpu_count() or 1
+
+    if backend == "native":
+        if env_module.endswith("env_DQN"):
+            raise ValueError("Il backend native supporta solo azioni continue")
+        venv = DroneVecEnv(n_envs, seed=seed, **native_env_kwargs(env_module, env_kwargs))
+    elif backend in ("subproc", "dummy"):
+        # Un figlio della SeedSequence per env: niente stato condiviso né
+        # flussi sovrapposti, anche dopo il fork dei worker
+        if seed is None:
+            seeds = [None] * n_envs
+        else:
+            seeds = np.random.SeedSequence(seed).spawn(n_envs)
+        factories = [EnvFactory(env_module, env_kwargs, env_seed) for env_seed in seeds]
+        if backend == "subproc":
+            venv = SubprocVecEnv(factories)
+        else:
+            venv = DummyVecEnv(factories)
+    else:
+        raise ValueError(f"Backend sconosciuto: {backend} (attesi: {VEC_BACKENDS})")
+
+    return VecMonitor(venv, monitor_path)
+
+
+def report_throughput(model, start_time: float, n_envs: int, backend: str) -> None:
+    """
+    Stampa tempo totale e step al secondo alla fine del training.
+
+    Args:
+        model: Il modello SB3 appena addestrato (usa model.num_timesteps)
+        start_time (float): time.perf_counter() preso prima di model.learn
+        n_envs (int): Numero di env usati
+        backend (str): Backend usato
+    """
+    elapsed = time.perf_counter() - start_time
+    steps = model.num_timesteps
+    print("\n" + "=" * 50)
+    print(f"Backend: {backend} | Env paralleli: {n_envs}")
+    print(f"Step totali: {steps}")
+    print(f"Tempo: {elapsed:.1f} s ({elapsed / 60:.1f} min)")
+    print(f"Velocità: {steps / max(elapsed, 1e-9):.0f} step/s")
+    print("=" * 50)
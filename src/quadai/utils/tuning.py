@@ -0,0 +1,476 @@
+"""
+Grid search parallela condivisa dagli script tune_*.
+
+Ogni configurazione della griglia viene addestrata in un processo separato
+(un worker per core, opzionalmente pinnato a una CPU). Il file
+tuning_results_*.txt ha il formato di prima con in più gli step di training
+di ogni riga ("LR, CLIP_RANGE, ..., MEAN_REWARD, MAX_REWARD, TIMESTEPS") e
+viene riscritto in modo atomico dopo ogni risultato, così una sweep
+interrotta si può riprendere saltando le configurazioni già addestrate per
+tutti gli step.
+
+Con --halving la griglia viene esplorata con successive halving: tutte le
+configurazioni partono con pochi step e solo le migliori vengono allungate.
+Le configurazioni eliminate restano nel file con gli step a cui sono state
+fermate: la ripresa le riaddestra, e print_best e plot_tuning_comparison
+confrontano solo le righe con il budget completo.
+"""
+
+import argparse
+import itertools
+import multiprocessing as mp
+import os
+import tempfile
+
+import pandas as pd
+
+from quadai.utils.training import EnvFactory
+
+# Step di training della riga: TEST_TIMESTEPS, o meno per le configurazioni
+# eliminate da successive halving
+BUDGET_COLUMN = "TIMESTEPS"
+RESULT_COLUMNS = ["MEAN_REWARD", "MAX_REWARD", BUDGET_COLUMN]
+
+
+def add_grid_args(parser: argparse.ArgumentParser) -> argparse.ArgumentParser:
+    """
+    Aggiunge le opzioni della grid search al parser di uno script di tuning.
+    """
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="numero di configurazioni addestrate in parallelo",
+    )
+    parser.add_argument(
+        "--no-pin",
+        action="store_true",
+        help="non pinnare ogni worker a una singola CPU",
+    )
+    parser.add_argument(
+        "--restart",
+        action="store_true",
+        help="ricomincia da zero invece di riprendere il file risultati",
+    )
+    parser.add_argument(
+        "--halving",
+        action="store_true",
+        help="successive halving: scarta presto le configurazioni peggiori",
+    )
+    parser.add_argument(
+        "--eta",
+        type=int,
+        default=3,
+        help="con --halving: tiene il miglior 1/eta e allunga il training di eta volte",
+    )
+    parser.add_argument(
+        "--min-steps",
+        type=int,
+        default=50_000,
+        help="con --halving: step del primo round",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=None,
+        help="seed di env e modello, uguale per tutte le configurazioni",
+    )
+    parser.add_argument(
+        "--frame-skip",
+        type=int,
+        default=None,
+        help="frame per azione dell'env (default dell'env: 5), es. 10 per un tuning più economico",
+    )
+    parser.add_argument(
+        "--physics-substeps",
+        type=int,
+        default=None,
+        help="passi di integrazione per frame (default dell'env: 1)",
+    )
+    return parser
+
+
+def grid_options(args: argparse.Namespace) -> dict:
+    """
+    Converte gli argomenti di add_grid_args nei parametri di run_grid.
+    """
+    return dict(
+        workers=args.workers,
+        pin_cpus=not args.no_pin,
+        restart=args.restart,
+        halving=args.halving,
+        eta=args.eta,
+        min_timesteps=args.min_steps,
+        seed=args.seed,
+        frame_skip=args.frame_skip,
+        physics_substeps=args.physics_substeps,
+    )
+
+
+def _available_cpus():
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def _init_worker(cpu_queue):
+    """
+    Inizializzazione di ogni processo del pool: pinning e un solo thread torch.
+
+    Con N worker su N core, lasciare a torch i suoi thread intra-op
+    porterebbe a N*N thread in competizione.
+    """
+    if cpu_queue is not None and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, {cpu_queue.get()})
+    import torch
+
+    torch.set_num_threads(1)
+
+
+def read_monitor_rewards(log_dir: str, tail: int = 100):
+    """
+    Legge il monitor.csv di una run e ritorna (media ultimi `tail` episodi, max).
+
+    Args:
+        log_dir (str): Cartella passata a Monitor
+        tail (int): Numero di episodi finali su cui fare la media
+
+    Returns:
+        tuple: (mean_reward, max_reward), (-1000, -1000) se il file non è leggibile
+    """
+    try:
+        df = pd.read_csv(os.path.join(log_dir, "monitor.csv"), skiprows=1)
+        return df["r"].tail(tail).mean(), df["r"].max()
+    except Exception as e:
+        print(f"Errore lettura log: {e}")
+        return -1000, -1000
+
+
+def train_config(job: dict):
+    """
+    Addestra una singola configurazione della griglia (eseguita nel worker).
+
+    Con job["resume"] il modello salvato nella cartella di log viene
+    ricaricato e il training continua per altri job["timesteps"] step;
+    con job["checkpoint"] il modello viene salvato alla fine.
+
+    Args:
+        job (dict): algo, env_module, env_kwargs, params, log_dir, timesteps, tail
+            (e opzionalmente seed)
+
+    Returns:
+        tuple: (job, mean_reward, max_reward)
+    """
+    import stable_baselines3
+    from stable_baselines3.common.monitor import Monitor
+
+    resume = job.get("resume", False)
+    model_path = os.path.join(job["log_dir"], "model")
+    buffer_path = os.path.join(job["log_dir"], "replay_buffer")
+
+    os.makedirs(job["log_dir"], exist_ok=True)
+    env = EnvFactory(job["env_module"], job["env_kwargs"], job.get("seed"))()
+    # In ripresa si continua lo stesso monitor.csv
+    env = Monitor(env, job["log_dir"], override_existing=not resume)
+
+    algo_class = getattr(stable_baselines3, job["algo"])
+    if resume:
+        model = algo_class.load(model_path, env=env)
+        if hasattr(model, "load_replay_buffer"):
+            model.load_replay_buffer(buffer_path)
+    else:
+        model = algo_class("MlpPolicy", env, verbose=0, seed=job.get("seed"), **job["params"])
+    model.learn(total_timesteps=job["timesteps"], reset_num_timesteps=not resume)
+    if job.get("checkpoint", False):
+        model.save(model_path)
+        if hasattr(model, "save_replay_buffer"):
+            model.save_replay_buffer(buffer_path)
+    env.close()
+
+    mean_r, max_r = read_monitor_rewards(job["log_dir"], job["tail"])
+    return job, mean_r, max_r
+
+
+def read_results(results_file: str, header: str, legacy_timesteps: int = None) -> dict:
+    """
+    Legge un file tuning_results_*.txt già esistente.
+
+    Args:
+        results_file (str): File tuning_results_*.txt
+        header (str): Intestazione attesa (con la colonna TIMESTEPS)
+        legacy_timesteps (int): Step attribuiti alle righe di un file senza
+            la colonna TIMESTEPS, scritto dalla grid search completa; None
+            per rifiutare quei file
+
+    Returns:
+        dict: chiave (valori dei parametri come stringhe) -> riga del file,
+            sempre con la colonna TIMESTEPS
+    """
+    if not os.path.exists(results_file):
+        return {}
+    with open(results_file) as f:
+        lines = f.read().splitlines()
+    if not lines:
+        return {}
+    legacy = legacy_timesteps is not None and lines[0].strip() == header.rsplit(", ", 1)[0]
+    if lines[0].strip() != header and not legacy:
+        raise ValueError(
+            f"Intestazione diversa in {results_file}: usa --restart per sovrascriverlo"
+        )
+    n_params = len(header.split(",")) - len(RESULT_COLUMNS)
+    done = {}
+    for line in lines[1:]:
+        if legacy:
+            line = f"{line}, {legacy_timesteps}"
+        fields = [v.strip() for v in line.split(",")]
+        if len(fields) == n_params + len(RESULT_COLUMNS):
+            done[tuple(fields[:n_params])] = line
+    return done
+
+
+def result_timesteps(line: str) -> int:
+    """
+    Step di training di una riga del file risultati (colonna TIMESTEPS).
+    """
+    return int(line.rsplit(",", 1)[1])
+
+
+def full_budget_rows(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Righe dei risultati con il budget completo (il massimo di TIMESTEPS),
+    senza le configurazioni eliminate presto da successive halving.
+    """
+    if BUDGET_COLUMN not in df.columns or df.empty:
+        return df
+    return df[df[BUDGET_COLUMN] == df[BUDGET_COLUMN].max()]
+
+
+def write_results_atomic(results_file: str, header: str, lines) -> None:
+    """
+    Riscrive il file risultati passando da un file temporaneo + os.replace,
+    così un'interruzione non lascia mai un file troncato.
+    """
+    directory = os.path.dirname(os.path.abspath(results_file))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(header + "\n")
+            for line in lines:
+                f.write(line + "\n")
+        os.replace(tmp_path, results_file)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+def run_grid(
+    algo: str,
+    env_module: str,
+    param_grid,
+    results_file: str,
+    tmp_log_base: str,
+    timesteps: int,
+    env_kwargs: dict = None,
+    model_kwargs: dict = None,
+    tail: int = 100,
+    config_prefix: str = "",
+    workers: int = 1,
+    pin_cpus: bool = True,
+    restart: bool = False,
+    halving: bool = False,
+    eta: int = 3,
+    min_timesteps: int = 50_000,
+    seed: int = None,
+    frame_skip: int = None,
+    physics_substeps: int = None,
+):
+    """
+    Esegue la grid search in parallelo e aggiorna il file risultati.
+
+    Args:
+        algo (str): Nome della classe SB3 ("PPO", "A2C", "SAC")
+        env_module (str): Modulo del droneEnv, es. "quadai.PPO.env_noisy_PPO"
+        param_grid (list): Lista di (COLONNA, kwarg SB3, valori),
+            es. [("LR", "learning_rate", [0.0007, 0.001])]
+        results_file (str): File tuning_results_*.txt
+        tmp_log_base (str): Cartella dei monitor.csv di ogni configurazione
+        timesteps (int): Step di training per configurazione
+        env_kwargs (dict): Parametri del droneEnv
+        model_kwargs (dict): Parametri SB3 fissi, uguali per tutta la griglia
+        tail (int): Episodi finali usati per MEAN_REWARD
+        config_prefix (str): Prefisso dei nomi delle cartelle (es. "noisy_")
+        workers (int): Numero di processi
+        pin_cpus (bool): Pinna ogni worker a una CPU (solo Linux)
+        restart (bool): Ignora i risultati già presenti
+        halving (bool): Usa successive halving invece della griglia completa
+        eta (int): Fattore di riduzione/estensione per round (solo halving)
+        min_timesteps (int): Step del primo round (solo halving)
+        seed (int): Seed di env e modello, lo stesso per ogni configurazione
+            così le differenze dipendono solo dagli iperparametri
+        frame_skip (int): Frame per azione dell'env, None per il default
+        physics_substeps (int): Passi di integrazione per frame, None per il default
+
+    Returns:
+        dict: chiave (valori come stringhe) -> (mean_reward, max_reward)
+            per le configurazioni calcolate in questa esecuzione
+    """
+    env_kwargs = dict(env_kwargs or {})
+    if frame_skip is not None:
+        env_kwargs["frame_skip"] = frame_skip
+    if physics_substeps is not None:
+        env_kwargs["physics_substeps"] = physics_substeps
+
+    columns = [column for column, _, _ in param_grid]
+    header = ", ".join(columns + RESULT_COLUMNS)
+    done = {} if restart else read_results(results_file, header, timesteps)
+    # Solo le configurazioni addestrate per tutti gli step sono concluse
+    completed = {key for key, line in done.items() if result_timesteps(line) >= timesteps}
+
+    # Le configurazioni nell'ordine del vecchio ciclo for annidato
+    grid = list(itertools.product(*[values for _, _, values in param_grid]))
+    keys = [tuple(str(v) for v in values) for values in grid]
+    jobs = []
+    for values, key in zip(grid, keys):
+        if key in completed:
+            continue
+        config_name = config_prefix + "_".join(
+            f"{column.lower()}{value}" for column, value in zip(columns, values)
+        )
+        jobs.append(
+            {
+                "algo": algo,
+                "env_module": env_module,
+                "env_kwargs": env_kwargs,
+                "params": dict(
+                    model_kwargs or {},
+                    **{kwarg: v for (_, kwarg, _), v in zip(param_grid, values)},
+                ),
+                "key": key,
+                "name": config_name,
+                "log_dir": os.path.join(tmp_log_base, config_name),
+                "timesteps": timesteps,
+                "tail": tail,
+                "seed": seed,
+            }
+        )
+
+    print(f"Configurazioni: {len(grid)} | già completate: {len(grid) - len(jobs)}")
+    write_results_atomic(results_file, header, _ordered_lines(done, keys))
+    if not jobs:
+        return {}
+
+    workers = max(1, min(workers, len(jobs)))
+    pool = _make_pool(workers, pin_cpus)
+    results = {}
+
+    def record(job, mean_r, max_r, budget):
+        done[job["key"]] = ", ".join(list(job["key"]) + [str(mean_r), str(max_r), str(budget)])
+        results[job["key"]] = (mean_r, max_r)
+        write_results_atomic(results_file, header, _ordered_lines(done, keys))
+
+    try:
+        if halving:
+            _successive_halving(pool, jobs, timesteps, min_timesteps, eta, record)
+        else:
+            for counter, (job, mean_r, max_r) in enumerate(_map(pool, jobs), start=1):
+                print(f"[{counter}/{len(jobs)}] {job['name']} --> Media: {mean_r:.2f} | Max: {max_r:.2f}")
+                record(job, mean_r, max_r, timesteps)
+    finally:
+        if pool is not None:
+            pool.terminate()
+            pool.join()
+
+    return results
+
+
+def _make_pool(workers: int, pin_cpus: bool):
+    """
+    Crea il pool di processi, None se basta un solo worker (esecuzione in-process).
+    """
+    if workers == 1:
+        return None
+    cpu_queue = None
+    if pin_cpus and hasattr(os, "sched_setaffinity"):
+        cpu_queue = mp.Queue()
+        cpus = _available_cpus()
+        for i in range(workers):
+            cpu_queue.put(cpus[i % len(cpus)])
+    return mp.Pool(workers, initializer=_init_worker, initargs=(cpu_queue,))
+
+
+def _map(pool, jobs):
+    if pool is None:
+        return map(train_config, jobs)
+    return pool.imap_unordered(train_config, jobs)
+
+
+def _successive_halving(pool, jobs, timesteps, min_timesteps, eta, record):
+    """
+    Successive halving: tutte le configurazioni partono con min_timesteps,
+    a ogni round sopravvive il miglior 1/eta (per reward medio dal Monitor)
+    e il suo training viene esteso di un fattore eta, fino a timesteps.
+
+    I modelli dei sopravvissuti vengono salvati nella loro cartella di log e
+    ricaricati al round successivo, quindi il training continua e non riparte.
+    Le configurazioni eliminate finiscono nel file risultati con il reward
+    e gli step dell'ultimo round che hanno completato.
+    """
+    budget = min(min_timesteps, timesteps)
+    trained = 0
+    survivors = [dict(job, checkpoint=True) for job in jobs]
+    round_idx = 0
+    while True:
+        print(
+            f"\n[ROUND {round_idx}] {len(survivors)} configurazioni fino a {budget} step"
+        )
+        for job in survivors:
+            job["timesteps"] = budget - trained
+            job["resume"] = trained > 0
+
+        scores = []
+        for counter, (job, mean_r, max_r) in enumerate(_map(pool, survivors), start=1):
+            print(f"[{counter}/{len(survivors)}] {job['name']} --> Media: {mean_r:.2f} | Max: {max_r:.2f}")
+            scores.append((mean_r, job, max_r))
+        scores.sort(key=lambda item: item[0], reverse=True)
+
+        if budget >= timesteps:
+            for mean_r, job, max_r in scores:
+                record(job, mean_r, max_r, budget)
+            return
+
+        n_keep = max(1, len(scores) // eta)
+        for mean_r, job, max_r in scores[n_keep:]:
+            record(job, mean_r, max_r, budget)
+        survivors = [job for _, job, _ in scores[:n_keep]]
+        trained = budget
+        budget = min(budget * eta, timesteps)
+        round_idx += 1
+
+
+def _ordered_lines(done: dict, keys: list):
+    """
+    Righe del file: prima quelle non appartenenti alla griglia attuale,
+    poi quelle della griglia nell'ordine della griglia.
+    """
+    in_grid = set(keys)
+    lines = [line for key, line in done.items() if key not in in_grid]
+    lines += [done[key] for key in keys if key in done]
+    return lines
+
+
+def print_best(results_file: str) -> None:
+    """
+    Stampa la miglior configurazione presente nel file risultati.
+    """
+    df = pd.read_csv(results_file, skipinitialspace=True)
+    df.columns = df.columns.str.strip()
+    df = full_budget_rows(df)
+    if df.empty:
+        return
+    best = df.loc[df["MEAN_REWARD"].idxmax()]
+    params = ", ".join(f"{c}={best[c]}" for c in df.columns if c not in RESULT_COLUMNS)
+    print("\n" + "=" * 50)
+    print("TUNING COMPLETATO")
+    print(f"Miglior Config: {params}")
+    print(f"Reward: {best['MEAN_REWARD']:.2f}")
+    print(f"Report completo: {results_file}")
@@ -0,0 +1,353 @@
+"""
+2D Quadcopter AI by Alexandre Sajus
+
+More information at:
+https://github.com/AlexandreSajus/Quadcopter-AI
+
+Native vectorized environment for the drone task.
+
+DroneVecEnv implements the stable-baselines3 VecEnv interface directly over
+batched state arrays (see quadai/physics.py) instead of holding one droneEnv
+per worker. Every frame of every drone is computed with one vectorized call,
+so rollout collection with hundreds of parallel drones is limited by the
+policy forward pass and not by env stepping.
+
+The dynamics, rewards and terminations are the same as the droneEnv of
+env_PPO.py (wind and sensor noise disabled) and env_noisy_PPO.py (enabled).
+The frames of an action run in a kernel (see quadai/kernels.py): compiled by
+Numba when it is installed, vectorized NumPy otherwise.
+"""
+
+from typing import Any, List, Optional, Sequence
+
+import numpy as np
+from gym import spaces
+from stable_baselines3.common.vec_env.base_vec_env import VecEnv
+
+from quadai.kernels import get_kernel
+from quadai.obs import OBS_SIZE, build_obs_batch
+from quadai.random_streams import BatchStream
+from quadai.physics import (
+    FPS,
+    GRAVITY,
+    THRUSTER_AMPLITUDE,
+    DIFF_AMPLITUDE,
+    THRUSTER_MEAN,
+    MASS,
+    ARM,
+    FRAMES_PER_ACTION,
+    DroneState,
+    mix_thrusters,
+)
+
+DEFAULT_SENSOR_NOISE_STD = [0.01, 0.02, 0.01, 0.02, 0.01, 0.01, 0.02]
+
+
+class DroneVecEnv(VecEnv):
+    """
+    N drone environments stepped together on structure-of-arrays buffers.
+
+    Finished environments are reset automatically: their last observation is
+    stored in infos[i]["terminal_observation"], as in DummyVecEnv, together
+    with infos[i]["balloons"] (targets reached in the episode) and
+    infos[i]["crashed"] (episode ended by flying too far from the target).
+
+    With record_path, the state of every drone is appended to a trajectory
+    file after each step (see quadai/trajectory.py and quadai/replay.py).
+
+    Every env has its own Generator, spawned from np.random.SeedSequence(seed)
+    as in quadai/utils/training.make_vec_env: env i draws its targets, wind
+    and sensor noise only from its own stream, so with the same seed it
+    follows the same episodes whatever num_envs is.
+
+    get_attr/set_attr select envs with indices only for per-env arrays;
+    env_method and the other attributes act on the whole batch and raise
+    ValueError when indices selects a subset of the envs.
+    """
+
+    def __init__(
+        self,
+        num_envs: int,
+        time_limit: float = 20.0,
+        # --- wind parameters (see env_noisy_PPO.py) ---
+        wind_enabled: bool = False,
+        wind_dir_min_deg: float = 0.0,
+        wind_dir_max_deg: float = 360.0,
+        wind_speed_min: float = 0.0,
+        wind_speed_max: float = 0.04,
+        wind_update_every: int = 30,
+        wind_dir_rw_std_deg: float = 2.0,
+        wind_speed_rw_std: float = 0.003,
+        # --- sensor noise ---
+        sensor_noise_enabled: bool = False,
+        sensor_noise_std: Optional[Sequence[float]] = None,
+        seed: Optional[int] = None,
+        # --- control frequency (see droneEnv) ---
+        frame_skip: int = FRAMES_PER_ACTION,
+        physics_substeps: int = 1,
+        # --- frame kernel, see quadai/kernels.py ---
+        kernel: str = "auto",
+        # --- trajectory file written at every step, see quadai/trajectory.py ---
+        record_path: Optional[str] = None,
+    ):
+        # 2 actions: thrust amplitude and thrust difference in [-1, 1]
+        action_space = spaces.Box(low=-1, high=1, shape=(2,), dtype=np.float32)
+        # 7 observations, as in droneEnv.get_obs
+        observation_space = spaces.Box(
+            low=-np.inf, high=np.inf, shape=(OBS_SIZE,), dtype=np.float32
+        )
+        super().__init__(num_envs, observation_space, action_space)
+
+        # Physics constants
+        self.gravity = GRAVITY
+        self.thruster_amplitude = THRUSTER_AMPLITUDE
+        self.diff_amplitude = DIFF_AMPLITUDE
+        self.thruster_mean = THRUSTER_MEAN
+        self.mass = MASS
+        self.arm = ARM
+        self.time_limit = time_limit
+        self.frame_skip = frame_skip
+        self.physics_substeps = physics_substeps
+
+        self.wind_enabled = wind_enabled
+        self.wind_dir_min_deg = wind_dir_min_deg
+        self.wind_dir_max_deg = wind_dir_max_deg
+        self.wind_speed_min = wind_speed_min
+        self.wind_speed_max = wind_speed_max
+        self.wind_update_every = wind_update_every
+        self.wind_dir_rw_std_deg = wind_dir_rw_std_deg
+        self.wind_speed_rw_std = wind_speed_rw_std
+
+        self.sensor_noise_enabled = sensor_noise_enabled
+        if sensor_noise_std is None:
+            sensor_noise_std = DEFAULT_SENSOR_NOISE_STD
+        self.sensor_noise_std = np.array(sensor_noise_std, dtype=np.float32)
+
+        self.seed(seed)
+
+        # Batched state
+        self.drones = DroneState(num_envs)
+        self.xt = np.zeros(num_envs)
+        self.yt = np.zeros(num_envs)
+        self.time = np.zeros(num_envs)
+        self.target_counter = np.zeros(num_envs, dtype=np.int64)
+        self.wind_dir = np.zeros(num_envs)
+        self.wind_speed = np.zeros(num_envs)
+        self.wind_step_counter = np.zeros(num_envs, dtype=np.int64)
+
+        self.actions = np.zeros((num_envs, 2), dtype=np.float32)
+
+        self.kernel = kernel
+        self._run_frames = get_kernel(kernel)
+        # Wind increments passed to the kernel when the wind is disabled
+        self._no_wind_deltas = np.zeros((2, frame_skip, num_envs))
+
+        # Recording: one record per step with the state before the resets
+        self.recorder = None
+        self._episode = np.full(num_envs, -1, dtype=np.int64)
+        self._frame = 0
+        if record_path is not None:
+            from quadai.trajectory import TrajectoryWriter
+
+            self.recorder = TrajectoryWriter(
+                record_path,
+                num_envs,
+                names=[f"env {i}" for i in range(num_envs)],
+                fps=FPS / frame_skip,
+                source="DroneVecEnv",
+                meta={"wind_enabled": wind_enabled, "sensor_noise_enabled": sensor_noise_enabled},
+            )
+
+    # ------------------------------------------------------------------
+    # Batched helpers
+    # ------------------------------------------------------------------
+    def _reset_envs(self, mask: np.ndarray) -> None:
+        """
+        Starts a new episode for the environments selected by mask.
+        """
+        n = int(np.count_nonzero(mask))
+        if n == 0:
+            return
+        self.drones.reset(mask)
+        (self.xt[mask], self.yt[mask]) = self._targets.take(2, mask)
+        self.time[mask] = 0.0
+        self.target_counter[mask] = 0
+        self._episode[mask] += 1
+        self._sample_episode_wind(mask, n)
+
+    def _sample_episode_wind(self, mask: np.ndarray, n: int) -> None:
+        """
+        Wind domain randomization at the start of each episode.
+        """
+        self.wind_step_counter[mask] = 0
+        if not self.wind_enabled:
+            self.wind_dir[mask] = 0.0
+            self.wind_speed[mask] = 0.0
+            self.drones.wind_ax[mask] = 0.0
+            self.drones.wind_ay[mask] = 0.0
+            return
+        (u_dir, u_speed) = self._uniforms.take(2, mask)
+        dir_deg = self.wind_dir_min_deg + (self.wind_dir_max_deg - self.wind_dir_min_deg) * u_dir
+        self.wind_dir[mask] = np.deg2rad(dir_deg)
+        self.wind_speed[mask] = (
+            self.wind_speed_min + (self.wind_speed_max - self.wind_speed_min) * u_speed
+        )
+        self.drones.wind_ax[mask] = self.wind_speed[mask] * np.cos(self.wind_dir[mask])
+        self.drones.wind_ay[mask] = self.wind_speed[mask] * np.sin(self.wind_dir[mask])
+
+    def get_obs(self, index=slice(None)) -> np.ndarray:
+        """
+        Calculates the observations of the selected environments.
+
+        Args:
+            index: Slice or boolean mask of the environments (all by default)
+
+        Returns:
+            np.ndarray: (n, 7) float32 array, same features as droneEnv.get_obs
+                (see quadai/obs.py)
+        """
+        d = self.drones
+        obs = build_obs_batch(
+            d.x[index],
+            d.y[index],
+            d.xd[index],
+            d.yd[index],
+            d.a[index],
+            d.ad[index],
+            self.xt[index],
+            self.yt[index],
+        )
+
+        if self.sensor_noise_enabled:
+            noise = self._normals.take(OBS_SIZE, index).T * self.sensor_noise_std
+            obs += noise.astype(np.float32)
+        return obs
+
+    # ------------------------------------------------------------------
+    # VecEnv API
+    # ------------------------------------------------------------------
+    def reset(self) -> np.ndarray:
+        self._reset_envs(np.ones(self.num_envs, dtype=bool))
+        return self.get_obs()
+
+    def step_async(self, actions: np.ndarray) -> None:
+        self.actions = np.asarray(actions, dtype=np.float32).reshape(self.num_envs, 2)
+
+    def step_wait(self):
+        d = self.drones
+        action0 = self.actions[:, 0].astype(np.float64)
+        action1 = self.actions[:, 1].astype(np.float64)
+        d.thruster_left[:], d.thruster_right[:] = mix_thrusters(
+            action0,
+            action1,
+            self.thruster_mean,
+            self.thruster_amplitude,
+            self.diff_amplitude,
+        )
+
+        rewards = np.zeros(self.num_envs)
+        dones = np.zeros(self.num_envs, dtype=bool)
+        crashed = np.zeros(self.num_envs, dtype=bool)
+
+        # Random numbers the kernel may need in each frame: a new target
+        # when one is reached, the wind increments when the wind is updated
+        n_frames = self.frame_skip
+        new_targets = self._targets.take(2 * n_frames).reshape(2, n_frames, self.num_envs)
+        if self.wind_enabled:
+            wind_deltas = self._normals.take(2 * n_frames).reshape(2, n_frames, self.num_envs)
+            wind_deltas[0] *= np.deg2rad(self.wind_dir_rw_std_deg)
+            wind_deltas[1] *= self.wind_speed_rw_std
+        else:
+            wind_deltas = self._no_wind_deltas
+
+        # Act every frame_skip frames
+        self._run_frames(
+            d.x, d.xd, d.y, d.yd, d.a, d.ad,
+            d.thruster_left, d.thruster_right,
+            d.wind_ax, d.wind_ay, self.wind_dir, self.wind_speed, self.wind_step_counter,
+            self.xt, self.yt, self.time, self.target_counter,
+            new_targets, wind_deltas,
+            rewards, dones, crashed,
+            n_frames, self.physics_substeps,
+            1 / FPS, self.gravity, self.mass, self.arm, self.time_limit,
+            self.wind_enabled, self.wind_update_every,
+            self.wind_speed_min, self.wind_speed_max,
+        )
+
+        if self.recorder is not None:
+            self._frame += n_frames
+            self.recorder.append(
+                self._frame,
+                d.x, d.y, d.a,
+                self.xt, self.yt,
+                d.thruster_left, d.thruster_right,
+                d.wind_ax, d.wind_ay,
+                self.target_counter,
+                ~crashed,
+                self._episode,
+            )
+
+        obs = self.get_obs()
+        infos: List[dict] = [{} for _ in range(self.num_envs)]
+        if dones.any():
+            for i in np.flatnonzero(dones):
+                # Copy: the row is overwritten below by the reset observation
+                infos[i]["terminal_observation"] = obs[i].copy()
+                # Episode statistics used by quadai/utils/evaluation.py
+                infos[i]["balloons"] = int(self.target_counter[i])
+                infos[i]["crashed"] = bool(crashed[i])
+            self._reset_envs(dones)
+            obs[dones] = self.get_obs(dones)
+
+        return obs, rewards.astype(np.float32), dones, infos
+
+    def close(self) -> None:
+        if self.recorder is not None:
+            self.recorder.close()
+
+    def seed(self, seed: Optional[int] = None) -> List[Optional[int]]:
+        # One independent stream per env, as in make_vec_env
+        self.rngs = [
+            np.random.default_rng(child)
+            for child in np.random.SeedSequence(seed).spawn(self.num_envs)
+        ]
+        self._targets = BatchStream(self.rngs, lambda rng, size: rng.integers(200, 600, size))
+        self._uniforms = BatchStream(self.rngs, lambda rng, size: rng.random(size))
+        self._normals = BatchStream(self.rngs, lambda rng, size: rng.standard_normal(size))
+        return [seed] * self.num_envs
+
+    def get_attr(self, attr_name: str, indices=None) -> List[Any]:
+        value = getattr(self, attr_name)
+        indices = self._get_indices(indices)
+        if isinstance(value, np.ndarray) and value.shape[:1] == (self.num_envs,):
+            return [value[i] for i in indices]
+        return [value for _ in indices]
+
+    def set_attr(self, attr_name: str, value: Any, indices=None) -> None:
+        current = getattr(self, attr_name, None)
+        if isinstance(current, np.ndarray) and current.shape[:1] == (self.num_envs,):
+            current[list(self._get_indices(indices))] = value
+        else:
+            self._check_whole_batch(indices, f"attribute {attr_name!r}")
+            setattr(self, attr_name, value)
+
+    def env_method(self, method_name: str, *method_args, indices=None, **method_kwargs):
+        # The methods act on the whole batch: a subset of the envs can't be
+        # selected
+        self._check_whole_batch(indices, f"method {method_name!r}")
+        result = getattr(self, method_name)(*method_args, **method_kwargs)
+        return [result for _ in self._get_indices(indices)]
+
+    def _check_whole_batch(self, indices, name: str) -> None:
+        """
+        Raises ValueError if indices selects a subset of the envs for
+        something shared by the whole batch.
+        """
+        if set(self._get_indices(indices)) != set(range(self.num_envs)):
+            raise ValueError(
+                f"DroneVecEnv: {name} is shared by all the envs, "
+                f"indices must select all of them (got {indices!r})"
+            )
+
+    def env_is_wrapped(self, wrapper_class, indices=None) -> List[bool]:
+        return [False for _ in self._get_indices(indices)]
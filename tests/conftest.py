@@ -0,0 +1,6 @@
+"""Makes the quadai package importable from src/ without installing it."""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
@@ -0,0 +1,106 @@
+"""
+Allocations of droneEnv.step in steady state (preallocated_obs=True).
+
+A step writes the observation into a reused buffer and draws the sensor
+noise in place, so a training run of millions of steps does not grow the
+memory nor create a NumPy array per step. Both are checked with tracemalloc.
+"""
+
+import gc
+import importlib
+import tracemalloc
+
+import numpy as np
+import pytest
+
+from quadai.bench.envs import ENV_MODULES
+from quadai.kernels import run_frames_numba
+
+# The frame loop, and the Numba kernel used by default for training
+KERNELS = [None] + (["numba"] if run_frames_numba is not None else [])
+
+
+def _make_env(env_module, kernel):
+    module = importlib.import_module(env_module)
+    env = module.droneEnv(False, False, preallocated_obs=True, kernel=kernel)
+    if env_module.endswith("env_DQN"):
+        action = 0
+    else:
+        action = np.array([0.1, 0.2], dtype=np.float32)
+    return env, action
+
+
+def _run_episode(env, action, kept=None) -> int:
+    """
+    Runs one episode from the same seeded start: every episode is the same,
+    so the env holds the same objects at the end of every episode (an int
+    above 256, e.g. a target, is a new object, one below is cached).
+    """
+    env.reset(seed=0)
+    done = False
+    steps = 0
+    while not done:
+        (obs, _, done, _) = env.step(action)
+        if kept is not None:
+            kept.append(obs)
+        steps += 1
+    return steps
+
+
+@pytest.fixture
+def tracing():
+    tracemalloc.start()
+    yield
+    tracemalloc.stop()
+
+
+def _memory_growth(env, action, n_episodes: int) -> int:
+    """
+    Traced memory kept after n_episodes episodes.
+    """
+    # The marks go into an existing array: a new int object kept between
+    # the two measures would count as growth
+    marks = np.zeros(2, dtype=np.int64)
+    # Cyclic garbage (e.g. the Generators replaced by reset) is freed
+    # whenever the collector runs: collect it before both measures
+    gc.collect()
+    marks[0] = tracemalloc.get_traced_memory()[0]
+    for _ in range(n_episodes):
+        _run_episode(env, action)
+    gc.collect()
+    marks[1] = tracemalloc.get_traced_memory()[0]
+    return int(marks[1] - marks[0])
+
+
+@pytest.mark.parametrize("kernel", KERNELS)
+@pytest.mark.parametrize("env_module", ENV_MODULES)
+def test_step_has_no_net_growth(env_module, kernel, tracing, n_episodes=50):
+    env, action = _make_env(env_module, kernel)
+    # Warmup through the same code: buffers, Generator blocks, Numba
+    # dispatch, and the free lists of floats and tuples, whose objects
+    # tracemalloc still counts as allocated
+    _memory_growth(env, action, 20)
+
+    growth = _memory_growth(env, action, n_episodes)
+    assert growth == 0, f"{growth} bytes kept after {n_episodes} episodes"
+
+
+@pytest.mark.parametrize("kernel", KERNELS)
+@pytest.mark.parametrize("env_module", ENV_MODULES)
+def test_step_creates_no_numpy_array(env_module, kernel, tracing):
+    env, action = _make_env(env_module, kernel)
+    _run_episode(env, action)
+    numpy_domain = tracemalloc.DomainFilter(True, np.lib.tracemalloc_domain)
+
+    def numpy_bytes():
+        snapshot = tracemalloc.take_snapshot().filter_traces([numpy_domain])
+        return sum(trace.size for trace in snapshot.traces)
+
+    # Every returned observation is kept alive: a new array per step would
+    # show up in the NumPy domain (the list itself is in the Python domain)
+    kept = []
+    before = numpy_bytes()
+    steps = _run_episode(env, action, kept)
+    growth = numpy_bytes() - before
+
+    assert growth == 0, f"{growth} bytes of NumPy arrays created in {steps} steps"
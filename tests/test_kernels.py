@@ -0,0 +1,252 @@
+"""
+Parity of the frame kernels (see quadai/kernels.py).
+
+Every kernel is compared with the frame loop of droneEnv.step, which is the
+reference: through DroneVecEnv and through droneEnv(kernel=...). The random
+numbers are replayed so that both sides receive the same values, and the
+actions are float64 so that both sides compute the thrusts the same way
+(the droneEnvs of the clean envs keep float32 actions as they are).
+"""
+
+import copy
+import importlib
+
+import numpy as np
+import pytest
+
+from quadai.kernels import run_frames_numba
+
+KERNELS = ["python", "numpy"] + (["numba"] if run_frames_numba is not None else [])
+
+ENV_MODULES = [
+    "quadai.PPO.env_PPO",
+    "quadai.A2C.env_A2C",
+    "quadai.SAC.env_SAC",
+    "quadai.DQN.env_DQN",
+    "quadai.PPO.env_noisy_PPO",
+    "quadai.A2C.env_noisy_A2C",
+    "quadai.SAC.env_noisy_SAC",
+]
+
+# DroneVecEnv configurations: plain, with wind and sensor noise, and with
+# frame_skip and physics_substeps other than the defaults
+CONFIGS = {
+    "plain": {},
+    "noisy": {"wind_enabled": True, "sensor_noise_enabled": True},
+    "substeps": {"wind_enabled": True, "frame_skip": 10, "physics_substeps": 4},
+}
+
+# Kernels and frame loop run the same float64 operations in the same order:
+# only a libm difference in sin/cos could separate them
+ATOL = 1e-9
+
+
+class _ReplayedTargets:
+    """
+    Stands in for the Generator of a droneEnv during one step: integers()
+    and random() return the targets prepared for the frames of the step.
+    """
+
+    def __init__(self, env, targets):
+        self.env = env
+        self.targets = targets
+        self.first_frame = round(env.time * 60)
+        self.calls = 0
+
+    def random(self, out):
+        # EnvKernel draws the targets of all the frames at once, as
+        # 200 + floor(400 * uniform value)
+        out[:] = ((self.targets + 0.5 - 200) / 400).reshape(out.shape)
+        return out
+
+    def integers(self, low, high):
+        # The frame loop draws x then y when a target is reached, after
+        # increasing time at the start of the frame
+        frame = round(self.env.time * 60) - self.first_frame - 1
+        value = self.targets[self.calls % 2, frame]
+        self.calls += 1
+        return value
+
+
+class _ReplayedRows:
+    """
+    Stands in for a NormalStream of a droneEnv: next() returns the given rows.
+    """
+
+    def __init__(self, rows):
+        self.rows = list(rows)
+
+    def next(self) -> np.ndarray:
+        return self.rows.pop(0)
+
+
+def _replay(env, targets, wind_rows, noise):
+    env.rng = _ReplayedTargets(env, targets)
+    if hasattr(env, "_wind_stream"):
+        env._wind_stream = _ReplayedRows(wind_rows)
+        env._sensor_stream = _ReplayedRows([noise] if noise is not None else [])
+
+
+def _assert_close(actual, expected, what):
+    np.testing.assert_allclose(actual, expected, rtol=0, atol=ATOL, err_msg=what)
+
+
+@pytest.mark.parametrize("env_module", ENV_MODULES)
+@pytest.mark.parametrize("kernel", KERNELS)
+def test_env_kernel_matches_frame_loop(env_module, kernel, n_episodes=20, seed=0):
+    module = importlib.import_module(env_module)
+    reference = module.droneEnv(False, False)
+    test = module.droneEnv(False, False, kernel=kernel)
+    discrete_actions = getattr(module, "DISCRETE_ACTIONS", None)
+    rng = np.random.default_rng(seed)
+    n_frames = reference.frame_skip
+
+    for episode in range(n_episodes):
+        _assert_close(test.reset(seed=episode), reference.reset(seed=episode), "reset")
+        done = False
+        while not done:
+            targets = rng.integers(200, 600, (2, n_frames))
+            wind_rows = [rng.normal(0.0, [2.0, 0.003]) for _ in range(n_frames)]
+            noise = rng.normal(0.0, 0.01, 7).astype(np.float32)
+            if discrete_actions is None:
+                action = rng.uniform(-1, 1, 2)
+            else:
+                action = int(rng.integers(len(discrete_actions)))
+
+            _replay(reference, targets, wind_rows, noise)
+            _replay(test, targets, wind_rows, noise)
+            (obs, reward, done, _) = reference.step(action)
+            (test_obs, test_reward, test_done, _) = test.step(action)
+
+            assert test_done == done, f"episode {episode}: different end of episode"
+            _assert_close(test_obs, obs, f"episode {episode}: observations")
+            _assert_close(test_reward, reward, f"episode {episode}: rewards")
+            assert test.target_counter == reference.target_counter
+            assert (test.xt, test.yt) == (reference.xt, reference.yt)
+
+
+def test_env_kernel_is_skipped_with_on_frame():
+    module = importlib.import_module("quadai.PPO.env_PPO")
+    env = module.droneEnv(False, False, kernel="numpy")
+    frames = []
+    env.on_frame = lambda env, thruster_left, thruster_right: frames.append(env.time)
+    env.reset(seed=0)
+    env.step(np.zeros(2))
+    assert len(frames) == env.frame_skip
+
+
+@pytest.mark.parametrize("config", CONFIGS)
+@pytest.mark.parametrize("kernel", [k for k in KERNELS if k != "python"])
+def test_vec_env_kernel_matches_python_kernel(kernel, config, n_envs=64, n_steps=500, seed=0):
+    DroneVecEnv = pytest.importorskip("quadai.vec_env").DroneVecEnv
+    test = DroneVecEnv(n_envs, seed=seed, kernel=kernel, **CONFIGS[config])
+    reference = DroneVecEnv(n_envs, seed=seed, kernel="python", **CONFIGS[config])
+    actions_rng = np.random.default_rng(seed)
+
+    _assert_close(test.reset(), reference.reset(), "reset")
+    episodes = 0
+    for step in range(n_steps):
+        actions = actions_rng.uniform(-1, 1, (n_envs, 2)).astype(np.float32)
+        (obs, rewards, dones, infos) = test.step(actions)
+        (ref_obs, ref_rewards, ref_dones, ref_infos) = reference.step(actions)
+
+        assert np.array_equal(dones, ref_dones), f"step {step}: different end of episode"
+        for i in np.flatnonzero(dones):
+            for key in ("balloons", "crashed"):
+                assert infos[i][key] == ref_infos[i][key], f"step {step}, env {i}: {key}"
+            _assert_close(
+                infos[i]["terminal_observation"],
+                ref_infos[i]["terminal_observation"],
+                f"step {step}, env {i}: terminal observation",
+            )
+        episodes += int(dones.sum())
+        _assert_close(obs, ref_obs, f"step {step}: observations")
+        _assert_close(rewards, ref_rewards, f"step {step}: rewards")
+    assert episodes > 0
+
+
+def _draw_step_numbers(vec_env):
+    """
+    Random numbers vec_env will draw in its next step (same order as
+    step_wait and get_obs), from a copy of its streams.
+
+    Returns:
+        tuple: (new targets (2, n_frames), wind increments of every frame as
+            (degrees, speed) rows, sensor noise (7,) float32 or None)
+    """
+    (targets_stream, normals) = copy.deepcopy((vec_env._targets, vec_env._normals))
+    n_frames = vec_env.frame_skip
+    targets = targets_stream.take(2 * n_frames)[:, 0].reshape(2, n_frames)
+    wind_rows = []
+    if vec_env.wind_enabled:
+        deltas = normals.take(2 * n_frames)[:, 0].reshape(2, n_frames)
+        dir_deg = deltas[0] * vec_env.wind_dir_rw_std_deg
+        speed = deltas[1] * vec_env.wind_speed_rw_std
+        wind_rows = [np.array([dir_deg[f], speed[f]]) for f in range(n_frames)]
+    noise = None
+    if vec_env.sensor_noise_enabled:
+        noise = (normals.take(7)[:, 0] * vec_env.sensor_noise_std).astype(np.float32)
+    return targets, wind_rows, noise
+
+
+@pytest.mark.parametrize("config", CONFIGS)
+@pytest.mark.parametrize("kernel", KERNELS)
+def test_vec_env_matches_drone_env(kernel, config, n_episodes=20, seed=0):
+    DroneVecEnv = pytest.importorskip("quadai.vec_env").DroneVecEnv
+    env_kwargs = CONFIGS[config]
+    vec_env = DroneVecEnv(1, seed=seed, kernel=kernel, **env_kwargs)
+    controls = {"frame_skip": vec_env.frame_skip, "physics_substeps": vec_env.physics_substeps}
+    noisy = vec_env.wind_enabled or vec_env.sensor_noise_enabled
+    if noisy:
+        module = importlib.import_module("quadai.PPO.env_noisy_PPO")
+        env = module.droneEnv(
+            False,
+            False,
+            wind_enabled=vec_env.wind_enabled,
+            sensor_noise_enabled=vec_env.sensor_noise_enabled,
+            sensor_noise_std=vec_env.sensor_noise_std,
+            **controls,
+        )
+    else:
+        env = importlib.import_module("quadai.PPO.env_PPO").droneEnv(False, False, **controls)
+    actions_rng = np.random.default_rng(seed)
+
+    for episode in range(n_episodes):
+        vec_env.reset()
+        env.reset(seed=episode)
+        # Initial state and target of the DroneVecEnv copied into the droneEnv
+        d = vec_env.drones
+        for name in ("x", "xd", "y", "yd", "a", "ad"):
+            setattr(env, name, float(getattr(d, name)[0]))
+        (env.xt, env.yt) = (int(vec_env.xt[0]), int(vec_env.yt[0]))
+        if noisy:
+            env.wind_dir = float(vec_env.wind_dir[0])
+            env.wind_speed = float(vec_env.wind_speed[0])
+            (env.wind_ax, env.wind_ay) = (float(d.wind_ax[0]), float(d.wind_ay[0]))
+            env.wind_step_counter = int(vec_env.wind_step_counter[0])
+
+        done = False
+        while not done:
+            (targets, wind_rows, noise) = _draw_step_numbers(vec_env)
+            # The droneEnv takes an increment only in the frames that update
+            # the wind, the DroneVecEnv the one of the frame
+            first = getattr(env, "wind_step_counter", 0) + 1
+            updates = [
+                row
+                for f, row in enumerate(wind_rows)
+                if noisy and (first + f) % env.wind_update_every == 0
+            ]
+            _replay(env, targets, updates, noise)
+
+            action = actions_rng.uniform(-1, 1, 2).astype(np.float32)
+            (obs, rewards, dones, infos) = vec_env.step(action[None])
+            (env_obs, env_reward, done, _) = env.step(action.astype(np.float64))
+
+            assert dones[0] == done, f"episode {episode}: different end of episode"
+            if done:
+                obs = infos[0]["terminal_observation"][None]
+            _assert_close(obs[0], env_obs, f"episode {episode}: observations")
+            # DroneVecEnv returns float32 rewards
+            _assert_close(rewards[0], np.float32(env_reward), f"episode {episode}: rewards")
+            balloons = infos[0]["balloons"] if done else int(vec_env.target_counter[0])
+            assert balloons == env.target_counter, f"episode {episode}: balloons"
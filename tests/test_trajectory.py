@@ -0,0 +1,62 @@
+"""Trajectory files written by EnvRecorder."""
+
+import numpy as np
+
+from quadai.A2C.env_A2C import droneEnv as A2CDroneEnv
+from quadai.DQN.env_DQN import droneEnv as DQNDroneEnv
+from quadai.PPO.env_PPO import droneEnv as PPODroneEnv
+from quadai.SAC.env_SAC import droneEnv as SACDroneEnv
+from quadai.trajectory import EnvRecorder, Trajectory
+
+
+def test_score_counts_balloons_of_clean_envs(tmp_path):
+    for env_class, action in [
+        (PPODroneEnv, np.zeros(2, dtype=np.float32)),
+        (A2CDroneEnv, np.zeros(2, dtype=np.float32)),
+        (SACDroneEnv, np.zeros(2, dtype=np.float32)),
+        (DQNDroneEnv, 0),
+    ]:
+        path = tmp_path / f"{env_class.__module__}.traj"
+        env = EnvRecorder(env_class(False, False), str(path))
+        env.reset(seed=0)
+        drone = env.unwrapped
+        # Target on the drone: reached in the first frame
+        (drone.xt, drone.yt) = (drone.x, drone.y)
+        env.step(action)
+        env.close()
+
+        assert drone.target_counter == 1
+        assert Trajectory(str(path)).records["score"][-1, 0] == 1
+
+
+def test_one_record_per_frame(tmp_path):
+    path = tmp_path / "ppo.traj"
+    env = EnvRecorder(PPODroneEnv(False, False, frame_skip=5), str(path))
+    env.reset(seed=0)
+    for _ in range(3):
+        env.step(np.array([0.5, -0.2], dtype=np.float32))
+    drone = env.unwrapped
+    env.close()
+
+    traj = Trajectory(str(path))
+    assert traj.fps == 60
+    assert len(traj) == 15
+    assert np.array_equal(traj.records["frame"], np.arange(1, 16))
+    # The last record is the state after the last frame of the last action
+    assert traj[-1]["x"][0] == np.float32(drone.x)
+    assert traj[-1]["a"][0] == np.float32(drone.a)
+    assert len(set(traj.records["x"][:, 0])) == 15
+
+
+def test_crash_frame_is_not_alive(tmp_path):
+    path = tmp_path / "ppo.traj"
+    env = EnvRecorder(PPODroneEnv(False, False), str(path))
+    env.reset(seed=0)
+    drone = env.unwrapped
+    drone.xt = drone.x + 2000
+    (_, _, done, _) = env.step(np.zeros(2, dtype=np.float32))
+    env.close()
+
+    alive = Trajectory(str(path)).records["alive"][:, 0]
+    assert done
+    assert len(alive) == 1 and not alive[0]
@@ -0,0 +1,42 @@
+"""
+Results file of the parallel grid search (see quadai/utils/tuning.py).
+
+Every row records the timesteps it was trained for: configs eliminated early
+by successive halving must not count as done on resume, nor be ranked with
+the full-budget ones.
+"""
+
+import pytest
+
+pd = pytest.importorskip("pandas")
+pytest.importorskip("stable_baselines3")
+
+from quadai.utils import tuning
+
+HEADER = "LR, MEAN_REWARD, MAX_REWARD, TIMESTEPS"
+
+
+def _write(path, lines):
+    path.write_text("\n".join(lines) + "\n")
+    return str(path)
+
+
+def test_resume_skips_only_full_budget_rows(tmp_path):
+    results_file = _write(tmp_path / "results.txt", [HEADER, "0.1, 5.0, 6.0, 1000", "0.2, 9.0, 9.5, 250"])
+    done = tuning.read_results(results_file, HEADER, 1000)
+    completed = {key for key, line in done.items() if tuning.result_timesteps(line) >= 1000}
+    assert completed == {("0.1",)}
+
+
+def test_legacy_rows_get_the_full_budget(tmp_path):
+    results_file = _write(tmp_path / "results.txt", ["LR, MEAN_REWARD, MAX_REWARD", "0.1, 5.0, 6.0"])
+    done = tuning.read_results(results_file, HEADER, 1000)
+    assert tuning.result_timesteps(done[("0.1",)]) == 1000
+    with pytest.raises(ValueError):
+        tuning.read_results(results_file, HEADER)
+
+
+def test_best_is_taken_among_full_budget_rows(tmp_path):
+    results_file = _write(tmp_path / "results.txt", [HEADER, "0.1, 5.0, 6.0, 1000", "0.2, 9.0, 9.5, 250"])
+    df = pd.read_csv(results_file, skipinitialspace=True)
+    assert list(tuning.full_budget_rows(df)["LR"]) == [0.1]